@@ -0,0 +1,29 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+from src.browser.async_core import AsyncFingerGuardBrowser
+from loguru import logger
+
+
+async def visit(profile_name: str, url: str):
+    # 每个浏览器只占用一条DevTools连接，不需要单独的线程
+    async with AsyncFingerGuardBrowser(profile_name=profile_name) as browser:
+        await browser.navigate(url)
+        title = await browser.evaluate("document.title")
+        logger.info(f"{profile_name}: {title}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Drive several browsers concurrently from one event loop")
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--url", default="https://bot.sannysoft.com")
+    args = parser.parse_args()
+
+    await asyncio.gather(*(visit(f"async_{i}", args.url) for i in range(args.count)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
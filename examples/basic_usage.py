@@ -34,7 +34,7 @@ def main():
         fingerprint_manager.load_fingerprint(fingerprint_file)
         
         # 访问测试网站
-        browser.get_page("https://bot.sannysoft.com")  # 一个用于测试浏览器指纹的网站
+        browser.navigate("https://bot.sannysoft.com")  # 一个用于测试浏览器指纹的网站
         
         # 等待一段时间以查看结果
         time.sleep(30)
@@ -43,7 +43,7 @@ def main():
         logger.error(f"Error occurred: {str(e)}")
     finally:
         # 关闭浏览器
-        browser.quit()
+        browser.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,88 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+from src.browser.core import FingerGuardBrowser
+from src.fingerprint.noise import build_noise_script
+from loguru import logger
+
+# 在页面中测量各API的单次调用耗时（毫秒），先测原生实现再测加噪后的实现
+BENCHMARK_SCRIPT = """
+const [width, height, audioSeconds, iterations] = arguments;
+
+const canvas = document.createElement('canvas');
+canvas.width = width;
+canvas.height = height;
+const context = canvas.getContext('2d');
+const gradient = context.createLinearGradient(0, 0, width, height);
+gradient.addColorStop(0, '#336699');
+gradient.addColorStop(1, '#cc9933');
+context.fillStyle = gradient;
+context.fillRect(0, 0, width, height);
+context.fillStyle = '#000';
+context.font = '48px Arial';
+context.fillText('FingerGuard noise benchmark', 40, 80);
+
+const time = (fn, count) => {
+    const start = performance.now();
+    for (let i = 0; i < count; i++) {
+        fn(i);
+    }
+    return (performance.now() - start) / count;
+};
+
+const sampleRate = 44100;
+const length = Math.floor(sampleRate * audioSeconds);
+const buffers = [];
+for (let i = 0; i < iterations; i++) {
+    buffers.push(new AudioBuffer({ length: length, sampleRate: sampleRate, numberOfChannels: 2 }));
+}
+
+const rect = document.createElement('div');
+rect.textContent = 'benchmark';
+document.body.appendChild(rect);
+
+return {
+    getImageData: time(() => context.getImageData(0, 0, width, height), iterations),
+    toDataURL: time(() => canvas.toDataURL(), Math.max(1, Math.floor(iterations / 5))),
+    getChannelData: time((i) => buffers[i].getChannelData(0), iterations),
+    getClientRects: time(() => rect.getClientRects(), iterations * 100)
+};
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-call overhead of the noise engine")
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--audio-seconds", type=float, default=60.0)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    browser = FingerGuardBrowser(profile_name="bench_noise")
+    browser.start()
+    try:
+        browser.navigate("about:blank")
+        bench_args = (args.width, args.height, args.audio_seconds, args.iterations)
+
+        baseline = browser.driver.execute_script(BENCHMARK_SCRIPT, *bench_args)
+        browser.driver.execute_script(build_noise_script(0x5eed))
+        noised = browser.driver.execute_script(BENCHMARK_SCRIPT, *bench_args)
+
+        report = {}
+        for name, base in baseline.items():
+            report[name] = {
+                "baseline_ms": base,
+                "noised_ms": noised[name],
+                "overhead_ms": noised[name] - base
+            }
+            logger.info(f"{name}: +{noised[name] - base:.3f} ms per call")
+        print(json.dumps(report, indent=4))
+    finally:
+        browser.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+from src.browser.core import FingerGuardBrowser
+from loguru import logger
+
+# 在隐私脚本之前注入，统计每个文档中定时器回调的触发次数
+TIMER_COUNTER_SCRIPT = """
+(function() {
+    if (window.__fgTimerFires !== undefined) {
+        return;
+    }
+    window.__fgTimerFires = 0;
+    const originalSetInterval = window.setInterval;
+    const originalSetTimeout = window.setTimeout;
+    const wrap = (callback) => typeof callback === 'function'
+        ? function() { window.__fgTimerFires++; return callback.apply(this, arguments); }
+        : callback;
+    window.setInterval = function(callback, ...rest) {
+        return originalSetInterval.call(this, wrap(callback), ...rest);
+    };
+    window.setTimeout = function(callback, ...rest) {
+        return originalSetTimeout.call(this, wrap(callback), ...rest);
+    };
+})();
+"""
+
+
+def _task_duration(driver) -> float:
+    """读取当前标签页渲染进程累计的任务耗时（秒）"""
+    metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+    for metric in metrics:
+        if metric["name"] == "TaskDuration":
+            return metric["value"]
+    return 0.0
+
+
+def measure(hardened: bool, tabs: int, duration: float) -> dict:
+    """打开N个标签页并注入隐私脚本，统计定时器唤醒次数和CPU时间"""
+    mode = "hardened" if hardened else "polling"
+    browser = FingerGuardBrowser(profile_name=f"bench_{mode}", hardened_privacy=hardened)
+    browser.start()
+    try:
+        for index in range(tabs):
+            if index > 0:
+                browser.new_tab()
+            browser.driver.execute_cdp_cmd("Performance.enable", {})
+            browser.driver.execute_script(TIMER_COUNTER_SCRIPT)
+            browser._inject_privacy_scripts()
+
+        baseline = []
+        for index in range(len(browser.tabs)):
+            browser.switch_tab(index)
+            baseline.append(_task_duration(browser.driver))
+
+        time.sleep(duration)
+
+        wakeups = 0
+        cpu_time = 0.0
+        for index in range(len(browser.tabs)):
+            browser.switch_tab(index)
+            wakeups += browser.driver.execute_script("return window.__fgTimerFires || 0;")
+            cpu_time += _task_duration(browser.driver) - baseline[index]
+
+        return {
+            "mode": mode,
+            "tabs": len(browser.tabs),
+            "duration": duration,
+            "timer_wakeups": wakeups,
+            "wakeups_per_second": wakeups / duration,
+            "cpu_time": cpu_time
+        }
+    finally:
+        browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare polling and hardened privacy scripts")
+    parser.add_argument("--tabs", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+
+    results = []
+    for hardened in (False, True):
+        result = measure(hardened, args.tabs, args.duration)
+        logger.info(f"{result['mode']}: {result['timer_wakeups']} wakeups, {result['cpu_time']:.3f}s CPU")
+        results.append(result)
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
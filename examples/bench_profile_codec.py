@@ -0,0 +1,154 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import dataclasses
+import json
+import tempfile
+import time
+import tracemalloc
+from src.browser.profile import BrowserProfile
+from src.browser.profile_codec import decode_profile, encode_profile
+from src.browser.profile_store import ProfileStore
+from loguru import logger
+
+FINGERPRINT_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "src", "fingerprint", "fingerprints", "default.json"
+)
+
+# 不带__slots__的同字段版本，用于对比每个实例的内存占用
+DictProfile = dataclasses.make_dataclass("DictProfile", [
+    (f.name, f.type, dataclasses.field(default=f.default, default_factory=f.default_factory))
+    for f in dataclasses.fields(BrowserProfile)
+])
+
+
+def make_profiles(count: int) -> dict:
+    """生成带完整指纹的配置文件字典（与profiles.json格式相同）"""
+    fingerprint = {}
+    if os.path.exists(FINGERPRINT_FILE):
+        with open(FINGERPRINT_FILE, 'r', encoding='utf-8') as f:
+            fingerprint = json.load(f)
+    timezones = ["America/New_York", "Europe/Berlin", "Asia/Tokyo", None]
+    profiles = {}
+    for index in range(count):
+        name = f"profile_{index}"
+        profiles[name] = BrowserProfile(
+            name=name,
+            proxy=f"http://10.0.{index // 256 % 256}.{index % 256}:8080" if index % 3 else None,
+            timezone=timezones[index % len(timezones)],
+            geolocation={"latitude": 40.7, "longitude": -74.0} if index % 2 else None,
+            fingerprint=dict(fingerprint, noise_seed=index)
+        ).to_dict()
+    return profiles
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _peak_memory(fn) -> int:
+    tracemalloc.start()
+    try:
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def bench_json(profiles: dict, workdir: str) -> dict:
+    """旧版路径：整个字典写入缩进的profiles.json，读取时全部解析"""
+    path = os.path.join(workdir, "profiles.json")
+
+    def save():
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(profiles, f, indent=4, ensure_ascii=False)
+
+    def load():
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return [BrowserProfile.from_dict(name, item) for name, item in data.items()]
+
+    _, save_ms = _timed(save)
+    _, load_ms = _timed(load)
+    return {
+        "save_ms": save_ms,
+        "load_ms": load_ms,
+        "bytes": os.path.getsize(path),
+        "load_peak_bytes": _peak_memory(load)
+    }
+
+
+def bench_codec(profiles: dict, workdir: str) -> dict:
+    """二进制编码：纯编解码耗时，以及经ProfileStore写入和读取SQLite的耗时"""
+    encoded, encode_ms = _timed(lambda: {name: encode_profile(item) for name, item in profiles.items()})
+    _, decode_ms = _timed(lambda: [BrowserProfile.from_dict(name, decode_profile(raw)) for name, raw in encoded.items()])
+
+    store = ProfileStore(os.path.join(workdir, "profiles.db"))
+    try:
+        _, save_ms = _timed(lambda: store.write(profiles))
+
+        def load():
+            return [BrowserProfile.from_dict(name, item) for name, item in store.load_all()]
+
+        _, load_ms = _timed(load)
+        load_peak = _peak_memory(load)
+    finally:
+        store.close()
+    return {
+        "encode_ms": encode_ms,
+        "decode_ms": decode_ms,
+        "save_ms": save_ms,
+        "load_ms": load_ms,
+        "bytes": sum(len(raw) for raw in encoded.values()),
+        "load_peak_bytes": load_peak
+    }
+
+
+def bench_instances(profiles: dict) -> dict:
+    """对比有无__slots__时常驻内存的配置文件对象占用（不含共享的指纹数据）"""
+    def build(cls):
+        return [cls(name=name, proxy=item["proxy"], timezone=item["timezone"]) for name, item in profiles.items()]
+    return {
+        "slotted_bytes": _peak_memory(lambda: build(BrowserProfile)),
+        "dict_bytes": _peak_memory(lambda: build(DictProfile))
+    }
+
+
+def measure(count: int) -> dict:
+    profiles = make_profiles(count)
+    with tempfile.TemporaryDirectory() as workdir:
+        result = {
+            "profiles": count,
+            "json": bench_json(profiles, workdir),
+            "codec": bench_codec(profiles, workdir),
+            "instances": bench_instances(profiles)
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and binary profile serialization")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    results = []
+    for count in args.counts:
+        result = measure(count)
+        logger.info(
+            f"{count} profiles: JSON load {result['json']['load_ms']:.0f} ms / {result['json']['bytes']} bytes, "
+            f"codec load {result['codec']['load_ms']:.0f} ms / {result['codec']['bytes']} bytes"
+        )
+        results.append(result)
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+import undetected_chromedriver as uc
+from loguru import logger
+from .cdp import CDPConnection, CDPError
+from .core import build_chrome_arguments, load_fingerprint_file, PRIVACY_SCRIPT, HARDENED_PRIVACY_SCRIPT
+from ..fingerprint.manager import FingerprintManager
+from ..utils.timing import get_launch_timings
+
+
+class AsyncFingerGuardBrowser:
+    """基于asyncio的浏览器控制
+
+    直接启动Chrome并连接其DevTools websocket，不经过chromedriver的HTTP转发，
+    每个浏览器只占用一条websocket连接，一个事件循环即可同时驱动大量浏览器。
+    接口与FingerGuardBrowser一致，但均为协程。
+    指纹和隐私保护脚本在每个标签页创建时合并为一个脚本注册，之后每个文档都在页面脚本之前应用。
+    """
+
+    LAUNCH_TIMEOUT = 30.0
+    NAVIGATE_TIMEOUT = 10.0
+    # 等待Chrome创建启动参数中的初始标签页的最长时间
+    INITIAL_TAB_TIMEOUT = 2.0
+
+    def __init__(self, profile_name: str = "default", fingerprint_name: str = "default", proxy: str = None,
+                 hardened_privacy: bool = True, chrome_path: str = None):
+        self.profile_name = profile_name
+        self.fingerprint_name = fingerprint_name
+        self.proxy = proxy
+        self.hardened_privacy = hardened_privacy
+        self.chrome_path = chrome_path
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.connection: Optional[CDPConnection] = None
+        self.tabs: List[str] = []  # targetId
+        self.sessions: Dict[str, str] = {}  # targetId -> sessionId
+        self.current_tab_index = -1
+
+        # 与同步版本使用同一个配置目录
+        self.profile_dir = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            "src", "profiles", profile_name
+        )
+        os.makedirs(self.profile_dir, exist_ok=True)
+        self.fingerprint = load_fingerprint_file(fingerprint_name)
+        if not self.fingerprint:
+            logger.warning(f"Fingerprint {fingerprint_name} not found, only privacy scripts will be injected")
+
+    def _tab_script(self) -> str:
+        """每个标签页注册的脚本：指纹覆盖和隐私保护"""
+        privacy_script = HARDENED_PRIVACY_SCRIPT if self.hardened_privacy else PRIVACY_SCRIPT
+        if not self.fingerprint:
+            return privacy_script
+        return FingerprintManager.compile_bundle(self.fingerprint) + "\n" + privacy_script
+
+    def _build_arguments(self) -> List[str]:
+        """创建Chrome启动参数，调试端口由Chrome自行选择"""
+        return build_chrome_arguments(self.profile_dir, self.proxy) + [
+            "--remote-debugging-port=0",
+            "about:blank"
+        ]
+
+    async def _wait_for_devtools_url(self) -> str:
+        """读取Chrome写入配置目录的DevToolsActivePort文件"""
+        port_file = os.path.join(self.profile_dir, "DevToolsActivePort")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.LAUNCH_TIMEOUT
+        while loop.time() < deadline:
+            if self.process.returncode is not None:
+                raise RuntimeError(f"Chrome exited during startup with code {self.process.returncode}")
+            try:
+                with open(port_file, "r", encoding="utf-8") as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    return f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+            except OSError:
+                pass
+            await asyncio.sleep(0.05)
+        raise TimeoutError("Timed out waiting for Chrome DevTools endpoint")
+
+    async def start(self):
+        """启动浏览器并连接DevTools"""
+        timings = get_launch_timings()
+        tags = {"profile": self.profile_name, "proxy": self.proxy}
+        try:
+            with timings.span("build_options", **tags):
+                arguments = self._build_arguments()
+                chrome_path = self.chrome_path or uc.find_chrome_executable()
+                if not chrome_path:
+                    raise RuntimeError("Chrome executable not found")
+                # 删除上次运行残留的端口文件
+                try:
+                    os.remove(os.path.join(self.profile_dir, "DevToolsActivePort"))
+                except OSError:
+                    pass
+
+            with timings.span("spawn", **tags):
+                self.process = await asyncio.create_subprocess_exec(
+                    chrome_path, *arguments,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+                ws_url = await self._wait_for_devtools_url()
+
+            with timings.span("connect", **tags):
+                self.connection = CDPConnection(ws_url)
+                await self.connection.connect()
+                self.connection.on("Target.targetDestroyed", self._on_target_destroyed)
+                await self.connection.send("Target.setDiscoverTargets", {"discover": True})
+
+            # 接管Chrome启动时打开的about:blank标签页，避免留下未注入脚本的页面；
+            # 没有现成的页面时再创建第一个标签页
+            with timings.span("first_tab", **tags):
+                for target_id in await self._initial_pages():
+                    await self._adopt_tab(target_id)
+                if self.tabs:
+                    await self.switch_tab(0)
+                else:
+                    await self.new_tab()
+
+            return self
+
+        except Exception as e:
+            logger.error(f"Failed to start browser: {str(e)}")
+            await self.close()
+            raise
+
+    async def _initial_pages(self) -> List[str]:
+        """返回启动时已打开的页面目标，DevTools端点可能先于初始标签页就绪，短暂等待其出现"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.INITIAL_TAB_TIMEOUT
+        while True:
+            targets = await self.connection.send("Target.getTargets")
+            pages = [info["targetId"] for info in targets.get("targetInfos", []) if info.get("type") == "page"]
+            if pages or loop.time() >= deadline:
+                return pages
+            await asyncio.sleep(0.05)
+
+    def _on_target_destroyed(self, params: Dict[str, Any], session_id: Optional[str]):
+        target_id = params.get("targetId")
+        if target_id in self.tabs:
+            index = self.tabs.index(target_id)
+            self.tabs.pop(index)
+            self.sessions.pop(target_id, None)
+            # 标签页被页面脚本或用户关闭时保持当前索引有效
+            if index < self.current_tab_index or self.current_tab_index >= len(self.tabs):
+                self.current_tab_index -= 1
+
+    async def _setup_tab(self, session_id: str):
+        """为新标签页启用Page域并注入指纹和隐私保护脚本"""
+        await self.connection.send("Page.enable", session_id=session_id)
+        try:
+            await self.connection.send(
+                "Page.addScriptToEvaluateOnNewDocument",
+                {"source": self._tab_script()},
+                session_id=session_id
+            )
+        except CDPError as e:
+            logger.error(f"Failed to inject fingerprint scripts: {str(e)}")
+
+    @property
+    def current_session(self) -> str:
+        if not self.connection or not self.tabs:
+            raise Exception("No tabs available")
+        return self.sessions[self.tabs[self.current_tab_index]]
+
+    async def new_tab(self) -> str:
+        """创建新标签页并切换过去，返回targetId"""
+        if not self.connection:
+            raise Exception("Browser not started")
+
+        result = await self.connection.send("Target.createTarget", {"url": "about:blank"})
+        target_id = result["targetId"]
+        await self._adopt_tab(target_id)
+        await self.switch_tab(len(self.tabs) - 1)
+        return target_id
+
+    async def _adopt_tab(self, target_id: str):
+        """附加到已有的页面目标，注入脚本后加入标签页列表"""
+        attached = await self.connection.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})
+        self.sessions[target_id] = attached["sessionId"]
+        await self._setup_tab(attached["sessionId"])
+        self.tabs.append(target_id)
+
+    async def close_tab(self):
+        """关闭当前标签页"""
+        if not self.connection or not self.tabs:
+            raise Exception("No tabs to close")
+
+        target_id = self.tabs.pop(self.current_tab_index)
+        self.sessions.pop(target_id, None)
+        await self.connection.send("Target.closeTarget", {"targetId": target_id})
+
+        # 如果还有标签页，切换到最后一个
+        if self.tabs:
+            await self.switch_tab(len(self.tabs) - 1)
+        else:
+            self.current_tab_index = -1
+
+    async def switch_tab(self, index: int):
+        """切换到指定标签页"""
+        if not self.connection or not self.tabs:
+            raise Exception("No tabs available")
+
+        if 0 <= index < len(self.tabs):
+            self.current_tab_index = index
+            await self.connection.send("Target.activateTarget", {"targetId": self.tabs[index]})
+        else:
+            raise Exception("Invalid tab index")
+
+    async def navigate(self, url: str):
+        """访问URL，等待DOMContentLoaded"""
+        session_id = self.current_session
+        try:
+            loaded = self.connection.expect("Page.domContentEventFired", session_id)
+            result = await self.connection.send("Page.navigate", {"url": url}, session_id=session_id)
+            if result.get("errorText"):
+                loaded.cancel()
+                raise CDPError(result["errorText"])
+            # 同一文档内的跳转不会触发新的加载事件
+            if result.get("loaderId"):
+                await asyncio.wait_for(loaded, self.NAVIGATE_TIMEOUT)
+            else:
+                loaded.cancel()
+        except Exception as e:
+            logger.error(f"Failed to navigate to {url}: {str(e)}")
+            raise
+
+    async def evaluate(self, expression: str) -> Any:
+        """在当前标签页执行脚本并返回结果"""
+        result = await self.connection.send(
+            "Runtime.evaluate",
+            {"expression": expression, "returnByValue": True, "awaitPromise": True},
+            session_id=self.current_session
+        )
+        if "exceptionDetails" in result:
+            raise CDPError(result["exceptionDetails"].get("text", "Evaluation failed"))
+        return result.get("result", {}).get("value")
+
+    async def close(self):
+        """关闭浏览器"""
+        try:
+            if self.connection:
+                try:
+                    await self.connection.send("Browser.close", timeout=5.0)
+                except Exception:
+                    pass
+                await self.connection.close()
+            if self.process and self.process.returncode is None:
+                try:
+                    await asyncio.wait_for(self.process.wait(), 5.0)
+                except asyncio.TimeoutError:
+                    self.process.kill()
+                    await self.process.wait()
+        finally:
+            self.connection = None
+            self.process = None
+            self.tabs = []
+            self.sessions = {}
+            self.current_tab_index = -1
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -1,16 +1,69 @@
 import os
+import threading
+import time
 from pathlib import Path
 import json
 import undetected_chromedriver as uc
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
 from loguru import logger
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional
 from .profile import ProfileManager, BrowserProfile
+from .pool import BrowserPool
+from .supervisor import BrowserSupervisor, pid_alive, process_start_time, same_process, terminate_pid
+from .session_registry import SessionRecord, SessionRegistry
+from .cdp import browser_ws_url, debugger_address
+from .driver_cache import get_driver_cache, CHROME_VERSION_MAIN
+from .launch_modes import launch_mode_arguments, apply_launch_mode
+from .resource_policy import ResourceBlocker, ResourceStats, is_policy_active, normalize_policy
+from .target_setup import TargetInitializer
+from .runtime_privacy import WEBGL_DISABLE_SCRIPT, WEBRTC_DISABLE_SCRIPT
+from ..fingerprint.noise import build_noise_script, noise_seed
+from ..utils.timing import get_launch_timings
 
 class BrowserManager:
     """浏览器管理器"""
-    def __init__(self):
+    def __init__(self, pool_size: int = 0, pool_idle_ttl: float = 300.0, auto_restart: bool = False):
         self.config_dir = os.path.join(os.path.dirname(__file__), "config")
         os.makedirs(self.config_dir, exist_ok=True)
         self.profile_manager = ProfileManager(self.config_dir)
+        
+        # 正在启动中的配置文件，防止同一配置被并发启动两次
+        self._launching = set()
+        self._launching_lock = threading.Lock()
+        
+        # 运行中配置文件的资源拦截器，以及按配置文件累计的拦截计数
+        self.resource_blockers: Dict[str, ResourceBlocker] = {}
+        self.resource_stats: Dict[str, ResourceStats] = {}
+        # 运行中配置文件的页面初始化器，在每个标签页和iframe上应用覆盖设置和注入脚本
+        self.target_initializers: Dict[str, TargetInitializer] = {}
+        
+        # 监控浏览器进程，崩溃或窗口被关闭时更新状态，可选自动重启
+        self.supervisor = BrowserSupervisor(
+            on_exit=self._on_browser_exit,
+            restart=self.launch_browser,
+            auto_restart=auto_restart
+        )
+        self.supervisor.start()
+        
+        # 跨进程共享的会话表，记录所有管理器进程中正在运行的浏览器
+        # 同时记录本进程的启动时间，其他进程据此识别被复用的PID
+        self.sessions = SessionRegistry(os.path.join(self.config_dir, "sessions.db"))
+        self._owner_started = process_start_time(os.getpid())
+        
+        # 可选的预热浏览器池，pool_size为0时每次都冷启动
+        self.pool = None
+        if pool_size > 0:
+            self.pool = BrowserPool(size=pool_size, idle_ttl=pool_idle_ttl)
+            self.pool.start()
+        
+        # 在后台接管上一个进程留下仍在运行的浏览器，不阻塞界面启动；
+        # 每个会话的结果以reconciled健康事件发送，全部完成后记录在reconcile_results中
+        self.reconciled = threading.Event()
+        self.reconcile_results: Dict[str, str] = {}
+        threading.Thread(target=self._reconcile_in_background, name="ReconcileSessions", daemon=True).start()
 
     def create_profile(self, name: str, **kwargs) -> BrowserProfile:
         """创建新的浏览器配置文件"""
@@ -28,11 +81,11 @@ class BrowserManager:
         """删除浏览器配置文件"""
         self.profile_manager.delete_profile(name)
 
-    def list_profiles(self) -> dict:
+    def list_profiles(self) -> Mapping:
         """列出所有配置文件"""
         return self.profile_manager.list_profiles()
 
-    def get_all_profiles(self) -> dict:
+    def get_all_profiles(self) -> Mapping:
         """获取所有配置文件（list_profiles的别名）"""
         return self.list_profiles()
 
@@ -47,74 +100,101 @@ class BrowserManager:
                 logger.warning(f"Browser {profile_name} is already running")
                 return profile.driver
                 
-            logger.info(f"Launching browser with profile: {profile_name}")
-            
-            options = uc.ChromeOptions()
-            
-            # 设置代理
-            if profile.proxy:
-                logger.info(f"Setting proxy: {profile.proxy}")
-                try:
-                    options.add_argument(f'--proxy-server={profile.proxy}')
-                except Exception as e:
-                    logger.error(f"Failed to set proxy: {str(e)}")
-                    raise
-            
-            # 设置时区
-            if profile.timezone:
-                options.add_argument(f'--timezone={profile.timezone}')
-            
-            # 设置地理位置
-            if profile.geolocation:
-                lat = profile.geolocation.get('latitude')
-                lng = profile.geolocation.get('longitude')
-                if lat is not None and lng is not None:
-                    options.add_argument(f'--geolocation-override={lat},{lng}')
-            
-            # WebRTC 设置
-            if profile.webrtc == "disable":
-                options.add_argument('--disable-webrtc')
-            elif profile.webrtc == "only public ip":
-                options.add_argument('--force-webrtc-ip-handling-policy=default_public_interface_only')
-            
-            # 指纹保护设置
-            if profile.canvas_fp:
-                options.add_argument('--disable-reading-from-canvas')
-            
-            if profile.webgl_fp:
-                options.add_argument('--disable-webgl')
-                options.add_argument('--disable-webgl2')
-                
-            if profile.audio_fp:
-                options.add_argument('--disable-audio-input')
-                options.add_argument('--disable-audio-output')
+            with self._launching_lock:
+                if profile_name in self._launching:
+                    raise ValueError(f"Browser {profile_name} is already launching")
+                self._launching.add(profile_name)
                 
-            if profile.client_rects_fp:
-                options.add_argument('--disable-client-rects')
+            logger.info(f"Launching browser with profile: {profile_name}")
             
-            # 启动浏览器
+            # 启动浏览器，各阶段耗时按配置名称和代理打标签记录
+            timings = get_launch_timings()
+            tags = {"profile": profile_name, "proxy": profile.proxy}
+            driver = None
             try:
-                # 添加必要的启动参数
-                options.add_argument('--no-sandbox')
-                options.add_argument('--disable-dev-shm-usage')
+                with timings.span("reattach", **tags):
+                    driver, started_at = self._reattach_session(profile_name)
+                if driver is None and self.pool:
+                    launch_only = self.get_launch_only_settings(profile_name)
+                    if launch_only:
+                        logger.info(f"Cold start required for {profile_name}, launch-only settings: {launch_only}")
+                    else:
+                        with timings.span("pool_acquire", **tags):
+                            driver = self.pool.acquire()
+                        if driver is None:
+                            logger.info("Browser pool is empty, falling back to cold start")
+                        else:
+                            logger.info(f"Using warm browser from pool: {profile_name}")
                 
-                driver = uc.Chrome(options=options)
-                profile.driver = driver
-                profile.is_running = True
-                self.profile_manager.save_profiles()  # 使用正确的方法名
+                if driver is None:
+                    with timings.span("build_options", **tags):
+                        options = self._build_options(profile)
+                    with timings.span("driver_resolve", **tags):
+                        driver_path = get_driver_cache().get_driver_path(CHROME_VERSION_MAIN)
+                    with timings.span("spawn", **tags):
+                        driver = uc.Chrome(
+                            options=options,
+                            driver_executable_path=driver_path,
+                            version_main=CHROME_VERSION_MAIN
+                        )
+                # CDP覆盖设置随驱动的DevTools会话失效，接管的浏览器同样需要重新应用
+                with timings.span("runtime_settings", **tags):
+                    self._apply_runtime_settings(driver, profile)
+                self.profile_manager.set_running(profile_name, driver)
+                self.supervisor.register(profile_name, driver)
+                self._record_session(profile_name, driver, started_at)
                 logger.info(f"Browser launched successfully: {profile_name}")
                 return driver
             except Exception as e:
                 logger.error(f"Failed to launch browser: {str(e)}")
-                profile.is_running = False
-                profile.driver = None
-                self.profile_manager.save_profiles()  # 使用正确的方法名
+                self.supervisor.unregister(profile_name)
+                self._stop_target_initializer(profile_name)
+                self._stop_resource_blocker(profile_name)
+                self.sessions.remove(profile_name, os.getpid())
+                # 驱动可能来自接管、预热池或冷启动，设置失败时同样要退出，避免遗留Chrome进程
+                if driver is not None:
+                    try:
+                        driver.quit()
+                    except Exception as quit_error:
+                        logger.error(f"Failed to quit browser after launch failure: {str(quit_error)}")
+                self.profile_manager.set_running(profile_name, None)
                 raise
+            finally:
+                with self._launching_lock:
+                    self._launching.discard(profile_name)
                 
         except Exception as e:
             logger.error(f"Error launching browser: {str(e)}")
             raise
 
+    def launch_many(self, profile_names: Iterable[str], max_parallel: Optional[int] = None) -> Dict[str, Future]:
+        """并发启动多个配置文件，返回每个配置文件对应的Future
+
+        最多同时启动max_parallel个浏览器（默认为CPU核心数）。
+        """
+        names = list(dict.fromkeys(profile_names))
+        if not names:
+            return {}
+        max_parallel = max_parallel or os.cpu_count() or 4
+        executor = ThreadPoolExecutor(max_workers=min(max_parallel, len(names)), thread_name_prefix="launch")
+        try:
+            futures = {name: executor.submit(self.launch_browser, name) for name in names}
+        finally:
+            # 不等待完成，线程在所有任务结束后自行退出
+            executor.shutdown(wait=False)
+        logger.info(f"Launching {len(names)} browsers with up to {max_parallel} in parallel")
+        return futures
+
+    def launch_many_and_wait(self, profile_names: Iterable[str],
+                             max_parallel: Optional[int] = None) -> Dict[str, Optional[str]]:
+        """并发启动并等待全部完成，返回每个配置文件的错误信息（成功为None）"""
+        futures = self.launch_many(profile_names, max_parallel)
+        wait(futures.values())
+        return {
+            name: (str(future.exception()) if future.exception() else None)
+            for name, future in futures.items()
+        }
+
     def close_browser(self, profile_name: str):
         """关闭指定的浏览器"""
         try:
@@ -128,21 +208,298 @@ class BrowserManager:
                 
             logger.info(f"Closing browser: {profile_name}")
             
+            self.supervisor.unregister(profile_name)
+            self._stop_target_initializer(profile_name)
+            self._stop_resource_blocker(profile_name)
+            self.sessions.remove(profile_name, os.getpid())
             try:
                 if profile.driver:
                     profile.driver.quit()
             except Exception as e:
                 logger.error(f"Error while closing browser: {str(e)}")
             finally:
-                profile.driver = None
-                profile.is_running = False
-                self.profile_manager.save_profiles()  # 修复方法名
+                self.profile_manager.set_running(profile_name, None)
                 logger.info(f"Browser closed: {profile_name}")
                 
         except Exception as e:
             logger.error(f"Error closing browser: {str(e)}")
             raise
 
+    def _build_options(self, profile: BrowserProfile) -> uc.ChromeOptions:
+        """构建冷启动时使用的Chrome选项"""
+        options = uc.ChromeOptions()
+        
+        # 设置代理
+        if profile.proxy:
+            logger.info(f"Setting proxy: {profile.proxy}")
+            try:
+                options.add_argument(f'--proxy-server={profile.proxy}')
+            except Exception as e:
+                logger.error(f"Failed to set proxy: {str(e)}")
+                raise
+        
+        # 设置时区
+        if profile.timezone:
+            options.add_argument(f'--timezone={profile.timezone}')
+        
+        # 设置地理位置
+        if profile.geolocation:
+            lat = profile.geolocation.get('latitude')
+            lng = profile.geolocation.get('longitude')
+            if lat is not None and lng is not None:
+                options.add_argument(f'--geolocation-override={lat},{lng}')
+        
+        # WebRTC 设置（禁用WebRTC和WebGL保护在运行时注入，预热和冷启动的浏览器表现一致）
+        if profile.webrtc == "only public ip":
+            options.add_argument('--force-webrtc-ip-handling-policy=default_public_interface_only')
+        
+        # 启动模式（有界面/无头/精简），窗口尺寸与指纹屏幕一致
+        for argument in launch_mode_arguments(profile.launch_mode, profile.fingerprint, profile.headless):
+            options.add_argument(argument)
+        
+        # 添加必要的启动参数
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        return options
+
+    def get_launch_only_settings(self, profile_name: str) -> List[str]:
+        """返回只能在启动时应用的设置，非空时无法使用预热浏览器"""
+        profile = self.profile_manager.get_profile(profile_name)
+        if not profile:
+            raise ValueError(f"Profile {profile_name} not found")
+        settings = []
+        if profile.proxy:
+            settings.append("proxy")
+        if profile.webrtc == "only public ip":
+            settings.append("webrtc")
+        if profile.launch_mode != "headful":
+            settings.append("launch_mode")
+        if profile.headless:
+            settings.append("headless")
+        return settings
+
+    def _apply_runtime_settings(self, driver, profile: BrowserProfile):
+        """通过CDP应用可在运行时设置的项（预热和冷启动的浏览器都适用）
+
+        时区、地理位置和注入脚本由TargetInitializer应用到每个标签页和iframe。
+        """
+        initializer = TargetInitializer.for_driver(driver)
+        apply_launch_mode(driver, initializer, profile.launch_mode, profile.fingerprint, profile.headless)
+        if profile.timezone:
+            initializer.add("Emulation.setTimezoneOverride", {"timezoneId": profile.timezone})
+        if profile.geolocation:
+            lat = profile.geolocation.get('latitude')
+            lng = profile.geolocation.get('longitude')
+            if lat is not None and lng is not None:
+                initializer.add(
+                    "Emulation.setGeolocationOverride",
+                    {"latitude": lat, "longitude": lng, "accuracy": 100}
+                )
+        if profile.webrtc == "disable":
+            initializer.add_script(WEBRTC_DISABLE_SCRIPT)
+        if profile.webgl_fp:
+            initializer.add_script(WEBGL_DISABLE_SCRIPT)
+        self._install_noise_engine(initializer, profile)
+        # 资源拦截作为初始化钩子，与注入脚本共用同一个自动附加连接，目标只在两者都完成后恢复
+        if is_policy_active(profile.resource_policy):
+            self._start_resource_blocker(initializer, profile)
+        if initializer.active:
+            # 先登记再启动，启动失败时由launch_browser的清理路径关闭连接
+            self.target_initializers[profile.name] = initializer
+            initializer.start()
+
+    def _stop_target_initializer(self, profile_name: str):
+        initializer = self.target_initializers.pop(profile_name, None)
+        if initializer:
+            initializer.stop()
+
+    def _start_resource_blocker(self, initializer: TargetInitializer, profile: BrowserProfile):
+        stats = self.resource_stats.setdefault(profile.name, ResourceStats())
+        blocker = ResourceBlocker(initializer, profile.resource_policy, stats)
+        blocker.attach()
+        self.resource_blockers[profile.name] = blocker
+
+    def _stop_resource_blocker(self, profile_name: str):
+        blocker = self.resource_blockers.pop(profile_name, None)
+        if blocker:
+            blocker.stop()
+
+    def set_resource_policy(self, profile_name: str, policy: Dict) -> BrowserProfile:
+        """更新配置文件的资源拦截策略，浏览器运行中时立即生效，无需重启"""
+        profile = self.profile_manager.get_profile(profile_name)
+        if not profile:
+            raise ValueError(f"Profile {profile_name} not found")
+        profile.resource_policy = normalize_policy(policy)
+        self.profile_manager.save_profile(profile_name)
+        
+        if profile.is_running and profile.driver:
+            blocker = self.resource_blockers.get(profile_name)
+            if blocker:
+                blocker.update_policy(profile.resource_policy)
+            elif is_policy_active(profile.resource_policy):
+                initializer = self.target_initializers.get(profile_name)
+                if initializer is None:
+                    initializer = TargetInitializer.for_driver(profile.driver)
+                    self._start_resource_blocker(initializer, profile)
+                    self.target_initializers[profile_name] = initializer
+                    initializer.start()
+                else:
+                    self._start_resource_blocker(initializer, profile)
+        return profile
+
+    def get_resource_stats(self, profile_name: str) -> Dict:
+        """获取配置文件累计拦截的请求数和估算节省的字节数"""
+        stats = self.resource_stats.get(profile_name)
+        return stats.to_dict() if stats else ResourceStats().to_dict()
+
+    def shutdown(self):
+        """停止进程监控、关闭预热浏览器池并写入未保存的配置
+
+        仍在运行的浏览器保留在会话表中，下一个管理器进程启动时会接管它们。
+        """
+        self.supervisor.shutdown()
+        if self.pool:
+            self.pool.shutdown()
+        self.profile_manager.flush()
+        self.sessions.close()
+
+    def list_sessions(self) -> List[SessionRecord]:
+        """列出所有进程中正在运行的浏览器"""
+        return self.sessions.list_sessions()
+
+    def reconcile_sessions(self) -> Dict[str, str]:
+        """对照存活进程核对会话表，接管上一个进程留下的浏览器
+
+        返回每个会话的处理结果：reattached（已接管）、removed（进程已退出或配置已删除）、
+        foreign（由其他存活的进程控制）、failed（接管失败），每个结果同时作为reconciled健康事件发送。
+        """
+        me = os.getpid()
+        results = {}
+        survivors = []
+        for record in self.sessions.list_sessions():
+            name = record.profile_name
+            if record.owner_pid != me and same_process(record.owner_pid, record.owner_started):
+                results[name] = "foreign"
+            elif not self._session_alive(record):
+                self.sessions.remove(name, record.owner_pid)
+                if record.driver_pid and pid_alive(record.driver_pid):
+                    terminate_pid(record.driver_pid)
+                results[name] = "removed"
+            elif not self.profile_manager.exists(name):
+                logger.warning(f"Closing browser of deleted profile {name}")
+                terminate_pid(record.browser_pid)
+                self.sessions.remove(name, record.owner_pid)
+                results[name] = "removed"
+            else:
+                survivors.append(name)
+        
+        for name, error in self.launch_many_and_wait(survivors).items():
+            results[name] = "failed" if error else "reattached"
+        if results:
+            logger.info(f"Reconciled {len(results)} browser sessions: {results}")
+        for name, result in results.items():
+            self.supervisor.emit("reconciled", name, result=result)
+        return results
+
+    def _reconcile_in_background(self):
+        try:
+            self.reconcile_results = self.reconcile_sessions()
+        except Exception as e:
+            logger.error(f"Failed to reconcile browser sessions: {str(e)}")
+        finally:
+            self.reconciled.set()
+
+    @staticmethod
+    def _session_alive(record: SessionRecord) -> bool:
+        """浏览器进程存活且DevTools端口可连接（排除PID被复用的情况）"""
+        if not record.browser_pid or not pid_alive(record.browser_pid):
+            return False
+        try:
+            browser_ws_url(record.debugger_address, timeout=2.0)
+            return True
+        except Exception:
+            return False
+
+    def _reattach_session(self, profile_name: str):
+        """接管会话表中仍在运行的浏览器，返回(驱动, 启动时间)，没有可接管的浏览器时返回(None, None)"""
+        record = self.sessions.get(profile_name)
+        if record is None:
+            return None, None
+        me = os.getpid()
+        if record.owner_pid != me and same_process(record.owner_pid, record.owner_started):
+            raise ValueError(f"Browser {profile_name} is running in process {record.owner_pid}")
+        if not self._session_alive(record):
+            self.sessions.remove(profile_name, record.owner_pid)
+            return None, None
+        if not self.sessions.claim(profile_name, record.owner_pid, me, owner_started=self._owner_started):
+            raise ValueError(f"Browser {profile_name} was taken over by another process")
+        
+        # 浏览器由undetected-chromedriver独立启动，结束旧进程留下的chromedriver不影响浏览器
+        if record.driver_pid and record.driver_pid != record.browser_pid and pid_alive(record.driver_pid):
+            terminate_pid(record.driver_pid)
+        try:
+            options = webdriver.ChromeOptions()
+            options.debugger_address = record.debugger_address
+            service = Service(executable_path=get_driver_cache().get_driver_path(CHROME_VERSION_MAIN))
+            driver = webdriver.Chrome(service=service, options=options)
+            driver.browser_pid = record.browser_pid
+        except Exception as e:
+            logger.error(f"Failed to reattach to browser {profile_name}, closing it: {str(e)}")
+            terminate_pid(record.browser_pid)
+            self.sessions.remove(profile_name, me)
+            return None, None
+        logger.info(f"Reattached to running browser {profile_name} (pid {record.browser_pid})")
+        return driver, record.started_at
+
+    def _record_session(self, profile_name: str, driver, started_at: Optional[float]):
+        service = getattr(driver, "service", None)
+        process = getattr(service, "process", None)
+        try:
+            self.sessions.register(SessionRecord(
+                profile_name=profile_name,
+                owner_pid=os.getpid(),
+                browser_pid=getattr(driver, "browser_pid", None),
+                driver_pid=process.pid if process else None,
+                debugger_address=debugger_address(driver),
+                started_at=started_at or time.time(),
+                owner_started=self._owner_started
+            ))
+        except Exception as e:
+            # 会话表只用于跨进程可见和接管，记录失败不影响浏览器使用
+            logger.error(f"Failed to record session for {profile_name}: {str(e)}")
+
+    def _on_browser_exit(self, profile_name: str, driver):
+        """监控线程发现浏览器意外退出时更新配置文件状态"""
+        profile = self.profile_manager.get_profile(profile_name)
+        if not profile or profile.driver is not driver:
+            return
+        self._stop_target_initializer(profile_name)
+        self._stop_resource_blocker(profile_name)
+        self.sessions.remove(profile_name, os.getpid())
+        self.profile_manager.set_running(profile_name, None)
+
+    def add_health_listener(self, callback):
+        """注册浏览器健康事件回调，参数为(事件类型, 配置名称, 详情)
+
+        启动时后台核对会话表的结果以reconciled事件发送（详情中的result），
+        在核对完成后才注册的监听者可通过reconciled和reconcile_results获取结果。
+        """
+        self.supervisor.on_event(callback)
+
+    def _install_noise_engine(self, initializer: TargetInitializer, profile: BrowserProfile):
+        """为配置文件的每个页面注册带种子的Canvas/音频/ClientRects噪声脚本"""
+        if not (profile.canvas_fp or profile.audio_fp or profile.client_rects_fp):
+            return
+        seed = profile.fingerprint.get("noise_seed")
+        if seed is None:
+            seed = noise_seed(profile.name)
+        initializer.add_script(build_noise_script(
+            seed,
+            canvas=profile.canvas_fp,
+            audio=profile.audio_fp,
+            client_rects=profile.client_rects_fp
+        ))
+
     def _generate_user_agent(self, platform: str, browser: str) -> str:
         """生成指定平台和浏览器的User Agent"""
         chrome_version = "119.0.0.0"
@@ -171,6 +528,36 @@ class BrowserManager:
         return f"Mozilla/5.0 ({os_info}) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{chrome_version} Safari/537.36"
 
     def is_profile_running(self, profile_name: str) -> bool:
-        """检查指定配置的浏览器是否正在运行"""
-        profile = self.profile_manager.get_profile(profile_name)
-        return profile and profile.is_running
+        """检查指定配置的浏览器是否正在运行（不加载完整记录）"""
+        return self.profile_manager.is_running(profile_name)
+
+    def list_running_profiles(self) -> List[str]:
+        """列出正在运行的配置文件名称"""
+        return self.profile_manager.running_names()
+
+    def query_profiles(self, running: Optional[bool] = None, ordered: bool = False, **criteria) -> List[str]:
+        """按分组、代理、时区、平台、标签和运行状态查询配置文件名称
+
+        例如 query_profiles(group="电商", proxy="http://1.2.3.4:8080", running=False)。
+        结果默认无序，ordered为True时按创建顺序返回。
+        """
+        return self.profile_manager.query(running=running, ordered=ordered, **criteria)
+
+    def get_profile_groups(self) -> List[str]:
+        """所有分组名称"""
+        return sorted(group for group in self.profile_manager.field_values("group") if group)
+
+    def get_profile_tags(self) -> List[str]:
+        """所有标签"""
+        return sorted(self.profile_manager.field_values("tag"))
+
+    def launch_matching(self, max_parallel: Optional[int] = None, **criteria) -> Dict[str, Future]:
+        """并发启动符合条件且未运行的配置文件，条件同query_profiles"""
+        return self.launch_many(self.query_profiles(running=False, **criteria), max_parallel)
+
+    def close_matching(self, **criteria) -> List[str]:
+        """关闭符合条件且正在运行的浏览器，返回关闭的配置名称"""
+        names = self.query_profiles(running=True, **criteria)
+        for name in names:
+            self.close_browser(name)
+        return names
@@ -2,30 +2,24 @@ from PyQt5.QtWidgets import (QMainWindow, QTabWidget, QToolBar,
                                QLineEdit, QPushButton, QVBoxLayout, QWidget,
                                QComboBox, QLabel, QHBoxLayout)
 from PyQt5.QtCore import QUrl, Qt
-from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineProfile
+from PyQt5.QtWebEngineWidgets import (QWebEngineView, QWebEnginePage, QWebEngineProfile,
+                                      QWebEngineScript)
 from loguru import logger
 import os
 from src.fingerprint.fingerprint_manager import FingerprintManager
 
+# 指纹脚本在配置文件脚本集合中的名称
+FINGERPRINT_SCRIPT_NAME = "fingerguard-fingerprint"
+
 class BrowserTab(QWebEngineView):
-    def __init__(self, profile=None, fingerprint_manager=None, fingerprint_name="default"):
+    def __init__(self, profile=None, fingerprint_name="default"):
         super().__init__()
-        self.fingerprint_manager = fingerprint_manager
         self.fingerprint_name = fingerprint_name
         
+        # 指纹脚本已在配置文件中以DocumentCreation方式注册，无需在加载后注入
         if profile:
             page = QWebEnginePage(profile, self)
             self.setPage(page)
-        
-        # 设置页面加载完成回调
-        self.loadFinished.connect(self._on_load_finished)
-        
-    def _on_load_finished(self, ok):
-        if ok and self.fingerprint_manager:
-            # 加载指纹配置
-            fingerprint = self.fingerprint_manager.load_fingerprint(self.fingerprint_name)
-            # 注入指纹保护脚本
-            self.page().runJavaScript(self.fingerprint_manager.get_injection_script(fingerprint))
 
 class BrowserWindow(QMainWindow):
     def __init__(self):
@@ -36,9 +30,10 @@ class BrowserWindow(QMainWindow):
         # 初始化指纹管理器
         self.fingerprint_manager = FingerprintManager()
         
-        # 创建自定义配置文件
-        self.profile = QWebEngineProfile("browser_profile")
-        self.setup_profile()
+        # 每个指纹身份对应一个配置文件（脚本集合按配置文件共享）
+        self.profiles = {}
+        self._installed_scripts = {}
+        self.profile = self.get_profile("default")
         
         # 创建中心部件
         self.central_widget = QWidget()
@@ -60,14 +55,54 @@ class BrowserWindow(QMainWindow):
         # 添加新标签页
         self.add_new_tab()
     
-    def setup_profile(self):
+    def get_profile(self, fingerprint_name: str) -> QWebEngineProfile:
+        """获取指纹身份对应的配置文件，不存在时创建并注册指纹脚本"""
+        profile = self.profiles.get(fingerprint_name)
+        if profile is None:
+            storage_name = "browser_profile" if fingerprint_name == "default" else f"browser_profile_{fingerprint_name}"
+            profile = QWebEngineProfile(storage_name, self)
+            self.setup_profile(profile, fingerprint_name)
+            self.profiles[fingerprint_name] = profile
+        self.install_fingerprint_script(fingerprint_name)
+        return profile
+    
+    def setup_profile(self, profile: QWebEngineProfile, fingerprint_name: str = "default"):
         # 禁用持久化Cookie
-        self.profile.setPersistentCookiesPolicy(QWebEngineProfile.NoPersistentCookies)
+        profile.setPersistentCookiesPolicy(QWebEngineProfile.NoPersistentCookies)
         
         # 设置缓存路径
         cache_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "cache")
+        if fingerprint_name != "default":
+            cache_path = os.path.join(cache_path, fingerprint_name)
         os.makedirs(cache_path, exist_ok=True)
-        self.profile.setCachePath(cache_path)
+        profile.setCachePath(cache_path)
+    
+    def install_fingerprint_script(self, fingerprint_name: str):
+        """在配置文件中注册指纹脚本，指纹变化时原地替换"""
+        profile = self.profiles.get(fingerprint_name)
+        if profile is None:
+            return
+        
+        fingerprint = self.fingerprint_manager.load_fingerprint(fingerprint_name)
+        source = self.fingerprint_manager.get_injection_script(fingerprint, fingerprint_name)
+        if self._installed_scripts.get(fingerprint_name) == source:
+            return
+        
+        scripts = profile.scripts()
+        existing = scripts.findScript(FINGERPRINT_SCRIPT_NAME)
+        if not existing.isNull():
+            scripts.remove(existing)
+        
+        script = QWebEngineScript()
+        script.setName(FINGERPRINT_SCRIPT_NAME)
+        script.setSourceCode(source)
+        script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+        script.setWorldId(QWebEngineScript.MainWorld)
+        script.setRunsOnSubFrames(True)
+        scripts.insert(script)
+        
+        self._installed_scripts[fingerprint_name] = source
+        logger.info(f"Fingerprint script installed for: {fingerprint_name}")
     
     def create_fingerprint_selector(self):
         """创建指纹选择器"""
@@ -77,6 +112,8 @@ class BrowserWindow(QMainWindow):
         fingerprint_label = QLabel("Fingerprint:")
         self.fingerprint_combo = QComboBox()
         self.update_fingerprint_list()
+        # 切换指纹时检查其内容是否变化，变化则替换已注册的脚本
+        self.fingerprint_combo.currentTextChanged.connect(self.install_fingerprint_script)
         
         # 新建指纹按钮
         new_fingerprint_btn = QPushButton("New")
@@ -92,20 +129,12 @@ class BrowserWindow(QMainWindow):
     def update_fingerprint_list(self):
         """更新指纹列表"""
         self.fingerprint_combo.clear()
-        for file in os.listdir(self.fingerprint_manager.fingerprints_dir):
-            if file.endswith('.json'):
-                name = file[:-5]  # 移除.json后缀
-                self.fingerprint_combo.addItem(name)
+        self.fingerprint_combo.addItems(self.fingerprint_manager.list_fingerprints())
     
     def create_new_fingerprint(self):
         """创建新的指纹配置"""
         # 生成新的指纹名称
-        index = 1
-        while True:
-            name = f"fingerprint_{index}"
-            if not os.path.exists(os.path.join(self.fingerprint_manager.fingerprints_dir, f"{name}.json")):
-                break
-            index += 1
+        name = self.fingerprint_manager.next_fingerprint_name()
         
         # 创建新指纹
         self.fingerprint_manager.create_fingerprint(name)
@@ -145,8 +174,7 @@ class BrowserWindow(QMainWindow):
         """添加新标签页"""
         current_fingerprint = self.fingerprint_combo.currentText() or "default"
         browser = BrowserTab(
-            self.profile,
-            fingerprint_manager=self.fingerprint_manager,
+            self.get_profile(current_fingerprint),
             fingerprint_name=current_fingerprint
         )
         
@@ -186,6 +214,7 @@ class BrowserWindow(QMainWindow):
     def closeEvent(self, event):
         """关闭窗口事件"""
         # 清理缓存
-        self.profile.clearAllVisitedLinks()
-        self.profile.clearHttpCache()
+        for profile in self.profiles.values():
+            profile.clearAllVisitedLinks()
+            profile.clearHttpCache()
         event.accept()
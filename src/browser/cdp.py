@@ -0,0 +1,161 @@
+import asyncio
+import itertools
+import json
+import threading
+import urllib.request
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+import websockets
+from loguru import logger
+
+
+class CDPError(Exception):
+    """DevTools协议返回的错误"""
+
+
+class CDPConnection:
+    """单个浏览器的DevTools websocket连接
+
+    所有标签页通过扁平化会话（sessionId）复用同一条连接，
+    后台任务负责分发命令响应和事件，不占用额外线程。
+    """
+
+    def __init__(self, ws_url: str):
+        self.ws_url = ws_url
+        self._ws = None
+        self._reader: Optional[asyncio.Task] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        # (方法名, sessionId) -> 等待中的事件
+        self._waiters: List[tuple] = []
+        self._listeners: Dict[str, List[Callable[[Dict[str, Any], Optional[str]], None]]] = {}
+
+    async def connect(self):
+        self._ws = await websockets.connect(self.ws_url, max_size=None)
+        self._reader = asyncio.get_running_loop().create_task(self._read_loop())
+
+    async def close(self):
+        if self._ws:
+            await self._ws.close()
+        if self._reader:
+            try:
+                await self._reader
+            except Exception:
+                pass
+        self._ws = None
+        self._reader = None
+
+    async def send(self, method: str, params: Optional[Dict[str, Any]] = None,
+                   session_id: Optional[str] = None, timeout: float = 30.0) -> Dict[str, Any]:
+        """发送命令并等待响应"""
+        if not self._ws:
+            raise CDPError("DevTools connection is closed")
+        message_id = next(self._ids)
+        message = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        try:
+            await self._ws.send(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(message_id, None)
+
+    def on(self, method: str, callback: Callable[[Dict[str, Any], Optional[str]], None]):
+        """注册事件回调，回调参数为(params, sessionId)"""
+        self._listeners.setdefault(method, []).append(callback)
+
+    def off(self, method: str, callback: Callable[[Dict[str, Any], Optional[str]], None]):
+        """移除事件回调"""
+        callbacks = self._listeners.get(method, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def expect(self, method: str, session_id: Optional[str] = None) -> asyncio.Future:
+        """在发送命令之前登记要等待的事件，避免事件先于等待到达"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((method, session_id, future))
+        return future
+
+    async def _read_loop(self):
+        try:
+            async for raw in self._ws:
+                message = json.loads(raw)
+                if "id" in message:
+                    future = self._pending.get(message["id"])
+                    if future and not future.done():
+                        if "error" in message:
+                            future.set_exception(CDPError(message["error"].get("message", str(message["error"]))))
+                        else:
+                            future.set_result(message.get("result", {}))
+                    continue
+                self._dispatch(message.get("method"), message.get("params", {}), message.get("sessionId"))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            error = CDPError("DevTools connection closed")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            for _, _, future in self._waiters:
+                if not future.done():
+                    future.set_exception(error)
+            self._waiters = []
+
+    def _dispatch(self, method: str, params: Dict[str, Any], session_id: Optional[str]):
+        remaining = []
+        for waiter in self._waiters:
+            waiter_method, waiter_session, future = waiter
+            if future.done():
+                continue
+            if waiter_method == method and waiter_session == session_id:
+                future.set_result(params)
+            else:
+                remaining.append(waiter)
+        self._waiters = remaining
+        for callback in self._listeners.get(method, []):
+            try:
+                callback(params, session_id)
+            except Exception as e:
+                logger.error(f"CDP event handler for {method} failed: {str(e)}")
+
+
+class BackgroundLoop:
+    """在同步代码中使用DevTools连接时共用的后台事件循环线程"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="DevTools", daemon=True)
+        self.thread.start()
+
+    def run(self, coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+
+_background_loop: Optional[BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """获取进程级共享的后台事件循环"""
+    global _background_loop
+    if _background_loop is None:
+        with _background_loop_lock:
+            if _background_loop is None:
+                _background_loop = BackgroundLoop()
+    return _background_loop
+
+
+def debugger_address(driver) -> str:
+    """获取Selenium驱动所控制浏览器的DevTools地址（host:port）"""
+    address = driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+    if not address:
+        raise RuntimeError("Driver does not expose a DevTools debugger address")
+    return address
+
+
+def browser_ws_url(address: str, timeout: float = 10.0) -> str:
+    """查询浏览器级DevTools websocket地址（阻塞调用）"""
+    with urllib.request.urlopen(f"http://{address}/json/version", timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))["webSocketDebuggerUrl"]
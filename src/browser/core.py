@@ -1,22 +1,228 @@
 import undetected_chromedriver as uc
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium_stealth import stealth
-from webdriver_manager.chrome import ChromeDriverManager
 import os
 import json
+from typing import List, Optional
 from loguru import logger
+from .driver_cache import get_driver_cache, CHROME_VERSION_MAIN
+from .launch_modes import validate_launch_mode, launch_mode_arguments, apply_launch_mode
+from .page_load import PageLoadWatcher
+from .tabs import TabRegistry, TabInfo
+from .resource_policy import ResourceBlocker, ResourceStats, is_policy_active, normalize_policy
+from .target_setup import TargetInitializer
+from ..utils.timing import get_launch_timings
+
+# 旧版隐私保护脚本：每秒重新应用一次覆盖
+PRIVACY_SCRIPT = """
+(function() {
+    // 完全禁用WebRTC
+    const disableWebRTC = () => {
+        // 覆盖RTCPeerConnection
+        const rtcConstructors = [
+            'RTCPeerConnection',
+            'webkitRTCPeerConnection',
+            'mozRTCPeerConnection',
+            'msRTCPeerConnection'
+        ];
+        
+        rtcConstructors.forEach(constructor => {
+            if (window[constructor]) {
+                window[constructor] = function() {
+                    throw new Error('WebRTC is disabled');
+                };
+            }
+        });
+        
+        // 禁用getUserMedia
+        if (navigator.mediaDevices) {
+            navigator.mediaDevices.getUserMedia = function() {
+                return new Promise((resolve, reject) => {
+                    reject(new Error('getUserMedia is disabled'));
+                });
+            };
+        }
+        
+        // 禁用getDisplayMedia
+        if (navigator.mediaDevices) {
+            navigator.mediaDevices.getDisplayMedia = function() {
+                return new Promise((resolve, reject) => {
+                    reject(new Error('getDisplayMedia is disabled'));
+                });
+            };
+        }
+    };
+    
+    // 禁用网络API
+    const disableNetworkAPIs = () => {
+        // 禁用WebSocket
+        window.WebSocket = function() {
+            throw new Error('WebSocket is disabled');
+        };
+        
+        // 禁用SharedWorker
+        window.SharedWorker = function() {
+            throw new Error('SharedWorker is disabled');
+        };
+        
+        // 禁用ServiceWorker
+        if (navigator.serviceWorker) {
+            navigator.serviceWorker.register = function() {
+                return Promise.reject(new Error('ServiceWorker is disabled'));
+            };
+        }
+    };
+    
+    // 执行所有保护措施
+    disableWebRTC();
+    disableNetworkAPIs();
+    
+    // 定期检查和重新应用保护
+    setInterval(() => {
+        disableWebRTC();
+        disableNetworkAPIs();
+    }, 1000);
+})();
+"""
+
+# 加固版隐私保护脚本：一次定义、无需轮询
+HARDENED_PRIVACY_SCRIPT = """
+(function() {
+    // 以不可写、不可配置的属性一次性定义覆盖，页面无法还原，因此无需定期重新应用
+    const lock = (target, key, value) => {
+        if (!target) {
+            return;
+        }
+        try {
+            Object.defineProperty(target, key, {
+                value: value,
+                writable: false,
+                configurable: false,
+                enumerable: false
+            });
+        } catch (e) {}
+    };
+    const blocked = (message) => function() {
+        throw new Error(message);
+    };
+    const rejected = (message) => function() {
+        return Promise.reject(new Error(message));
+    };
+    
+    // 完全禁用WebRTC
+    [
+        'RTCPeerConnection',
+        'webkitRTCPeerConnection',
+        'mozRTCPeerConnection',
+        'msRTCPeerConnection'
+    ].forEach(constructor => {
+        if (window[constructor]) {
+            lock(window, constructor, blocked('WebRTC is disabled'));
+        }
+    });
+    
+    // 禁用getUserMedia和getDisplayMedia（原型和实例上都锁定）
+    if (navigator.mediaDevices) {
+        const mediaTargets = [window.MediaDevices && MediaDevices.prototype, navigator.mediaDevices];
+        mediaTargets.forEach(target => {
+            lock(target, 'getUserMedia', rejected('getUserMedia is disabled'));
+            lock(target, 'getDisplayMedia', rejected('getDisplayMedia is disabled'));
+        });
+    }
+    
+    // 禁用网络API
+    lock(window, 'WebSocket', blocked('WebSocket is disabled'));
+    lock(window, 'SharedWorker', blocked('SharedWorker is disabled'));
+    if (navigator.serviceWorker) {
+        const workerTargets = [window.ServiceWorkerContainer && ServiceWorkerContainer.prototype, navigator.serviceWorker];
+        workerTargets.forEach(target => {
+            lock(target, 'register', rejected('ServiceWorker is disabled'));
+        });
+    }
+})();
+"""
+
+FINGERPRINTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "fingerprint", "fingerprints"
+)
+
+def load_fingerprint_file(fingerprint_name: str) -> dict:
+    """读取指纹配置文件，不存在或无法解析时返回空字典，同步和异步浏览器共用"""
+    fingerprint_file = os.path.join(FINGERPRINTS_DIR, f"{fingerprint_name}.json")
+    try:
+        with open(fingerprint_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def build_chrome_arguments(profile_dir: str, proxy: str = None) -> List[str]:
+    """生成Chrome启动参数，同步和异步浏览器共用"""
+    arguments = [
+        # 基本设置
+        f"--user-data-dir={profile_dir}",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--disable-blink-features=AutomationControlled",
+        
+        # 增强的WebRTC和网络保护设置
+        "--disable-webrtc",  # 完全禁用WebRTC
+        "--disable-webrtc-hw-encoding",  # 禁用WebRTC硬件编码
+        "--disable-webrtc-hw-decoding",  # 禁用WebRTC硬件解码
+        "--disable-webrtc-multiple-routes",  # 禁用WebRTC多路由
+        "--enforce-webrtc-ip-permission-check",  # 强制WebRTC IP权限检查
+        "--force-webrtc-ip-handling-policy=disable",  # 完全禁用WebRTC IP处理
+        "--disable-webrtc-hide-local-ips-with-mdns",  # 禁用mDNS
+        
+        # 网络隔离设置
+        "--disable-site-isolation-trials",  # 禁用站点隔离试验
+        "--disable-features=IsolateOrigins,site-per-process",  # 禁用源隔离
+        "--disable-dev-shm-usage",  # 禁用/dev/shm使用
+        "--disable-background-networking",  # 禁用后台网络
+        "--disable-default-apps",  # 禁用默认应用
+        "--disable-sync",  # 禁用同步
+        "--disable-translate",  # 禁用翻译
+        "--disable-domain-reliability",  # 禁用域名可靠性监控
+        "--disable-client-side-phishing-detection",  # 禁用客户端网络钓鱼检测
+    ]
+    
+    # DNS设置
+    if proxy:
+        arguments += [
+            f"--proxy-server={proxy}",
+            "--dns-over-https-enable",
+            "--dns-over-https-templates=https://dns.google/dns-query",
+            "--proxy-bypass-list=<-loopback>",
+            # 强制所有连接通过代理
+            "--proxy-pac-url=data:application/x-javascript,{}",
+        ]
+    else:
+        arguments += [
+            "--dns-over-https-enable",
+            "--dns-over-https-templates=https://dns.google/dns-query",
+        ]
+    
+    return arguments
 
 class FingerGuardBrowser:
-    def __init__(self, profile_name: str = "default", fingerprint_name: str = "default", proxy: str = None):
+    def __init__(self, profile_name: str = "default", fingerprint_name: str = "default", proxy: str = None,
+                 hardened_privacy: bool = True, headless: bool = False, chrome_path: str = None,
+                 launch_mode: str = None, resource_policy: dict = None):
         self.profile_name = profile_name
         self.fingerprint_name = fingerprint_name
         self.proxy = proxy
+        self.hardened_privacy = hardened_privacy  # False时使用旧版的定时轮询脚本
+        self.chrome_path = chrome_path
+        # headless与启动模式相互独立，例如launch_mode="lean", headless=True
+        self.launch_mode = validate_launch_mode(launch_mode or "headful")
+        self.headless = headless
+        self.resource_policy = normalize_policy(resource_policy)
+        self.resource_stats = ResourceStats()
+        self.resource_blocker = None
+        self.target_initializer = None
         self.driver = None
-        self.tabs = []
-        self.current_tab_index = -1
+        self.tab_registry = None
+        self.page_loads = None
+        self.current_handle = None
         
         # 确保配置目录存在
         self.profile_dir = os.path.join(
@@ -24,158 +230,97 @@ class FingerGuardBrowser:
             "src", "profiles", profile_name
         )
         os.makedirs(self.profile_dir, exist_ok=True)
+        self.fingerprint = self._load_fingerprint()
+        
+    def _load_fingerprint(self) -> dict:
+        """读取指纹配置，用于让窗口和屏幕尺寸与指纹一致"""
+        return load_fingerprint_file(self.fingerprint_name)
         
     def _create_options(self) -> uc.ChromeOptions:
         """创建Chrome选项"""
         options = uc.ChromeOptions()
-        
-        # 基本设置
-        options.add_argument(f"--user-data-dir={self.profile_dir}")
-        options.add_argument("--no-first-run")
-        options.add_argument("--no-default-browser-check")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        
-        # 增强的WebRTC和网络保护设置
-        options.add_argument("--disable-webrtc")  # 完全禁用WebRTC
-        options.add_argument("--disable-webrtc-hw-encoding")  # 禁用WebRTC硬件编码
-        options.add_argument("--disable-webrtc-hw-decoding")  # 禁用WebRTC硬件解码
-        options.add_argument("--disable-webrtc-multiple-routes")  # 禁用WebRTC多路由
-        options.add_argument("--enforce-webrtc-ip-permission-check")  # 强制WebRTC IP权限检查
-        options.add_argument("--force-webrtc-ip-handling-policy=disable")  # 完全禁用WebRTC IP处理
-        options.add_argument("--disable-webrtc-hide-local-ips-with-mdns")  # 禁用mDNS
-        
-        # 网络隔离设置
-        options.add_argument("--disable-site-isolation-trials")  # 禁用站点隔离试验
-        options.add_argument("--disable-features=IsolateOrigins,site-per-process")  # 禁用源隔离
-        options.add_argument("--disable-dev-shm-usage")  # 禁用/dev/shm使用
-        options.add_argument("--disable-background-networking")  # 禁用后台网络
-        options.add_argument("--disable-default-apps")  # 禁用默认应用
-        options.add_argument("--disable-sync")  # 禁用同步
-        options.add_argument("--disable-translate")  # 禁用翻译
-        options.add_argument("--disable-domain-reliability")  # 禁用域名可靠性监控
-        options.add_argument("--disable-client-side-phishing-detection")  # 禁用客户端网络钓鱼检测
-        
-        # DNS设置
-        if self.proxy:
-            options.add_argument(f"--proxy-server={self.proxy}")
-            options.add_argument("--dns-over-https-enable")
-            options.add_argument("--dns-over-https-templates=https://dns.google/dns-query")
-            options.add_argument("--proxy-bypass-list=<-loopback>")
-            # 强制所有连接通过代理
-            options.add_argument("--proxy-pac-url=data:application/x-javascript,{}")
-        else:
-            options.add_argument("--dns-over-https-enable")
-            options.add_argument("--dns-over-https-templates=https://dns.google/dns-query")
-        
+        for argument in build_chrome_arguments(self.profile_dir, self.proxy):
+            options.add_argument(argument)
+        for argument in launch_mode_arguments(self.launch_mode, self.fingerprint, self.headless):
+            options.add_argument(argument)
         return options
         
+    @property
+    def privacy_script(self) -> str:
+        return HARDENED_PRIVACY_SCRIPT if self.hardened_privacy else PRIVACY_SCRIPT
+        
     def _inject_privacy_scripts(self):
-        """注入隐私保护脚本"""
-        privacy_script = """
-        (function() {
-            // 完全禁用WebRTC
-            const disableWebRTC = () => {
-                // 覆盖RTCPeerConnection
-                const rtcConstructors = [
-                    'RTCPeerConnection',
-                    'webkitRTCPeerConnection',
-                    'mozRTCPeerConnection',
-                    'msRTCPeerConnection'
-                ];
-                
-                rtcConstructors.forEach(constructor => {
-                    if (window[constructor]) {
-                        window[constructor] = function() {
-                            throw new Error('WebRTC is disabled');
-                        };
-                    }
-                });
-                
-                // 禁用getUserMedia
-                if (navigator.mediaDevices) {
-                    navigator.mediaDevices.getUserMedia = function() {
-                        return new Promise((resolve, reject) => {
-                            reject(new Error('getUserMedia is disabled'));
-                        });
-                    };
-                }
-                
-                // 禁用getDisplayMedia
-                if (navigator.mediaDevices) {
-                    navigator.mediaDevices.getDisplayMedia = function() {
-                        return new Promise((resolve, reject) => {
-                            reject(new Error('getDisplayMedia is disabled'));
-                        });
-                    };
-                }
-            };
-            
-            // 禁用网络API
-            const disableNetworkAPIs = () => {
-                // 禁用WebSocket
-                window.WebSocket = function() {
-                    throw new Error('WebSocket is disabled');
-                };
-                
-                // 禁用SharedWorker
-                window.SharedWorker = function() {
-                    throw new Error('SharedWorker is disabled');
-                };
-                
-                // 禁用ServiceWorker
-                if (navigator.serviceWorker) {
-                    navigator.serviceWorker.register = function() {
-                        return Promise.reject(new Error('ServiceWorker is disabled'));
-                    };
-                }
-            };
-            
-            // 执行所有保护措施
-            disableWebRTC();
-            disableNetworkAPIs();
-            
-            // 定期检查和重新应用保护
-            setInterval(() => {
-                disableWebRTC();
-                disableNetworkAPIs();
-            }, 1000);
-        })();
-        """
+        """在当前已加载的文档中执行隐私保护脚本（之后的文档由TargetInitializer注册的脚本覆盖）"""
         try:
-            self.driver.execute_script(privacy_script)
+            self.driver.execute_script(self.privacy_script)
         except Exception as e:
             logger.error(f"Failed to inject privacy scripts: {str(e)}")
             
     def start(self):
         """启动浏览器"""
+        timings = get_launch_timings()
+        tags = {"profile": self.profile_name, "proxy": self.proxy}
         try:
             # 创建Chrome选项
-            options = self._create_options()
+            with timings.span("build_options", **tags):
+                options = self._create_options()
+            
+            # 复用缓存中已补丁的驱动，首次使用时下载并补丁
+            with timings.span("driver_resolve", **tags):
+                driver_path = get_driver_cache().get_driver_path(CHROME_VERSION_MAIN)
             
             # 使用undetected_chromedriver直接启动，指定Chrome版本
-            self.driver = uc.Chrome(
-                options=options,
-                driver_executable_path=None,
-                browser_executable_path=None,
-                version_main=130
-            )
+            with timings.span("spawn", **tags):
+                self.driver = uc.Chrome(
+                    options=options,
+                    driver_executable_path=driver_path,
+                    browser_executable_path=self.chrome_path,
+                    version_main=CHROME_VERSION_MAIN
+                )
             
             # 应用stealth设置
-            stealth(
-                self.driver,
-                languages=["en-US", "en"],
-                vendor="Google Inc.",
-                platform="Win32",
-                webgl_vendor="Intel Inc.",
-                renderer="Intel Iris OpenGL Engine",
-                fix_hairline=True,
-            )
+            with timings.span("stealth", **tags):
+                stealth(
+                    self.driver,
+                    languages=["en-US", "en"],
+                    vendor="Google Inc.",
+                    platform="Win32",
+                    webgl_vendor="Intel Inc.",
+                    renderer="Intel Iris OpenGL Engine",
+                    fix_hairline=True,
+                )
+            
+            # 精简模式限速，无头模式下修正屏幕、窗口尺寸和User Agent，应用到每个标签页
+            with timings.span("launch_mode", **tags):
+                initializer = TargetInitializer.for_driver(self.driver)
+                apply_launch_mode(self.driver, initializer, self.launch_mode, self.fingerprint, self.headless)
+            
+            # 按资源策略拦截图片、媒体、字体和跟踪器等请求，作为初始化钩子与其他设置共用一次暂停
+            if is_policy_active(self.resource_policy):
+                with timings.span("resource_policy", **tags):
+                    self.resource_blocker = ResourceBlocker(initializer, self.resource_policy, self.resource_stats)
+                    self.resource_blocker.attach()
+            
+            # 隐私保护脚本在每个标签页和iframe的每个新文档中先于页面脚本运行，导航和新标签页后依然有效
+            with timings.span("target_setup", **tags):
+                initializer.add_script(self.privacy_script)
+                self.target_initializer = initializer
+                initializer.start()
             
-            # 注入隐私保护脚本
-            self._inject_privacy_scripts()
+            # 启动时已打开的文档不会再触发新文档脚本，单独执行一次
+            with timings.span("privacy_injection", **tags):
+                self._inject_privacy_scripts()
             
-            # 创建第一个标签页
-            self.new_tab()
+            # 由CDP事件维护标签页列表，启动时打开的窗口作为第一个标签页
+            with timings.span("first_tab", **tags):
+                self.tab_registry = TabRegistry(self.driver)
+                self.tab_registry.start()
+                self.current_handle = self.driver.current_window_handle
+            
+            # navigate使用的常驻DevTools连接，各标签页在第一次导航时附加
+            with timings.span("page_load_watcher", **tags):
+                self.page_loads = PageLoadWatcher(self.driver)
+                self.page_loads.start()
             
             return self.driver
             
@@ -183,55 +328,103 @@ class FingerGuardBrowser:
             logger.error(f"Failed to start browser: {str(e)}")
             raise
             
-    def new_tab(self):
-        """创建新标签页"""
+    def set_resource_policy(self, policy: dict):
+        """更新资源拦截策略，浏览器运行中时立即生效"""
+        self.resource_policy = normalize_policy(policy)
         if not self.driver:
-            raise Exception("Browser not started")
+            return
+        if self.resource_blocker:
+            self.resource_blocker.update_policy(self.resource_policy)
+        elif is_policy_active(self.resource_policy):
+            initializer = self.target_initializer or TargetInitializer.for_driver(self.driver)
+            self.resource_blocker = ResourceBlocker(initializer, self.resource_policy, self.resource_stats)
+            self.resource_blocker.attach()
+            if self.target_initializer is None:
+                self.target_initializer = initializer
+                initializer.start()
             
-        # 创建新标签页
-        self.driver.execute_script("window.open('about:blank');")
-        self.tabs.append(self.driver.window_handles[-1])
-        self.current_tab_index = len(self.tabs) - 1
+    def get_resource_stats(self) -> dict:
+        """获取拦截的请求数和估算节省的字节数"""
+        return self.resource_stats.to_dict()
+            
+    @property
+    def tabs(self) -> List[str]:
+        """按打开顺序排列的标签页句柄"""
+        return self.tab_registry.handles() if self.tab_registry else []
+        
+    @property
+    def current_tab_index(self) -> int:
+        tabs = self.tabs
+        return tabs.index(self.current_handle) if self.current_handle in tabs else -1
         
-        # 切换到新标签页
-        self.driver.switch_to.window(self.tabs[self.current_tab_index])
+    def get_tab_info(self, handle: str = None) -> Optional[TabInfo]:
+        """获取标签页的URL、标题和打开者，默认为当前标签页"""
+        if not self.tab_registry:
+            return None
+        return self.tab_registry.get(handle or self.current_handle)
+        
+    def _ensure_current_tab(self):
+        """当前标签页被页面自行关闭时切换到最后一个标签页"""
+        if not self.driver or not self.tab_registry or not len(self.tab_registry):
+            raise Exception("No tabs available")
+        if self.current_handle not in self.tab_registry:
+            self.switch_to_handle(self.tabs[-1])
+            
+    def new_tab(self, url: str = "about:blank") -> str:
+        """创建新标签页并切换过去，返回句柄"""
+        if not self.driver:
+            raise Exception("Browser not started")
+            
+        handle = self.tab_registry.create(url)
+        self.switch_to_handle(handle)
+        return handle
         
     def close_tab(self):
         """关闭当前标签页"""
-        if not self.driver or not self.tabs:
-            raise Exception("No tabs to close")
-            
-        # 关闭当前标签页
-        self.driver.close()
-        self.tabs.pop(self.current_tab_index)
+        self._ensure_current_tab()
+        self.tab_registry.close(self.current_handle)
+        self.current_handle = None
         
         # 如果还有标签页，切换到最后一个
-        if self.tabs:
-            self.current_tab_index = len(self.tabs) - 1
-            self.driver.switch_to.window(self.tabs[self.current_tab_index])
-        else:
-            self.current_tab_index = -1
+        tabs = self.tabs
+        if tabs:
+            self.switch_to_handle(tabs[-1])
             
     def switch_tab(self, index: int):
         """切换到指定标签页"""
-        if not self.driver or not self.tabs:
+        if not self.driver or not self.tab_registry or not len(self.tab_registry):
             raise Exception("No tabs available")
             
-        if 0 <= index < len(self.tabs):
-            self.current_tab_index = index
-            self.driver.switch_to.window(self.tabs[index])
+        tabs = self.tabs
+        if 0 <= index < len(tabs):
+            self.switch_to_handle(tabs[index])
         else:
             raise Exception("Invalid tab index")
             
-    def navigate(self, url: str):
-        """访问URL"""
-        if not self.driver or not self.tabs:
-            raise Exception("No tabs available")
+    def switch_to_handle(self, handle: str):
+        """按句柄切换标签页"""
+        if handle not in self.tab_registry:
+            raise Exception(f"Unknown tab {handle}")
+        self.driver.switch_to.window(handle)
+        self.current_handle = handle
+            
+    def navigate(self, url: str, wait: str = "load", timeout: float = None, idle_ms: int = 500,
+                 max_inflight: int = 0, selector: str = None) -> dict:
+        """访问URL，按等待策略返回耗时信息
+        
+        wait可选none、domcontentloaded、load、network-idle（idle_ms毫秒内进行中的请求
+        不超过max_inflight个）和selector（CSS选择器出现），timeout默认按策略取值。
+        """
+        self._ensure_current_tab()
             
         try:
-            self.driver.get(url)
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            return self.page_loads.navigate(
+                self.current_handle, url,
+                wait=wait,
+                timeout=timeout,
+                idle_ms=idle_ms,
+                max_inflight=max_inflight,
+                selector=selector
             )
         except Exception as e:
             logger.error(f"Failed to navigate to {url}: {str(e)}")
@@ -239,10 +432,21 @@ class FingerGuardBrowser:
             
     def close(self):
         """关闭浏览器"""
+        if self.target_initializer:
+            self.target_initializer.stop()
+            self.target_initializer = None
+        if self.resource_blocker:
+            self.resource_blocker.stop()
+            self.resource_blocker = None
+        if self.page_loads:
+            self.page_loads.stop()
+            self.page_loads = None
+        if self.tab_registry:
+            self.tab_registry.stop()
+            self.tab_registry = None
         if self.driver:
             try:
                 self.driver.quit()
             finally:
                 self.driver = None
-                self.tabs = []
-                self.current_tab_index = -1
+                self.current_handle = None
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+import undetected_chromedriver as uc
+from loguru import logger
+
+# 默认的Chrome主版本号
+CHROME_VERSION_MAIN = 130
+
+# 补丁签名：undetected-chromedriver版本不同时补丁内容可能不同
+PATCH_SIGNATURE = f"uc-{uc.__version__}"
+
+if sys.platform.startswith("win"):
+    import msvcrt
+
+    def _lock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DriverCache:
+    """按内容寻址的已补丁chromedriver缓存
+
+    以驱动版本和补丁签名为键，二进制按SHA-256存放，
+    通过文件锁保证多个进程/线程并发启动时只补丁一次并复用同一个文件。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.path.join(os.path.expanduser("~"), ".fingerguard", "drivers")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.manifest_file = os.path.join(self.cache_dir, "manifest.json")
+        self.lock_file = os.path.join(self.cache_dir, ".lock")
+        self._thread_lock = threading.Lock()
+        # 进程内已验证的结果，避免每次启动都读取清单
+        self._resolved: Dict[str, str] = {}
+
+    @contextmanager
+    def _locked(self):
+        """进程内和跨进程的互斥"""
+        with self._thread_lock:
+            with open(self.lock_file, "a+b") as f:
+                _lock_file(f)
+                try:
+                    yield
+                finally:
+                    _unlock_file(f)
+
+    def _load_manifest(self) -> Dict[str, Dict[str, object]]:
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, Dict[str, object]]):
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(tmp_file, self.manifest_file)
+
+    @staticmethod
+    def _is_valid(entry: Dict[str, object]) -> bool:
+        """校验缓存的驱动：大小和修改时间都与记录一致时直接使用，
+        修改时间不同（例如被复制或替换过）时重新计算SHA-256，一致则更新记录的修改时间
+        """
+        path = entry.get("path")
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            return False
+        if stat is None or stat.st_size != entry.get("size"):
+            return False
+        if stat.st_mtime_ns == entry.get("mtime_ns"):
+            return True
+        if _sha256(path) != entry.get("sha256"):
+            logger.warning(f"Cached chromedriver {path} does not match its recorded SHA-256, rebuilding")
+            return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def get_driver_path(self, version_main: int = CHROME_VERSION_MAIN) -> str:
+        """获取已补丁的chromedriver路径，缓存中没有时下载并补丁"""
+        key = f"{version_main}-{PATCH_SIGNATURE}"
+        path = self._resolved.get(key)
+        if path and os.path.isfile(path):
+            return path
+
+        with self._locked():
+            manifest = self._load_manifest()
+            entry = manifest.get(key)
+            if entry:
+                mtime_ns = entry.get("mtime_ns")
+                if self._is_valid(entry):
+                    if entry.get("mtime_ns") != mtime_ns:
+                        self._save_manifest(manifest)
+                    self._resolved[key] = entry["path"]
+                    return entry["path"]
+
+            entry = self._build(version_main)
+            manifest[key] = entry
+            self._save_manifest(manifest)
+            self._resolved[key] = entry["path"]
+            return entry["path"]
+
+    def _build(self, version_main: int) -> Dict[str, object]:
+        """下载并补丁驱动，移入按内容寻址的位置（需持有锁）"""
+        logger.info(f"Patching chromedriver {version_main} for the driver cache")
+        staging_dir = os.path.join(self.cache_dir, "staging")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        patcher = uc.Patcher(version_main=version_main)
+        exe_name = os.path.basename(patcher.executable_path).replace("undetected_", "", 1)
+        patcher.executable_path = os.path.join(staging_dir, exe_name)
+        patcher.auto()
+        # 防止Patcher在析构时删除二进制文件
+        patcher._custom_exe_path = True
+        if not patcher.is_binary_patched(patcher.executable_path):
+            raise RuntimeError("Failed to patch chromedriver binary")
+
+        digest = _sha256(patcher.executable_path)
+        target_dir = os.path.join(self.cache_dir, "objects", digest)
+        target = os.path.join(target_dir, exe_name)
+        # 已有同名对象但内容不符（被截断或篡改）时同样用新补丁的文件替换
+        if not os.path.isfile(target) or _sha256(target) != digest:
+            os.makedirs(target_dir, exist_ok=True)
+            os.replace(patcher.executable_path, target)
+            os.chmod(target, 0o755)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+        return {
+            "path": target,
+            "sha256": digest,
+            "size": os.path.getsize(target),
+            "mtime_ns": os.stat(target).st_mtime_ns,
+            "version_main": version_main,
+            "patch_signature": PATCH_SIGNATURE
+        }
+
+
+_default_cache: Optional[DriverCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_driver_cache() -> DriverCache:
+    """获取进程级共享的驱动缓存"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = DriverCache()
+    return _default_cache
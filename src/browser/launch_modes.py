@@ -0,0 +1,120 @@
+import json
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+# 有界面、新版无头、精简模式（关闭GPU合成并限制渲染进程的CPU占用）
+# 无头与精简相互独立：headless参数可与任一模式组合，launch_mode为headless等同于headful + 无头
+LAUNCH_MODES = ("headful", "headless", "lean")
+
+DEFAULT_SCREEN = (1920, 1080)
+TASKBAR_HEIGHT = 40  # 与指纹生成时availHeight的计算一致
+BROWSER_UI_HEIGHT = 85  # 标签栏和地址栏占用的高度，用于还原outerHeight与innerHeight的差值
+# 精简模式下渲染进程主线程的CPU降速倍数（Emulation.setCPUThrottlingRate），
+# 由浏览器调度，不在页面中增加定时器唤醒
+LEAN_CPU_THROTTLING_RATE = 2
+
+# 无头模式下窗口没有浏览器界面，outer*与screen.avail*需要按有界面窗口还原
+WINDOW_METRICS_SCRIPT = """
+(function() {
+    const metrics = __METRICS__;
+    const define = (target, name, value) => {
+        try {
+            Object.defineProperty(target, name, { get: () => value, configurable: true });
+        } catch (e) {}
+    };
+    define(Screen.prototype, 'availWidth', metrics.availWidth);
+    define(Screen.prototype, 'availHeight', metrics.availHeight);
+    define(Screen.prototype, 'availLeft', 0);
+    define(Screen.prototype, 'availTop', 0);
+    define(window, 'outerWidth', metrics.availWidth);
+    define(window, 'outerHeight', metrics.availHeight);
+    define(window, 'screenX', 0);
+    define(window, 'screenY', 0);
+    define(window, 'screenLeft', 0);
+    define(window, 'screenTop', 0);
+})();
+"""
+
+def validate_launch_mode(mode: str) -> str:
+    if mode not in LAUNCH_MODES:
+        raise ValueError(f"Unknown launch mode {mode}, expected one of {', '.join(LAUNCH_MODES)}")
+    return mode
+
+
+def is_headless(mode: str, headless: bool = False) -> bool:
+    return headless or mode == "headless"
+
+
+def screen_metrics(fingerprint: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """从指纹中取出屏幕尺寸，兼容screen字段和界面保存的hardware.screen_resolution"""
+    fingerprint = fingerprint or {}
+    width, height = DEFAULT_SCREEN
+    screen = fingerprint.get("screen") or {}
+    if screen.get("width") and screen.get("height"):
+        width, height = int(screen["width"]), int(screen["height"])
+    else:
+        resolution = (fingerprint.get("hardware") or {}).get("screen_resolution")
+        if resolution:
+            try:
+                width, height = (int(value) for value in resolution.lower().split("x"))
+            except ValueError:
+                logger.warning(f"Invalid screen resolution in fingerprint: {resolution}")
+    return {
+        "width": width,
+        "height": height,
+        "availWidth": int(screen.get("availWidth", width)),
+        "availHeight": int(screen.get("availHeight", height - TASKBAR_HEIGHT)),
+        "deviceScaleFactor": float(fingerprint.get("devicePixelRatio", 1))
+    }
+
+
+def launch_mode_arguments(mode: str, fingerprint: Optional[Dict[str, Any]] = None,
+                          headless: bool = False) -> List[str]:
+    """生成启动模式对应的Chrome参数，窗口尺寸在所有模式下都与指纹的屏幕一致"""
+    validate_launch_mode(mode)
+    metrics = screen_metrics(fingerprint)
+    arguments = [
+        "--window-position=0,0",
+        f"--window-size={metrics['availWidth']},{metrics['availHeight']}"
+    ]
+    if is_headless(mode, headless):
+        arguments += ["--headless=new", "--mute-audio"]
+    if mode == "lean":
+        arguments += [
+            "--disable-gpu",
+            "--disable-gpu-compositing",
+            "--disable-smooth-scrolling",
+            "--disable-threaded-animation"
+        ]
+    return arguments
+
+
+def apply_launch_mode(driver, initializer, mode: str, fingerprint: Optional[Dict[str, Any]] = None,
+                      headless: bool = False):
+    """通过TargetInitializer在每个标签页上应用精简模式限速，并修正无头模式暴露的屏幕、窗口和User Agent差异
+
+    命令在start之前注册，由初始化器应用到已有和之后新建的每个页面。
+    """
+    validate_launch_mode(mode)
+    if mode == "lean":
+        initializer.add("Emulation.setCPUThrottlingRate", {"rate": LEAN_CPU_THROTTLING_RATE})
+    if not is_headless(mode, headless):
+        return
+
+    metrics = screen_metrics(fingerprint)
+    initializer.add("Emulation.setDeviceMetricsOverride", {
+        "width": metrics["availWidth"],
+        "height": metrics["availHeight"] - BROWSER_UI_HEIGHT,
+        "deviceScaleFactor": metrics["deviceScaleFactor"],
+        "mobile": False,
+        "screenWidth": metrics["width"],
+        "screenHeight": metrics["height"]
+    })
+
+    # 与有界面模式保持同一个User Agent，只去掉无头标记
+    user_agent = driver.execute_cdp_cmd("Browser.getVersion", {})["userAgent"]
+    initializer.add("Network.setUserAgentOverride", {
+        "userAgent": user_agent.replace("HeadlessChrome", "Chrome")
+    })
+
+    initializer.add_script(WINDOW_METRICS_SCRIPT.replace("__METRICS__", json.dumps(metrics)))
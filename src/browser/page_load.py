@@ -0,0 +1,298 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+from loguru import logger
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from .cdp import CDPConnection, CDPError, browser_ws_url, debugger_address, get_background_loop
+
+# 页面加载等待策略
+WAIT_STRATEGIES = ("none", "domcontentloaded", "load", "network-idle", "selector")
+
+# 各策略默认的超时时间（秒）
+DEFAULT_WAIT_TIMEOUTS = {
+    "none": 0.0,
+    "domcontentloaded": 10.0,
+    "load": 30.0,
+    "network-idle": 30.0,
+    "selector": 10.0,
+}
+
+# 每个标签页保留生命周期事件的最近导航数
+LOADER_HISTORY = 8
+
+# 在新文档中等待选择器出现：先检查一次，之后由DOM变化触发检查，不轮询
+SELECTOR_SCRIPT = """
+new Promise(resolve => {
+    const selector = __SELECTOR__;
+    if (document.querySelector(selector)) {
+        resolve(true);
+        return;
+    }
+    const observer = new MutationObserver(() => {
+        if (document.querySelector(selector)) {
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve(true);
+        }
+    });
+    const timer = setTimeout(() => {
+        observer.disconnect();
+        resolve(false);
+    }, __TIMEOUT_MS__);
+    observer.observe(document, { childList: true, subtree: true });
+})
+"""
+
+NAVIGATION_TIMING_SCRIPT = """
+(() => {
+    const entry = performance.getEntriesByType('navigation')[0];
+    if (!entry) {
+        return null;
+    }
+    return {
+        responseStart: entry.responseStart,
+        domContentLoaded: entry.domContentLoadedEventEnd || null,
+        load: entry.loadEventEnd || null,
+        transferSize: entry.transferSize
+    };
+})()
+"""
+
+
+def validate_wait_strategy(wait: str) -> str:
+    if wait not in WAIT_STRATEGIES:
+        raise ValueError(f"Unknown wait strategy {wait}, expected one of {', '.join(WAIT_STRATEGIES)}")
+    return wait
+
+
+class _TabState:
+    """单个标签页会话的生命周期事件和进行中的请求（只在后台事件循环中访问）"""
+
+    def __init__(self, frame_id: str):
+        self.frame_id = frame_id  # 页面目标的主框架ID与targetId相同
+        # 主框架的loaderId -> 已发生的生命周期事件名称
+        self.lifecycle: "OrderedDict[str, Set[str]]" = OrderedDict()
+        self.network_enabled = False
+        self.inflight: Set[str] = set()
+        self.quiet_since: Optional[float] = time.monotonic()
+        self.max_inflight = 0
+        self.changed = asyncio.Event()
+
+    def record_lifecycle(self, loader_id: str, name: str):
+        events = self.lifecycle.get(loader_id)
+        if events is None:
+            events = self.lifecycle[loader_id] = set()
+            while len(self.lifecycle) > LOADER_HISTORY:
+                self.lifecycle.popitem(last=False)
+        events.add(name)
+        self.changed.set()
+
+    def reset_network(self, max_inflight: int):
+        self.inflight.clear()
+        self.max_inflight = max_inflight
+        self.quiet_since = time.monotonic()
+
+    def update_request(self, request_id: str, started: bool):
+        if started:
+            self.inflight.add(request_id)
+        else:
+            self.inflight.discard(request_id)
+        if len(self.inflight) > self.max_inflight:
+            self.quiet_since = None
+        elif self.quiet_since is None:
+            self.quiet_since = time.monotonic()
+        self.changed.set()
+
+
+class PageLoadWatcher:
+    """通过一条常驻的DevTools连接导航并等待页面加载
+
+    每个标签页在第一次导航时附加并开启生命周期事件，之后复用同一个会话；
+    就绪条件由Page.lifecycleEvent、Page.navigatedWithinDocument和Network事件驱动，
+    不在页面中轮询。导航使用Page.navigate，驱动自身的pageLoadStrategy保持不变，
+    直接调用driver.get的代码不受影响。
+    """
+
+    TIMEOUT = 10.0
+
+    def __init__(self, driver):
+        self.address = debugger_address(driver)
+        self.connection: Optional[CDPConnection] = None
+        self._background = get_background_loop()
+        self._sessions: Dict[str, str] = {}  # targetId -> sessionId
+        self._tabs: Dict[str, _TabState] = {}  # sessionId -> 状态
+
+    def start(self):
+        self._background.run(self._start()).result(self.TIMEOUT)
+
+    def stop(self):
+        try:
+            self._background.run(self._stop()).result(self.TIMEOUT)
+        except Exception as e:
+            logger.debug(f"Failed to stop page load watcher: {str(e)}")
+
+    def navigate(self, target_id: str, url: str, wait: str = "load", timeout: Optional[float] = None,
+                 idle_ms: int = 500, max_inflight: int = 0, selector: Optional[str] = None) -> Dict[str, Any]:
+        """在指定标签页（chromedriver的窗口句柄即targetId）中导航并按策略等待，返回耗时信息（毫秒）"""
+        validate_wait_strategy(wait)
+        if wait == "selector" and not selector:
+            raise ValueError("The selector wait strategy requires a CSS selector")
+        timeout = DEFAULT_WAIT_TIMEOUTS[wait] if timeout is None else timeout
+        return self._background.run(
+            self._navigate(target_id, url, wait, timeout, idle_ms, max_inflight, selector)
+        ).result(timeout + 2 * self.TIMEOUT)
+
+    async def _start(self):
+        ws_url = await asyncio.get_running_loop().run_in_executor(None, browser_ws_url, self.address)
+        self.connection = CDPConnection(ws_url)
+        await self.connection.connect()
+        self.connection.on("Target.detachedFromTarget", self._on_detached)
+        self.connection.on("Page.lifecycleEvent", self._on_lifecycle)
+        self.connection.on("Network.requestWillBeSent", self._on_request)
+        self.connection.on("Network.loadingFinished", self._on_done)
+        self.connection.on("Network.loadingFailed", self._on_done)
+
+    async def _stop(self):
+        if self.connection:
+            await self.connection.close()
+        self.connection = None
+        self._sessions.clear()
+        self._tabs.clear()
+
+    async def _session(self, target_id: str) -> str:
+        """附加到标签页（每个标签页只附加一次）"""
+        session_id = self._sessions.get(target_id)
+        if session_id is not None:
+            return session_id
+        attached = await self.connection.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})
+        session_id = attached["sessionId"]
+        self._tabs[session_id] = _TabState(target_id)
+        self._sessions[target_id] = session_id
+        await self.connection.send("Page.enable", session_id=session_id)
+        await self.connection.send("Page.setLifecycleEventsEnabled", {"enabled": True}, session_id=session_id)
+        return session_id
+
+    async def _navigate(self, target_id: str, url: str, wait: str, timeout: float,
+                        idle_ms: int, max_inflight: int, selector: Optional[str]) -> Dict[str, Any]:
+        session_id = await self._session(target_id)
+        state = self._tabs[session_id]
+        if wait == "network-idle":
+            if not state.network_enabled:
+                await self.connection.send("Network.enable", session_id=session_id)
+                state.network_enabled = True
+            state.reset_network(max_inflight)
+
+        # 同一文档内的跳转（锚点、history.pushState）不产生新的loaderId，只有该事件
+        same_document = self.connection.expect("Page.navigatedWithinDocument", session_id)
+        start = time.perf_counter()
+        try:
+            result = await self.connection.send("Page.navigate", {"url": url}, session_id=session_id)
+        except CDPError as e:
+            same_document.cancel()
+            raise WebDriverException(f"Navigation to {url} failed: {str(e)}")
+        navigation_ms = (time.perf_counter() - start) * 1000
+        if result.get("errorText"):
+            same_document.cancel()
+            raise WebDriverException(f"Navigation to {url} failed: {result['errorText']}")
+        loader_id = result.get("loaderId")
+        if loader_id or wait == "none":
+            same_document.cancel()
+
+        if wait != "none":
+            try:
+                if loader_id:
+                    await asyncio.wait_for(
+                        self._wait(session_id, state, loader_id, wait, timeout, idle_ms, selector), timeout
+                    )
+                else:
+                    await asyncio.wait_for(same_document, timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutException(f"Timed out after {timeout}s waiting for {wait} of {url}")
+        total_ms = (time.perf_counter() - start) * 1000
+
+        timing = {
+            "url": url,
+            "wait": wait,
+            "navigation_ms": navigation_ms,
+            "wait_ms": total_ms - navigation_ms,
+            "total_ms": total_ms,
+            "page": None
+        }
+        if wait != "none":
+            try:
+                timing["page"] = await self._evaluate(session_id, NAVIGATION_TIMING_SCRIPT)
+            except CDPError as e:
+                logger.debug(f"Failed to read navigation timing: {str(e)}")
+        return timing
+
+    async def _wait(self, session_id: str, state: _TabState, loader_id: str, wait: str,
+                    timeout: float, idle_ms: int, selector: Optional[str]):
+        if wait == "domcontentloaded":
+            await self._lifecycle(state, loader_id, "DOMContentLoaded")
+        elif wait == "load":
+            await self._lifecycle(state, loader_id, "load")
+        elif wait == "selector":
+            # init在新文档创建时触发，之后的求值都在新文档中执行
+            await self._lifecycle(state, loader_id, "init")
+            script = SELECTOR_SCRIPT.replace("__SELECTOR__", json.dumps(selector)).replace(
+                "__TIMEOUT_MS__", str(int(timeout * 1000)))
+            if not await self._evaluate(session_id, script):
+                raise asyncio.TimeoutError()
+        elif wait == "network-idle":
+            await self._lifecycle(state, loader_id, "init")
+            await self._network_idle(state, idle_ms)
+
+    @staticmethod
+    async def _lifecycle(state: _TabState, loader_id: str, name: str):
+        while name not in state.lifecycle.get(loader_id, ()):
+            state.changed.clear()
+            await state.changed.wait()
+
+    @staticmethod
+    async def _network_idle(state: _TabState, idle_ms: int):
+        while True:
+            if state.quiet_since is not None:
+                remaining = idle_ms / 1000 - (time.monotonic() - state.quiet_since)
+                if remaining <= 0:
+                    return
+            else:
+                remaining = None
+            state.changed.clear()
+            try:
+                await asyncio.wait_for(state.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _evaluate(self, session_id: str, expression: str) -> Any:
+        result = await self.connection.send(
+            "Runtime.evaluate",
+            {"expression": expression, "returnByValue": True, "awaitPromise": True},
+            session_id=session_id
+        )
+        if "exceptionDetails" in result:
+            raise CDPError(result["exceptionDetails"].get("text", "Evaluation failed"))
+        return result.get("result", {}).get("value")
+
+    def _on_detached(self, params: Dict[str, Any], parent_session: Optional[str]):
+        session_id = params.get("sessionId")
+        self._tabs.pop(session_id, None)
+        for target_id, attached in list(self._sessions.items()):
+            if attached == session_id:
+                del self._sessions[target_id]
+
+    def _on_lifecycle(self, params: Dict[str, Any], session_id: Optional[str]):
+        state = self._tabs.get(session_id)
+        if state is not None and params.get("frameId") == state.frame_id:
+            state.record_lifecycle(params.get("loaderId"), params.get("name"))
+
+    def _on_request(self, params: Dict[str, Any], session_id: Optional[str]):
+        state = self._tabs.get(session_id)
+        if state is not None:
+            state.update_request(params["requestId"], True)
+
+    def _on_done(self, params: Dict[str, Any], session_id: Optional[str]):
+        state = self._tabs.get(session_id)
+        if state is not None:
+            state.update_request(params["requestId"], False)
@@ -0,0 +1,115 @@
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+import undetected_chromedriver as uc
+from loguru import logger
+from .driver_cache import get_driver_cache, CHROME_VERSION_MAIN
+
+
+def _default_factory():
+    """启动一个不绑定任何配置文件的浏览器"""
+    options = uc.ChromeOptions()
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    return uc.Chrome(
+        options=options,
+        driver_executable_path=get_driver_cache().get_driver_path(CHROME_VERSION_MAIN),
+        version_main=CHROME_VERSION_MAIN
+    )
+
+
+class BrowserPool:
+    """预热浏览器池
+
+    在后台预先启动并完成补丁的chromedriver/Chrome实例，
+    启动配置文件时直接取用，省去冷启动时间。
+    空闲超过idle_ttl秒的实例会被关闭并重新启动。
+    """
+
+    def __init__(self, size: int = 2, idle_ttl: float = 300.0, factory: Optional[Callable[[], Any]] = None):
+        self.size = size
+        self.idle_ttl = idle_ttl
+        self.factory = factory or _default_factory
+        self._idle: List[Tuple[float, Any]] = []  # (启动时间, driver)
+        self._spawning = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台补充线程"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="BrowserPool", daemon=True)
+        self._thread.start()
+
+    def acquire(self) -> Optional[Any]:
+        """取出一个预热的浏览器，池为空时返回None（不阻塞）"""
+        with self._condition:
+            driver = self._idle.pop()[1] if self._idle else None
+            self._condition.notify()
+        return driver
+
+    def idle_count(self) -> int:
+        with self._condition:
+            return len(self._idle)
+
+    def shutdown(self):
+        """停止补充并关闭所有空闲实例"""
+        with self._condition:
+            self._running = False
+            idle, self._idle = self._idle, []
+            self._condition.notify()
+        for _, driver in idle:
+            self._quit(driver)
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.error(f"Failed to quit pooled browser: {str(e)}")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                # 回收空闲过久的实例
+                now = time.monotonic()
+                expired = [driver for started, driver in self._idle if now - started > self.idle_ttl]
+                self._idle = [(started, driver) for started, driver in self._idle if now - started <= self.idle_ttl]
+                need = self.size - len(self._idle) - self._spawning
+                if need > 0:
+                    self._spawning += 1
+
+            for driver in expired:
+                self._quit(driver)
+
+            if need > 0:
+                driver = None
+                try:
+                    driver = self.factory()
+                    logger.debug("Warm browser spawned")
+                except Exception as e:
+                    logger.error(f"Failed to spawn warm browser: {str(e)}")
+                with self._condition:
+                    self._spawning -= 1
+                    if driver is None and self._running:
+                        # 启动失败时稍后重试，避免空转
+                        self._condition.wait(timeout=5.0)
+                    elif driver is not None and self._running:
+                        self._idle.append((time.monotonic(), driver))
+                        driver = None
+                if driver is not None:
+                    self._quit(driver)
+                continue
+
+            with self._condition:
+                if self._running:
+                    self._condition.wait(timeout=min(self.idle_ttl, 30.0))
@@ -1,9 +1,22 @@
+import atexit
 import json
 import os
+import sys
+import threading
+from collections import OrderedDict
+from itertools import islice
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Set
+from loguru import logger
+from .profile_store import ProfileStore
+from .profile_index import INDEXED_FIELDS, ProfileIndex, index_keys
 
-@dataclass
+# Python 3.10起dataclass支持__slots__，大量配置文件常驻内存时省去每个实例的__dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class BrowserProfile:
     """浏览器配置文件类"""
     name: str
@@ -18,13 +31,22 @@ class BrowserProfile:
     dns_protection: str = "cloudflare"  # cloudflare, google, quad9, custom, disabled
     custom_dns: str = ""  # 自定义 DNS over HTTPS 服务器
     dns_leak_protection: bool = True
+    launch_mode: str = "headful"  # headful, headless, lean
+    headless: bool = False  # 无头启动，可与任一启动模式组合
+    resource_policy: Dict[str, Any] = field(default_factory=dict)  # 拦截的资源类型和URL规则
     fingerprint: Dict[str, Any] = field(default_factory=dict)
+    tags: List[str] = field(default_factory=list)
+    group: Optional[str] = None  # 分组，每个配置文件最多属于一个分组
     is_running: bool = False
     driver: Any = None
 
     def __post_init__(self):
         if self.fingerprint is None:
             self.fingerprint = {}
+        if self.resource_policy is None:
+            self.resource_policy = {}
+        if self.tags is None:
+            self.tags = []
 
     def to_dict(self) -> dict:
         """转换为字典格式"""
@@ -41,7 +63,12 @@ class BrowserProfile:
             'dns_protection': self.dns_protection,
             'custom_dns': self.custom_dns,
             'dns_leak_protection': self.dns_leak_protection,
-            'fingerprint': self.fingerprint
+            'launch_mode': self.launch_mode,
+            'headless': self.headless,
+            'resource_policy': self.resource_policy,
+            'fingerprint': self.fingerprint,
+            'tags': self.tags,
+            'group': self.group
         }
         return data
 
@@ -61,61 +88,259 @@ class BrowserProfile:
             dns_protection=data.get('dns_protection', "cloudflare"),
             custom_dns=data.get('custom_dns', ""),
             dns_leak_protection=data.get('dns_leak_protection', True),
-            fingerprint=data.get('fingerprint', {})
+            launch_mode=data.get('launch_mode', "headful"),
+            headless=data.get('headless', False),
+            resource_policy=data.get('resource_policy', {}),
+            fingerprint=data.get('fingerprint', {}),
+            tags=data.get('tags', []),
+            group=data.get('group')
         )
 
+class LazyProfiles(Mapping):
+    """按需加载的配置文件映射，遍历只返回名称，取值时才加载完整记录"""
+
+    def __init__(self, manager: 'ProfileManager'):
+        self._manager = manager
+
+    def __getitem__(self, name: str) -> BrowserProfile:
+        profile = self._manager.get_profile(name)
+        if profile is None:
+            raise KeyError(name)
+        return profile
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._manager.names())
+
+    def __len__(self) -> int:
+        return self._manager.count()
+
+    def __contains__(self, name) -> bool:
+        return self._manager.exists(name)
+
+
 class ProfileManager:
-    """配置文件管理器"""
-    def __init__(self, config_dir: str):
+    """配置文件管理器
+
+    配置文件按记录保存在profiles.db中。启动时只加载名称和索引键并建立二级索引，
+    完整记录在首次通过get_profile访问时才加载，并按LRU淘汰不常用的记录；
+    运行中和尚未写入的配置文件不会被淘汰。
+    修改后只标记为待写入，在FLUSH_DELAY秒内的多次修改合并为一次事务写入；
+    运行状态（is_running、driver）不持久化，启动和关闭浏览器不写磁盘。
+    """
+
+    FLUSH_DELAY = 0.5
+    CACHE_SIZE = 1000
+
+    def __init__(self, config_dir: str, cache_size: int = CACHE_SIZE):
         self.config_dir = config_dir
-        self.profiles_file = os.path.join(config_dir, "profiles.json")
-        self.profiles: Dict[str, BrowserProfile] = {}
+        self.profiles_file = os.path.join(config_dir, "profiles.json")  # 旧版格式，仅用于迁移
+        self.store = ProfileStore(os.path.join(config_dir, "profiles.db"))
+        self.cache_size = cache_size
+        self._order: Dict[str, int] = {}  # 全部名称 -> 创建顺序
+        self._next_order = 0
+        self.index = ProfileIndex()  # 分组、代理、时区、平台、标签和运行状态的二级索引
+        self._cache: "OrderedDict[str, BrowserProfile]" = OrderedDict()
+        self._lock = threading.RLock()  # 并发启动时多个线程同时访问
+        self._dirty: Dict[str, None] = {}  # 保持修改顺序，新建的配置文件按创建顺序写入
+        self._deleted: Set[str] = set()
+        self._flush_timer: Optional[threading.Timer] = None
         self._load_profiles()
+        atexit.register(self.flush)
 
     def _load_profiles(self):
-        """从文件加载配置文件"""
-        if os.path.exists(self.profiles_file):
-            with open(self.profiles_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for name, profile_data in data.items():
-                    self.profiles[name] = BrowserProfile.from_dict(name, profile_data)
+        """只加载名称和索引键，首次运行时导入旧版profiles.json"""
+        if self.store.get_meta("imported_json") is None and os.path.exists(self.profiles_file):
+            count = self.store.import_json(self.profiles_file)
+            logger.info(f"Imported {count} profiles from {self.profiles_file}")
+        for name, keys in self.store.index_entries():
+            self._add_name(name)
+            self.index.add(name, keys)
+
+    def _add_name(self, name: str):
+        """需持有_lock"""
+        self._order[name] = self._next_order
+        self._next_order += 1
+
+    def _is_pinned(self, name: str, profile: BrowserProfile) -> bool:
+        """运行中或有未写入修改的配置文件必须留在内存中"""
+        return profile.is_running or profile.driver is not None or name in self._dirty
+
+    def _cache_put(self, name: str, profile: BrowserProfile):
+        """需持有_lock"""
+        self._cache[name] = profile
+        self._cache.move_to_end(name)
+        self._evict()
+
+    def _evict(self):
+        """按最近最少使用淘汰超出容量的记录，需持有_lock"""
+        excess = len(self._cache) - self.cache_size
+        if excess <= 0:
+            return
+        # 从最冷的一端遍历（不含刚访问的最后一项），找够要淘汰的数量即停止，不复制整个键列表
+        victims = []
+        for cold, profile in islice(self._cache.items(), len(self._cache) - 1):
+            if not self._is_pinned(cold, profile):
+                victims.append(cold)
+                if len(victims) >= excess:
+                    break
+        for cold in victims:
+            del self._cache[cold]
+
+    def save_profile(self, name: str):
+        """标记配置文件待写入，稍后与其他修改合并写入，同时更新二级索引"""
+        with self._lock:
+            profile = self._cache.get(name)
+            if profile is not None:
+                self.index.add(name, index_keys(profile.to_dict()))
+            self._deleted.discard(name)
+            self._dirty[name] = None
+            self._schedule_flush()
 
     def save_profiles(self):
-        """保存配置文件到磁盘"""
-        data = {name: profile.to_dict() for name, profile in self.profiles.items()}
-        with open(self.profiles_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        """立即写入内存中的所有配置文件"""
+        with self._lock:
+            self._dirty.update(dict.fromkeys(self._cache))
+        self.flush()
+
+    def _schedule_flush(self):
+        """需持有_lock"""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.FLUSH_DELAY, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """将待写入的修改和删除写入数据库"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            dirty, self._dirty = self._dirty, {}
+            deleted, self._deleted = self._deleted, set()
+            puts = {name: self._cache[name].to_dict() for name in dirty if name in self._cache}
+            if not puts and not deleted:
+                return
+            try:
+                self.store.write(puts, deleted)
+            except Exception as e:
+                # 写入失败时保留待写入状态，下次再试
+                logger.error(f"Failed to save profiles: {str(e)}")
+                self._dirty = {**dirty, **self._dirty}
+                self._deleted |= deleted
+                self._schedule_flush()
+                return
+            self._evict()
+
+    def close(self):
+        """写入剩余的修改并关闭数据库"""
+        self.flush()
+        self.store.close()
 
     def create_profile(self, name: str, **kwargs) -> BrowserProfile:
         """创建新的配置文件"""
-        if name in self.profiles:
-            raise ValueError(f"Profile {name} already exists")
-        profile = BrowserProfile(name=name, **kwargs)
-        self.profiles[name] = profile
-        self.save_profiles()
+        with self._lock:
+            if name in self._order:
+                raise ValueError(f"Profile {name} already exists")
+            profile = BrowserProfile(name=name, **kwargs)
+            self._add_name(name)
+            # 新建的配置文件在写入前不会被淘汰，写入后由flush统一淘汰
+            self._cache[name] = profile
+            self.save_profile(name)
         return profile
 
     def get_profile(self, name: str) -> Optional[BrowserProfile]:
-        """获取配置文件"""
-        return self.profiles.get(name)
+        """获取配置文件，不在内存中时从数据库加载"""
+        with self._lock:
+            profile = self._cache.get(name)
+            if profile is not None:
+                self._cache.move_to_end(name)
+                return profile
+            if name not in self._order:
+                return None
+            data = self.store.get(name)
+            if data is None:
+                return None
+            profile = BrowserProfile.from_dict(name, data)
+            self._cache_put(name, profile)
+            return profile
 
     def update_profile(self, name: str, **kwargs) -> BrowserProfile:
         """更新配置文件"""
-        if name not in self.profiles:
-            raise ValueError(f"Profile {name} not found")
-        profile = self.profiles[name]
-        for key, value in kwargs.items():
-            if hasattr(profile, key):
-                setattr(profile, key, value)
-        self.save_profiles()
+        with self._lock:
+            profile = self.get_profile(name)
+            if profile is None:
+                raise ValueError(f"Profile {name} not found")
+            for key, value in kwargs.items():
+                if hasattr(profile, key):
+                    setattr(profile, key, value)
+            self.save_profile(name)
         return profile
 
     def delete_profile(self, name: str):
         """删除配置文件"""
-        if name in self.profiles:
-            del self.profiles[name]
-            self.save_profiles()
+        with self._lock:
+            if name not in self._order:
+                return
+            del self._order[name]
+            self.index.remove(name)
+            self._cache.pop(name, None)
+            self._dirty.pop(name, None)
+            self._deleted.add(name)
+            self._schedule_flush()
+
+    def names(self) -> List[str]:
+        """所有配置文件名称（不加载完整记录）"""
+        with self._lock:
+            return list(self._order)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._order)
+
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            return name in self._order
+
+    def set_running(self, name: str, driver=None):
+        """记录浏览器已启动（driver为控制它的驱动）或已关闭（driver为None），同时更新运行状态索引"""
+        with self._lock:
+            profile = self.get_profile(name)
+            if profile is None:
+                return
+            profile.driver = driver
+            profile.is_running = driver is not None
+            self.index.set_running(name, profile.is_running)
+
+    def is_running(self, name: str) -> bool:
+        """从运行状态索引判断，不需要加载记录"""
+        with self._lock:
+            return name in self.index.running
+
+    def running_names(self) -> List[str]:
+        return self.query(running=True, ordered=True)
+
+    def query(self, running: Optional[bool] = None, ordered: bool = False, **criteria) -> List[str]:
+        """按分组、代理、时区、平台、标签和运行状态查询名称（不加载完整记录）
+
+        例如 query(group="电商", proxy="http://1.2.3.4:8080", running=False)，
+        可用的字段见profile_index.INDEXED_FIELDS。
+        结果默认无序，耗时只与结果规模有关；ordered为True时按创建顺序排序（需要排序的调用方才付出排序开销）。
+        """
+        with self._lock:
+            names = self.index.query(running=running, **criteria)
+            if not ordered:
+                return list(names)
+            if len(names) == len(self._order):
+                return list(self._order)
+            return sorted(names, key=self._order.__getitem__)
+
+    def field_values(self, field: str) -> Dict[Any, int]:
+        """索引字段的所有取值及对应的配置文件数量"""
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Unknown index field {field}, expected one of {', '.join(INDEXED_FIELDS)}")
+        with self._lock:
+            return self.index.values(field)
 
-    def list_profiles(self) -> Dict[str, BrowserProfile]:
-        """列出所有配置文件"""
-        return self.profiles
+    def list_profiles(self) -> Mapping:
+        """列出所有配置文件（按需加载的映射）"""
+        return LazyProfiles(self)
@@ -0,0 +1,137 @@
+import json
+import struct
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+# 二进制配置文件记录：魔数、编码版本、字段数，之后是每个字段的长度表，最后依次是各字段内容。
+# 读取时一次解出整张长度表，再按偏移切片，避免逐字段解析。
+# 布尔字段的值直接存放在长度表中，没有内容；值为None的字段长度为_NONE。
+MAGIC = b"FG"
+CODEC_VERSION = 1
+
+_HEADER = struct.Struct("<2sBB")
+_NONE = 0xFFFFFFFF
+_EMPTY_JSON = b"{}"
+
+
+_LENGTHS: Dict[int, struct.Struct] = {}
+
+
+def _lengths(count: int) -> struct.Struct:
+    """按字段数缓存的长度表格式"""
+    lengths = _LENGTHS.get(count)
+    if lengths is None:
+        lengths = _LENGTHS[count] = struct.Struct(f"<{count}I")
+    return lengths
+
+
+# 字段顺序即编码顺序（不含作为主键保存的name）
+# 新字段只能追加在末尾，不需要升级版本：旧记录缺少的字段使用默认值，
+# 旧代码读取新记录时忽略末尾不认识的字段。删除、重排或改变字段含义时才升级版本并添加迁移。
+PROFILE_SCHEMA: List[Tuple[str, str]] = [
+    ("proxy", "str"),
+    ("timezone", "str"),
+    ("geolocation", "json"),
+    ("webrtc", "str"),
+    ("canvas_fp", "bool"),
+    ("webgl_fp", "bool"),
+    ("audio_fp", "bool"),
+    ("client_rects_fp", "bool"),
+    ("dns_protection", "str"),
+    ("custom_dns", "str"),
+    ("dns_leak_protection", "bool"),
+    ("launch_mode", "str"),
+    ("resource_policy", "json"),
+    ("fingerprint", "json"),
+    ("tags", "json"),
+    ("group", "str"),
+    ("headless", "bool"),
+]
+
+
+def _migrate_v0(data: Dict[str, Any]) -> Dict[str, Any]:
+    """版本0为旧版JSON文本记录，字段与版本1相同"""
+    data.pop("name", None)
+    for key in ("resource_policy", "fingerprint"):
+        if data.get(key) is None:
+            data.pop(key, None)
+    return data
+
+
+# 各二进制版本的字段模式，升级版本时保留旧模式用于解码旧记录
+SCHEMAS: Dict[int, List[Tuple[str, str]]] = {
+    1: PROFILE_SCHEMA,
+}
+
+# 版本n -> 版本n+1 的迁移函数
+MIGRATIONS: Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    0: _migrate_v0,
+}
+
+
+def encode_profile(data: Dict[str, Any]) -> bytes:
+    """将BrowserProfile.to_dict()的结果编码为二进制记录"""
+    lengths = []
+    payloads = []
+    for key, kind in PROFILE_SCHEMA:
+        value = data.get(key)
+        if kind == "bool":
+            lengths.append(1 if value else 0)
+            continue
+        if value is None:
+            lengths.append(_NONE)
+            continue
+        if kind == "str":
+            encoded = value.encode("utf-8")
+        else:
+            encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        lengths.append(len(encoded))
+        payloads.append(encoded)
+    count = len(PROFILE_SCHEMA)
+    return b"".join([_HEADER.pack(MAGIC, CODEC_VERSION, count), _lengths(count).pack(*lengths)] + payloads)
+
+
+def _decode_fields(buffer: bytes, schema: List[Tuple[str, str]], count: int) -> Dict[str, Any]:
+    table = _lengths(count)
+    offset = _HEADER.size + table.size
+    data = {}
+    # 旧代码读取新记录时zip会截断末尾不认识的字段，新代码读取旧记录时缺少的字段由from_dict补默认值
+    for (key, kind), length in zip(schema, table.unpack_from(buffer, _HEADER.size)):
+        if kind == "bool":
+            data[key] = length == 1
+        elif length == _NONE:
+            data[key] = None
+        else:
+            end = offset + length
+            payload = buffer[offset:end]
+            offset = end
+            if kind == "str":
+                data[key] = payload.decode("utf-8")
+            elif payload == _EMPTY_JSON:
+                data[key] = {}
+            else:
+                data[key] = json.loads(payload)
+    return data
+
+
+def record_version(raw: Union[bytes, str]) -> int:
+    """返回记录的编码版本，旧版JSON文本为0"""
+    if isinstance(raw, (bytes, bytearray, memoryview)) and bytes(raw[:2]) == MAGIC:
+        return raw[2]
+    return 0
+
+
+def decode_profile(raw: Union[bytes, str]) -> Dict[str, Any]:
+    """解码二进制或旧版JSON记录，按需迁移到当前版本，返回可传给from_dict的字典"""
+    version = record_version(raw)
+    if version == 0:
+        if isinstance(raw, (bytes, bytearray, memoryview)):
+            raw = bytes(raw).decode("utf-8")
+        data = json.loads(raw)
+    elif version > CODEC_VERSION:
+        raise ValueError(f"Profile record version {version} is newer than supported version {CODEC_VERSION}")
+    else:
+        data = _decode_fields(raw, SCHEMAS[version], raw[3])
+    while version < CODEC_VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+    return data
@@ -0,0 +1,136 @@
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+# 建立二级索引的字段，tag为多值字段（每个标签一个键）
+INDEXED_FIELDS = ("group", "proxy", "timezone", "platform", "tag")
+
+# 索引键的计算方式变化时升级，ProfileStore会重新计算已保存的索引键
+INDEX_KEYS_VERSION = 2
+
+# 界面保存的平台名称 -> navigator.platform
+PLATFORM_NAMES = {
+    "Windows": "Win32",
+    "MacOS": "MacIntel",
+    "Linux": "Linux x86_64",
+}
+
+_EMPTY: FrozenSet[str] = frozenset()
+
+
+def _platform_for_user_agent(user_agent: str) -> str:
+    if "Windows" in user_agent:
+        return "Win32"
+    if "Macintosh" in user_agent:
+        return "MacIntel"
+    return "Linux x86_64"
+
+
+def profile_platform(data: Dict[str, Any]) -> Optional[str]:
+    """从指纹中取出平台，统一为navigator.platform的取值
+
+    依次查找navigator.platform和hardware.platform（界面创建的配置文件保存的是Windows、MacOS等名称），
+    都没有时根据User-Agent判断。
+    """
+    fingerprint = data.get("fingerprint") or {}
+    navigator = fingerprint.get("navigator") or {}
+    hardware = fingerprint.get("hardware") or {}
+    platform = navigator.get("platform") or hardware.get("platform")
+    if platform:
+        return PLATFORM_NAMES.get(platform, platform)
+    user_agent = navigator.get("userAgent")
+    return _platform_for_user_agent(user_agent) if user_agent else None
+
+
+def index_keys(data: Dict[str, Any]) -> Dict[str, Any]:
+    """从BrowserProfile.to_dict()的结果中提取索引键（与记录一起持久化，启动时无需解码完整记录）"""
+    return {
+        "group": data.get("group") or None,
+        "proxy": data.get("proxy") or None,
+        "timezone": data.get("timezone") or None,
+        "platform": profile_platform(data),
+        "tags": sorted(set(data.get("tags") or [])),
+    }
+
+
+def _field_values(keys: Dict[str, Any]) -> Iterable[Tuple[str, Any]]:
+    for field in INDEXED_FIELDS:
+        if field == "tag":
+            for tag in keys.get("tags") or ():
+                yield field, tag
+        else:
+            yield field, keys.get(field)
+
+
+class ProfileIndex:
+    """配置文件的内存二级索引
+
+    每个字段维护 值 -> 名称集合 的映射，创建、修改和删除时只更新变化的键；
+    查询时从最小的集合开始求交集，耗时只与结果规模有关，与配置文件总数无关。
+    运行状态不持久化，由ProfileManager在浏览器启动和关闭时更新。
+    本类不加锁，由ProfileManager在其锁内调用。
+    """
+
+    def __init__(self):
+        self._by: Dict[str, Dict[Any, Set[str]]] = {field: {} for field in INDEXED_FIELDS}
+        self._entries: Dict[str, Set[Tuple[str, Any]]] = {}
+        self.running: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def add(self, name: str, keys: Dict[str, Any]):
+        """添加或更新配置文件的索引键"""
+        entries = set(_field_values(keys))
+        previous = self._entries.get(name, set())
+        for field, value in previous - entries:
+            self._discard(field, value, name)
+        for field, value in entries - previous:
+            self._by[field].setdefault(value, set()).add(name)
+        self._entries[name] = entries
+
+    def remove(self, name: str):
+        for field, value in self._entries.pop(name, ()):
+            self._discard(field, value, name)
+        self.running.discard(name)
+
+    def set_running(self, name: str, running: bool):
+        if running:
+            self.running.add(name)
+        else:
+            self.running.discard(name)
+
+    def _discard(self, field: str, value: Any, name: str):
+        names = self._by[field].get(value)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._by[field][value]
+
+    def values(self, field: str) -> Dict[Any, int]:
+        """字段的所有取值及对应的配置文件数量（用于界面的筛选项）"""
+        return {value: len(names) for value, names in self._by[field].items()}
+
+    def query(self, running: Optional[bool] = None, **criteria) -> Set[str]:
+        """按字段值查询，多个条件取交集
+
+        例如 query(group="电商", proxy="http://1.2.3.4:8080", running=False)。
+        值为None时匹配该字段为空的配置文件，tag匹配包含该标签的配置文件。
+        """
+        sets: List[Set[str]] = []
+        for field, value in criteria.items():
+            if field not in self._by:
+                raise ValueError(f"Unknown index field {field}, expected one of {', '.join(INDEXED_FIELDS)}")
+            sets.append(self._by[field].get(value, _EMPTY))
+        if running:
+            sets.append(self.running)
+        if not sets:
+            result = set(self._entries)
+        else:
+            sets.sort(key=len)
+            result = set(sets[0])
+            result.intersection_update(*sets[1:])
+        if running is False:
+            result -= self.running
+        return result
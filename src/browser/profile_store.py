@@ -0,0 +1,138 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .profile_codec import decode_profile, encode_profile
+from .profile_index import INDEX_KEYS_VERSION, index_keys
+
+
+class ProfileStore:
+    """按记录存储配置文件的SQLite库（WAL模式）
+
+    每次写入只涉及变更的记录，并在一个事务中原子提交，
+    进程在写入中途崩溃也不会破坏已有数据。
+    记录使用profile_codec的二进制格式，旧版JSON文本记录在读取时迁移，下次保存时改写。
+    index_keys列保存二级索引用到的字段，启动时只读这一列即可建立索引；
+    索引键的计算方式变化（INDEX_KEYS_VERSION）时清空该列，由index_entries重新计算。
+    data列声明为BLOB，早期按TEXT声明的表在打开时重建。
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "name TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL, index_keys TEXT)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        columns = {row[1]: row[2] for row in self._conn.execute("PRAGMA table_info(profiles)")}
+        if "index_keys" not in columns:
+            self._conn.execute("ALTER TABLE profiles ADD COLUMN index_keys TEXT")
+        self._conn.commit()
+        if columns["data"].upper() != "BLOB":
+            self._rebuild_profiles_table()
+        if self.get_meta("index_keys_version") != str(INDEX_KEYS_VERSION):
+            with self._conn:
+                self._conn.execute("UPDATE profiles SET index_keys = NULL")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('index_keys_version', ?)",
+                    (str(INDEX_KEYS_VERSION),)
+                )
+
+    def _rebuild_profiles_table(self):
+        """将data列改为BLOB：SQLite不能修改列类型，建新表复制后替换，保留rowid（即创建顺序）
+
+        复制不改变已有值的存储类型，二进制记录和旧版JSON文本都原样保留。
+        """
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE profiles_new ("
+                "name TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL, index_keys TEXT)"
+            )
+            self._conn.execute(
+                "INSERT INTO profiles_new (rowid, name, data, updated_at, index_keys) "
+                "SELECT rowid, name, data, updated_at, index_keys FROM profiles"
+            )
+            self._conn.execute("DROP TABLE profiles")
+            self._conn.execute("ALTER TABLE profiles_new RENAME TO profiles")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def index_entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """按创建顺序返回所有名称及其索引键，旧记录缺少索引键时先补齐"""
+        with self._lock:
+            missing = self._conn.execute("SELECT name, data FROM profiles WHERE index_keys IS NULL").fetchall()
+            if missing:
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE profiles SET index_keys = ? WHERE name = ?",
+                        [(self._index_json(decode_profile(data)), name) for name, data in missing]
+                    )
+            rows = self._conn.execute("SELECT name, index_keys FROM profiles ORDER BY rowid").fetchall()
+        return [(name, json.loads(keys)) for name, keys in rows]
+
+    @staticmethod
+    def _index_json(data: Dict[str, Any]) -> str:
+        return json.dumps(index_keys(data), ensure_ascii=False, separators=(",", ":"))
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM profiles WHERE name = ?", (name,)).fetchone()
+        return decode_profile(row[0]) if row else None
+
+    def load_all(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, data FROM profiles ORDER BY rowid").fetchall()
+        for name, data in rows:
+            yield name, decode_profile(data)
+
+    def write(self, puts: Dict[str, Dict[str, Any]], deletes: Iterable[str] = ()):
+        """在一个事务中写入变更和删除"""
+        now = time.time()
+        rows = [(name, encode_profile(data), self._index_json(data), now) for name, data in puts.items()]
+        with self._lock:
+            with self._conn:
+                if rows:
+                    # UPSERT保留原有rowid，更新不会改变配置文件的顺序
+                    self._conn.executemany(
+                        "INSERT INTO profiles (name, data, index_keys, updated_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET data = excluded.data, "
+                        "index_keys = excluded.index_keys, updated_at = excluded.updated_at",
+                        rows
+                    )
+                deletes = [(name,) for name in deletes]
+                if deletes:
+                    self._conn.executemany("DELETE FROM profiles WHERE name = ?", deletes)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def import_json(self, json_file: str) -> int:
+        """从旧版profiles.json导入（只导入一次），返回导入的数量"""
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        now = time.time()
+        rows = [(name, encode_profile(profile), self._index_json(profile), now) for name, profile in data.items()]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO profiles (name, data, index_keys, updated_at) VALUES (?, ?, ?, ?)", rows
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('imported_json', ?)", (json_file,)
+                )
+        return len(rows)
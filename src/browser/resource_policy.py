@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from .cdp import CDPConnection, CDPError
+from .target_setup import TargetInitializer
+
+# Fetch域可识别的资源类型
+RESOURCE_TYPES = (
+    "Document", "Stylesheet", "Image", "Media", "Font", "Script", "TextTrack",
+    "XHR", "Fetch", "Prefetch", "EventSource", "WebSocket", "Manifest",
+    "SignedExchange", "Ping", "CSPViolationReport", "Preflight", "Other"
+)
+
+# 常见的第三方跟踪和广告域名
+TRACKER_PATTERNS = [
+    "*://*.google-analytics.com/*",
+    "*://*.googletagmanager.com/*",
+    "*://*.googlesyndication.com/*",
+    "*://*.doubleclick.net/*",
+    "*://*.facebook.net/*",
+    "*://connect.facebook.com/*",
+    "*://*.hotjar.com/*",
+    "*://*.scorecardresearch.com/*",
+    "*://*.criteo.com/*",
+    "*://*.taboola.com/*",
+    "*://*.outbrain.com/*",
+    "*://*.adnxs.com/*",
+    "*://*.amazon-adsystem.com/*",
+    "*://bat.bing.com/*",
+    "*://*.clarity.ms/*",
+    "*://*.segment.io/*",
+    "*://*.mixpanel.com/*",
+]
+
+# 被拦截的请求不会下载，节省的字节数按各类型资源的典型大小估算
+ESTIMATED_BYTES = {
+    "Image": 20000,
+    "Media": 500000,
+    "Font": 30000,
+    "Stylesheet": 10000,
+    "Script": 25000,
+    "XHR": 3000,
+    "Fetch": 3000,
+}
+DEFAULT_ESTIMATED_BYTES = 5000
+
+DEFAULT_POLICY = {
+    "enabled": False,
+    "resource_types": [],
+    "url_patterns": [],
+    "block_trackers": False,
+}
+
+
+def normalize_policy(policy: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """补全缺省字段并校验资源类型"""
+    result = dict(DEFAULT_POLICY)
+    result.update(policy or {})
+    result["resource_types"] = list(result.get("resource_types") or [])
+    result["url_patterns"] = list(result.get("url_patterns") or [])
+    for resource_type in result["resource_types"]:
+        if resource_type not in RESOURCE_TYPES:
+            raise ValueError(f"Unknown resource type {resource_type}")
+    return result
+
+
+def is_policy_active(policy: Optional[Dict[str, Any]]) -> bool:
+    policy = normalize_policy(policy)
+    return bool(policy["enabled"] and (policy["resource_types"] or policy["url_patterns"] or policy["block_trackers"]))
+
+
+def fetch_patterns(policy: Dict[str, Any]) -> List[Dict[str, str]]:
+    """将资源策略转换为Fetch.enable的拦截规则"""
+    patterns = [{"urlPattern": "*", "resourceType": t, "requestStage": "Request"} for t in policy["resource_types"]]
+    url_patterns = policy["url_patterns"] + (TRACKER_PATTERNS if policy["block_trackers"] else [])
+    patterns += [{"urlPattern": p, "requestStage": "Request"} for p in url_patterns]
+    return patterns
+
+
+class ResourceStats:
+    """配置文件的拦截计数（跨多次启动累计）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests_blocked = 0
+        self.estimated_bytes_saved = 0
+        self.by_type: Dict[str, int] = {}
+
+    def record(self, resource_type: str):
+        with self._lock:
+            self.requests_blocked += 1
+            self.estimated_bytes_saved += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+            self.by_type[resource_type] = self.by_type.get(resource_type, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests_blocked": self.requests_blocked,
+                "estimated_bytes_saved": self.estimated_bytes_saved,
+                "by_type": dict(self.by_type)
+            }
+
+
+class ResourceBlocker:
+    """在TargetInitializer的自动附加连接上拦截请求
+
+    chromedriver的execute_cdp_cmd无法接收事件，因此借助初始化器的DevTools连接：
+    作为初始化钩子在每个页面和iframe恢复运行之前用Fetch域拦截匹配的资源类型和URL，
+    与注入脚本等设置共用同一次暂停，新页面的第一个请求也会被拦截。
+    策略可在运行时更新，无需重启浏览器。
+    """
+
+    def __init__(self, initializer: TargetInitializer, policy: Optional[Dict[str, Any]] = None,
+                 stats: Optional[ResourceStats] = None):
+        self.initializer = initializer
+        self.policy = normalize_policy(policy)
+        self.stats = stats or ResourceStats()
+
+    def attach(self):
+        """注册到初始化器，应在初始化器start之前调用；已启动时立即应用到已附加的页面"""
+        self.initializer.on("Fetch.requestPaused", self._on_request_paused)
+        self.initializer.add_hook(self._apply)
+
+    def update_policy(self, policy: Optional[Dict[str, Any]]):
+        """运行时更新策略，立即应用到所有已附加的页面"""
+        self.policy = normalize_policy(policy)
+        self.initializer.run_on_sessions(self._apply)
+
+    def stop(self):
+        """停止拦截，初始化器仍在运行时关闭已附加页面上的Fetch域"""
+        self.initializer.remove_hook(self._apply)
+        try:
+            self.initializer.run_on_sessions(self._disable)
+        except Exception as e:
+            logger.error(f"Failed to stop resource blocker: {str(e)}")
+        self.initializer.off("Fetch.requestPaused", self._on_request_paused)
+
+    async def _apply(self, connection: CDPConnection, session_id: str):
+        if is_policy_active(self.policy):
+            await connection.send("Fetch.enable", {"patterns": fetch_patterns(self.policy)}, session_id=session_id)
+        else:
+            await self._disable(connection, session_id)
+
+    @staticmethod
+    async def _disable(connection: CDPConnection, session_id: str):
+        await connection.send("Fetch.disable", session_id=session_id)
+
+    def _on_request_paused(self, params: Dict[str, Any], session_id: Optional[str]):
+        resource_type = params.get("resourceType", "Other")
+        self.stats.record(resource_type)
+        asyncio.ensure_future(self._fail_request(params["requestId"], session_id))
+
+    async def _fail_request(self, request_id: str, session_id: Optional[str]):
+        connection = self.initializer.connection
+        if connection is None:
+            return
+        try:
+            await connection.send("Fetch.failRequest", {
+                "requestId": request_id, "errorReason": "BlockedByClient"
+            }, session_id=session_id)
+        except CDPError as e:
+            logger.debug(f"Failed to block request {request_id}: {str(e)}")
@@ -0,0 +1,42 @@
+from ..fingerprint.noise import DISGUISE_SCRIPT
+
+# 运行时注入的WebRTC和WebGL保护脚本，代替--disable-webrtc、--disable-webgl等启动参数，
+# 同一个预热浏览器可以服务任意WebRTC/WebGL设置的配置文件
+
+# 与--disable-webgl的表现一致：构造函数仍然存在，getContext对WebGL上下文返回null；
+# 替换后的getContext使用与噪声引擎相同的toString伪装
+WEBGL_DISABLE_SCRIPT = """
+(function() {
+__DISGUISE__
+    const WEBGL_TYPES = ['webgl', 'webgl2', 'experimental-webgl', 'experimental-webgl2'];
+    [window.HTMLCanvasElement, window.OffscreenCanvas].forEach(Canvas => {
+        if (!Canvas) {
+            return;
+        }
+        const originalGetContext = Canvas.prototype.getContext;
+        Canvas.prototype.getContext = disguise(function getContext(type) {
+            if (WEBGL_TYPES.includes(String(type).toLowerCase())) {
+                return null;
+            }
+            return originalGetContext.apply(this, arguments);
+        }, originalGetContext);
+    });
+})();
+""".replace("__DISGUISE__", DISGUISE_SCRIPT)
+
+# 移除点对点连接接口，页面无法通过ICE候选获取本地或真实公网IP
+WEBRTC_DISABLE_SCRIPT = """
+(function() {
+    [
+        'RTCPeerConnection',
+        'webkitRTCPeerConnection',
+        'RTCDataChannel',
+        'RTCIceCandidate',
+        'RTCSessionDescription'
+    ].forEach(name => {
+        try {
+            delete window[name];
+        } catch (e) {}
+    });
+})();
+"""
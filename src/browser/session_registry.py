@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class SessionRecord:
+    """运行中浏览器的会话记录"""
+    profile_name: str
+    owner_pid: int  # 控制该浏览器的管理器进程
+    browser_pid: Optional[int]
+    driver_pid: Optional[int]
+    debugger_address: str  # DevTools地址（host:port）
+    started_at: float = field(default_factory=time.time)
+    owner_started: Optional[float] = None  # 管理器进程的启动时间，用于识别被复用的PID
+
+    def to_dict(self) -> dict:
+        return {
+            'profile_name': self.profile_name,
+            'owner_pid': self.owner_pid,
+            'browser_pid': self.browser_pid,
+            'driver_pid': self.driver_pid,
+            'debugger_address': self.debugger_address,
+            'started_at': self.started_at,
+            'owner_started': self.owner_started
+        }
+
+
+class SessionRegistry:
+    """跨进程共享的运行时会话表（SQLite，WAL模式）
+
+    每个运行中的配置文件一条记录，多个管理器进程、命令行工具或重启后的界面
+    都能看到已在运行的浏览器。进程间通过SQLite的写锁互斥，
+    接管会话使用条件更新，同一会话只会被一个进程接管。
+    """
+
+    BUSY_TIMEOUT = 5.0
+    COLUMNS = "profile_name, owner_pid, browser_pid, driver_pid, debugger_address, started_at, owner_started"
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, timeout=self.BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "profile_name TEXT PRIMARY KEY, owner_pid INTEGER NOT NULL, browser_pid INTEGER, "
+            "driver_pid INTEGER, debugger_address TEXT NOT NULL, started_at REAL NOT NULL, owner_started REAL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "owner_started" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN owner_started REAL")
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def register(self, record: SessionRecord):
+        """记录新启动的浏览器（覆盖同名的旧记录）"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO sessions ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (record.profile_name, record.owner_pid, record.browser_pid, record.driver_pid,
+                     record.debugger_address, record.started_at, record.owner_started)
+                )
+
+    def remove(self, profile_name: str, owner_pid: Optional[int] = None) -> bool:
+        """删除记录，指定owner_pid时只删除该进程拥有的记录"""
+        with self._lock:
+            with self._conn:
+                if owner_pid is None:
+                    cursor = self._conn.execute("DELETE FROM sessions WHERE profile_name = ?", (profile_name,))
+                else:
+                    cursor = self._conn.execute(
+                        "DELETE FROM sessions WHERE profile_name = ? AND owner_pid = ?", (profile_name, owner_pid)
+                    )
+                return cursor.rowcount > 0
+
+    def claim(self, profile_name: str, from_owner: int, to_owner: int,
+              driver_pid: Optional[int] = None, owner_started: Optional[float] = None) -> bool:
+        """将会话从from_owner转给to_owner，记录已被其他进程修改时返回False"""
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "UPDATE sessions SET owner_pid = ?, owner_started = ?, driver_pid = ? "
+                    "WHERE profile_name = ? AND owner_pid = ?",
+                    (to_owner, owner_started, driver_pid, profile_name, from_owner)
+                )
+                return cursor.rowcount > 0
+
+    def get(self, profile_name: str) -> Optional[SessionRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM sessions WHERE profile_name = ?", (profile_name,)
+            ).fetchone()
+        return SessionRecord(*row) if row else None
+
+    def list_sessions(self) -> List[SessionRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM sessions ORDER BY started_at"
+            ).fetchall()
+        return [SessionRecord(*row) for row in rows]
@@ -0,0 +1,329 @@
+import os
+import select
+import signal
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+if sys.platform.startswith("win"):
+    import ctypes
+
+    _PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    _STILL_ACTIVE = 259
+
+    class _FILETIME(ctypes.Structure):
+        _fields_ = [("low", ctypes.c_ulong), ("high", ctypes.c_ulong)]
+
+    def pid_alive(pid: int) -> bool:
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return False
+            return exit_code.value == _STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+
+    def process_start_time(pid: int) -> Optional[float]:
+        """进程的创建时间（FILETIME），进程不存在时返回None"""
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None
+        try:
+            times = [_FILETIME() for _ in range(4)]
+            if not kernel32.GetProcessTimes(handle, *(ctypes.byref(t) for t in times)):
+                return None
+            return float((times[0].high << 32) | times[0].low)
+        finally:
+            kernel32.CloseHandle(handle)
+else:
+    def pid_alive(pid: int) -> bool:
+        # 子进程退出后成为僵尸进程，先尝试回收
+        try:
+            reaped, _ = os.waitpid(pid, os.WNOHANG)
+            if reaped == pid:
+                return False
+        except ChildProcessError:
+            pass
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def process_start_time(pid: int) -> Optional[float]:
+        """进程的启动时间（Linux为开机后的时钟节拍数），无法获取时返回None"""
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            return None
+        # 进程名可能包含空格和括号，从最后一个右括号之后开始按字段切分，starttime为第22个字段
+        fields = stat[stat.rfind(b")") + 2:].split()
+        try:
+            return float(fields[19])
+        except (IndexError, ValueError):
+            return None
+
+
+def same_process(pid: int, started: Optional[float]) -> bool:
+    """PID对应的进程存活且就是记录时的那个进程（排除PID被复用的情况）
+
+    started为记录时的process_start_time，为None或当前平台无法获取启动时间时只检查存活。
+    """
+    if not pid_alive(pid):
+        return False
+    if started is None:
+        return True
+    current = process_start_time(pid)
+    return current is None or current == started
+
+
+def terminate_pid(pid: int):
+    """结束进程，进程已不存在时忽略"""
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except OSError as e:
+        logger.debug(f"Failed to terminate process {pid}: {str(e)}")
+
+
+def _open_pidfd(pid: int) -> Optional[int]:
+    """Linux上为进程打开pidfd，进程退出时可读；不支持时返回None"""
+    if not hasattr(os, "pidfd_open"):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        return None
+
+
+@dataclass
+class _Watch:
+    profile_name: str
+    driver: Any
+    browser_pid: Optional[int]
+    driver_process: Any  # chromedriver的subprocess.Popen
+    pidfd: Optional[int]
+    started_at: float
+
+
+class BrowserSupervisor:
+    """浏览器健康监控
+
+    后台线程跟踪每个配置文件的chromedriver和Chrome进程。Linux上通过pidfd
+    在进程退出时立即唤醒，其他平台退化为按poll_interval秒检查存活。
+    任一进程退出后清理残留的另一个进程，通过on_exit(配置名称, driver)回调更新状态，
+    向监听者发送事件，并可按指数退避自动重启。
+    """
+
+    STABLE_UPTIME = 60.0  # 运行超过该时间后退出不计入连续崩溃次数
+
+    def __init__(self, on_exit: Callable[[str, Any], None], restart: Optional[Callable[[str], Any]] = None,
+                 auto_restart: bool = False, poll_interval: float = 1.0, max_restarts: int = 5,
+                 backoff_base: float = 2.0, backoff_max: float = 60.0):
+        self.on_exit = on_exit
+        self.restart = restart
+        self.auto_restart = auto_restart
+        self.poll_interval = poll_interval
+        self.max_restarts = max_restarts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._watches: Dict[str, _Watch] = {}
+        self._restart_counts: Dict[str, int] = {}
+        self._listeners: List[Callable[[str, str, Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="BrowserSupervisor", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        with self._lock:
+            self._running = False
+            watches, self._watches = list(self._watches.values()), {}
+        for watch in watches:
+            self._close_pidfd(watch)
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 5)
+            self._thread = None
+
+    def on_event(self, callback: Callable[[str, str, Dict[str, Any]], None]):
+        """注册事件回调，参数为(事件类型, 配置名称, 详情)，在后台线程中调用
+
+        事件类型：exited、restarting、restarted、restart_failed、restart_abandoned，
+        以及由BrowserManager核对会话表时发送的reconciled
+        """
+        self._listeners.append(callback)
+
+    def emit(self, event: str, profile_name: str, **details):
+        """向监听者发送事件（供管理器报告监控线程之外的健康事件）"""
+        self._emit(event, profile_name, **details)
+
+    def register(self, profile_name: str, driver):
+        """开始监控配置文件的浏览器进程"""
+        browser_pid = getattr(driver, "browser_pid", None)
+        service = getattr(driver, "service", None)
+        driver_process = getattr(service, "process", None)
+        watch = _Watch(
+            profile_name=profile_name,
+            driver=driver,
+            browser_pid=browser_pid,
+            driver_process=driver_process,
+            pidfd=_open_pidfd(browser_pid) if browser_pid else None,
+            started_at=time.monotonic()
+        )
+        with self._lock:
+            previous = self._watches.get(profile_name)
+            self._watches[profile_name] = watch
+        if previous:
+            self._close_pidfd(previous)
+
+    def unregister(self, profile_name: str):
+        """停止监控（主动关闭浏览器前调用，避免被当作崩溃）"""
+        with self._lock:
+            watch = self._watches.pop(profile_name, None)
+        if watch:
+            self._close_pidfd(watch)
+
+    def get_pids(self, profile_name: str) -> Dict[str, Optional[int]]:
+        with self._lock:
+            watch = self._watches.get(profile_name)
+        if not watch:
+            return {"browser": None, "driver": None}
+        return {
+            "browser": watch.browser_pid,
+            "driver": watch.driver_process.pid if watch.driver_process else None
+        }
+
+    @staticmethod
+    def _close_pidfd(watch: _Watch):
+        if watch.pidfd is not None:
+            try:
+                os.close(watch.pidfd)
+            except OSError:
+                pass
+            watch.pidfd = None
+
+    def _emit(self, event: str, profile_name: str, **details):
+        for callback in self._listeners:
+            try:
+                callback(event, profile_name, details)
+            except Exception as e:
+                logger.error(f"Supervisor listener failed: {str(e)}")
+
+    def _wait(self, watches: List[_Watch]):
+        """等待任一pidfd可读或超时"""
+        pidfds = [watch.pidfd for watch in watches if watch.pidfd is not None]
+        if not pidfds or not hasattr(select, "poll"):
+            time.sleep(self.poll_interval)
+            return
+        poller = select.poll()
+        for fd in pidfds:
+            poller.register(fd, select.POLLIN)
+        try:
+            poller.poll(int(self.poll_interval * 1000))
+        except OSError:
+            time.sleep(self.poll_interval)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._running:
+                    return
+                watches = list(self._watches.values())
+            self._wait(watches)
+
+            for watch in watches:
+                browser_alive = pid_alive(watch.browser_pid) if watch.browser_pid else True
+                driver_alive = watch.driver_process is None or watch.driver_process.poll() is None
+                if browser_alive and driver_alive:
+                    continue
+                with self._lock:
+                    # 期间可能已被主动关闭或重新启动
+                    if self._watches.get(watch.profile_name) is not watch:
+                        continue
+                    del self._watches[watch.profile_name]
+                self._close_pidfd(watch)
+                threading.Thread(
+                    target=self._handle_exit,
+                    args=(watch, browser_alive, driver_alive),
+                    name=f"Reap-{watch.profile_name}",
+                    daemon=True
+                ).start()
+
+    def _handle_exit(self, watch: _Watch, browser_alive: bool, driver_alive: bool):
+        name = watch.profile_name
+        uptime = time.monotonic() - watch.started_at
+        logger.warning(f"Browser {name} exited unexpectedly (browser alive: {browser_alive}, "
+                       f"driver alive: {driver_alive}, uptime: {uptime:.1f}s)")
+
+        # 回收残留进程：驱动仍在时通过quit关闭，驱动已退出时直接结束Chrome
+        if driver_alive:
+            try:
+                watch.driver.quit()
+            except Exception as e:
+                logger.debug(f"Failed to quit orphaned driver for {name}: {str(e)}")
+        elif browser_alive and watch.browser_pid:
+            terminate_pid(watch.browser_pid)
+
+        try:
+            self.on_exit(name, watch.driver)
+        except Exception as e:
+            logger.error(f"Failed to update state for {name}: {str(e)}")
+        self._emit("exited", name, uptime=uptime, browser_alive=browser_alive, driver_alive=driver_alive)
+
+        if self.auto_restart and self.restart:
+            self._schedule_restart(name, uptime)
+
+    def backoff_delay(self, count: int) -> float:
+        """第count+1次连续重启前等待的秒数：backoff_base * 2^count，不超过backoff_max"""
+        return min(self.backoff_max, self.backoff_base * (2 ** count))
+
+    def _schedule_restart(self, profile_name: str, uptime: float):
+        with self._lock:
+            if not self._running:
+                return
+            count = 0 if uptime >= self.STABLE_UPTIME else self._restart_counts.get(profile_name, 0)
+            if count >= self.max_restarts:
+                self._restart_counts.pop(profile_name, None)
+                abandoned = True
+            else:
+                self._restart_counts[profile_name] = count + 1
+                abandoned = False
+        if abandoned:
+            logger.error(f"Browser {profile_name} crashed {count} times in a row, giving up")
+            self._emit("restart_abandoned", profile_name, attempts=count)
+            return
+
+        delay = self.backoff_delay(count)
+        self._emit("restarting", profile_name, attempt=count + 1, delay=delay)
+        timer = threading.Timer(delay, self._restart, args=(profile_name, count + 1))
+        timer.daemon = True
+        timer.start()
+
+    def _restart(self, profile_name: str, attempt: int):
+        with self._lock:
+            if not self._running:
+                return
+        try:
+            self.restart(profile_name)
+            self._emit("restarted", profile_name, attempt=attempt)
+        except Exception as e:
+            logger.error(f"Failed to restart browser {profile_name}: {str(e)}")
+            self._emit("restart_failed", profile_name, attempt=attempt, error=str(e))
+            self._schedule_restart(profile_name, 0.0)
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+from .cdp import CDPConnection, browser_ws_url, debugger_address, get_background_loop
+
+
+@dataclass
+class TabInfo:
+    """标签页信息，target_id即chromedriver的窗口句柄"""
+    target_id: str
+    url: str = ""
+    title: str = ""
+    opener_id: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return {
+            'target_id': self.target_id,
+            'url': self.url,
+            'title': self.title,
+            'opener_id': self.opener_id,
+            'created_at': self.created_at
+        }
+
+
+class TabRegistry:
+    """由CDP Target事件驱动的标签页注册表
+
+    通过独立的DevTools连接订阅targetCreated/targetInfoChanged/targetDestroyed，
+    页面自行打开的弹窗或关闭自身时也能保持同步；按句柄查找为O(1)，
+    创建标签页直接使用Target.createTarget，不需要再列出全部窗口句柄。
+    """
+
+    TIMEOUT = 10.0
+
+    def __init__(self, driver):
+        self.address = debugger_address(driver)
+        self.connection: Optional[CDPConnection] = None
+        self._background = get_background_loop()
+        self._lock = threading.Lock()
+        self._tabs: "OrderedDict[str, TabInfo]" = OrderedDict()  # 按打开顺序排列
+        self._listeners: List[Callable[[str, TabInfo], None]] = []
+
+    def start(self):
+        self._background.run(self._start()).result(self.TIMEOUT)
+
+    def stop(self):
+        try:
+            self._background.run(self._stop()).result(self.TIMEOUT)
+        except Exception as e:
+            logger.error(f"Failed to stop tab registry: {str(e)}")
+        with self._lock:
+            self._tabs.clear()
+
+    def on_change(self, callback: Callable[[str, TabInfo], None]):
+        """注册变更回调，参数为(事件类型created/updated/destroyed, 标签页信息)，在后台线程中调用"""
+        self._listeners.append(callback)
+
+    def create(self, url: str = "about:blank") -> str:
+        """创建新标签页，返回其句柄"""
+        result = self._background.run(
+            self.connection.send("Target.createTarget", {"url": url})
+        ).result(self.TIMEOUT)
+        target_id = result["targetId"]
+        with self._lock:
+            if target_id not in self._tabs:
+                self._tabs[target_id] = TabInfo(target_id=target_id, url=url)
+        return target_id
+
+    def close(self, target_id: str):
+        """关闭标签页"""
+        self._background.run(
+            self.connection.send("Target.closeTarget", {"targetId": target_id})
+        ).result(self.TIMEOUT)
+        with self._lock:
+            self._tabs.pop(target_id, None)
+
+    def get(self, target_id: str) -> Optional[TabInfo]:
+        with self._lock:
+            return self._tabs.get(target_id)
+
+    def handles(self) -> List[str]:
+        with self._lock:
+            return list(self._tabs)
+
+    def list_tabs(self) -> List[TabInfo]:
+        with self._lock:
+            return list(self._tabs.values())
+
+    def __contains__(self, target_id: str) -> bool:
+        with self._lock:
+            return target_id in self._tabs
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tabs)
+
+    async def _start(self):
+        ws_url = await asyncio.get_running_loop().run_in_executor(None, browser_ws_url, self.address)
+        self.connection = CDPConnection(ws_url)
+        await self.connection.connect()
+        self.connection.on("Target.targetCreated", self._on_created)
+        self.connection.on("Target.targetInfoChanged", self._on_info_changed)
+        self.connection.on("Target.targetDestroyed", self._on_destroyed)
+        # 开启发现后会先为已有的目标补发targetCreated
+        await self.connection.send("Target.setDiscoverTargets", {"discover": True})
+
+    async def _stop(self):
+        if self.connection:
+            await self.connection.close()
+        self.connection = None
+
+    def _notify(self, event: str, info: TabInfo):
+        for callback in self._listeners:
+            try:
+                callback(event, info)
+            except Exception as e:
+                logger.error(f"Tab registry listener failed: {str(e)}")
+
+    def _on_created(self, params: Dict[str, Any], session_id: Optional[str]):
+        target = params["targetInfo"]
+        if target.get("type") != "page":
+            return
+        with self._lock:
+            info = self._tabs.get(target["targetId"])
+            if info is None:
+                info = self._tabs[target["targetId"]] = TabInfo(target_id=target["targetId"])
+            info.url = target.get("url", info.url)
+            info.title = target.get("title", info.title)
+            info.opener_id = target.get("openerId")
+        self._notify("created", info)
+
+    def _on_info_changed(self, params: Dict[str, Any], session_id: Optional[str]):
+        target = params["targetInfo"]
+        with self._lock:
+            info = self._tabs.get(target["targetId"])
+            if info is None:
+                return
+            info.url = target.get("url", info.url)
+            info.title = target.get("title", info.title)
+        self._notify("updated", info)
+
+    def _on_destroyed(self, params: Dict[str, Any], session_id: Optional[str]):
+        with self._lock:
+            info = self._tabs.pop(params["targetId"], None)
+        if info:
+            self._notify("destroyed", info)
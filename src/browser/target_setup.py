@@ -0,0 +1,150 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from loguru import logger
+from .cdp import CDPConnection, CDPError, browser_ws_url, debugger_address, get_background_loop
+
+# 在暂停的页面目标上执行的初始化钩子，参数为(连接, sessionId)
+SessionHook = Callable[[CDPConnection, str], Awaitable[None]]
+EventCallback = Callable[[Dict[str, Any], Optional[str]], None]
+
+
+class TargetInitializer:
+    """在浏览器的每个页面目标上执行同一组初始化命令
+
+    chromedriver的execute_cdp_cmd只作用于它附加的初始标签页，新标签页、弹出窗口和跨进程iframe
+    都收不到。本类通过独立的DevTools连接在浏览器级别自动附加（flatten + waitForDebuggerOnStart），
+    新目标在运行任何脚本之前暂停，依次执行注册的命令和钩子（例如资源拦截的Fetch.enable），
+    全部完成后只恢复一次。同一浏览器只应有一个初始化器，否则先恢复目标的连接会让页面在
+    另一个连接完成设置之前开始运行。
+    覆盖设置和注入脚本属于附加的会话，连接需保持到浏览器关闭。
+    """
+
+    TIMEOUT = 10.0
+    TARGET_TYPES = ("page", "iframe")
+
+    def __init__(self, debugger_address: str):
+        self.debugger_address = debugger_address
+        self.commands: List[Tuple[str, Dict[str, Any]]] = []
+        self.hooks: List[SessionHook] = []
+        self._listeners: List[Tuple[str, EventCallback]] = []
+        self.connection: Optional[CDPConnection] = None
+        self._sessions: Set[str] = set()
+        self._setups: Set[asyncio.Future] = set()
+        self._background = get_background_loop()
+
+    @classmethod
+    def for_driver(cls, driver) -> "TargetInitializer":
+        """根据Selenium驱动的调试地址创建初始化器"""
+        return cls(debugger_address(driver))
+
+    def add(self, method: str, params: Optional[Dict[str, Any]] = None):
+        """注册在每个页面目标上执行的命令，需在start之前调用"""
+        self.commands.append((method, params or {}))
+
+    def add_script(self, source: str):
+        """注册在每个文档创建时、页面脚本之前运行的脚本"""
+        self.add("Page.addScriptToEvaluateOnNewDocument", {"source": source})
+
+    def add_hook(self, hook: SessionHook):
+        """注册在每个页面目标恢复运行之前执行的协程函数，已启动时同时应用到已附加的页面"""
+        self.hooks.append(hook)
+        if self.connection:
+            self.run_on_sessions(hook)
+
+    def remove_hook(self, hook: SessionHook):
+        if hook in self.hooks:
+            self.hooks.remove(hook)
+
+    def on(self, method: str, callback: EventCallback):
+        """在初始化器的连接上注册事件回调，可在start之前调用"""
+        self._listeners.append((method, callback))
+        if self.connection:
+            self.connection.on(method, callback)
+
+    def off(self, method: str, callback: EventCallback):
+        if (method, callback) in self._listeners:
+            self._listeners.remove((method, callback))
+        if self.connection:
+            self.connection.off(method, callback)
+
+    @property
+    def active(self) -> bool:
+        """是否注册了需要应用的命令或钩子"""
+        return bool(self.commands or self.hooks)
+
+    def run_on_sessions(self, hook: SessionHook):
+        """在所有已附加的页面上执行钩子（用于运行时更新设置）"""
+        self._background.run(self._run_on_sessions(hook)).result(self.TIMEOUT)
+
+    def start(self):
+        """连接并附加到所有页面，返回时已有的页面都已完成初始化"""
+        self._background.run(self._start()).result(self.TIMEOUT)
+
+    def stop(self):
+        try:
+            self._background.run(self._stop()).result(self.TIMEOUT)
+        except Exception as e:
+            logger.error(f"Failed to stop target initializer: {str(e)}")
+
+    async def _start(self):
+        # 共享的事件循环上不做阻塞的HTTP请求
+        ws_url = await asyncio.get_running_loop().run_in_executor(None, browser_ws_url, self.debugger_address)
+        self.connection = CDPConnection(ws_url)
+        await self.connection.connect()
+        for method, callback in self._listeners:
+            self.connection.on(method, callback)
+        self.connection.on("Target.attachedToTarget", self._on_attached)
+        self.connection.on("Target.detachedFromTarget", self._on_detached)
+        await self.connection.send("Target.setAutoAttach", {
+            "autoAttach": True, "waitForDebuggerOnStart": True, "flatten": True
+        })
+        # 已有页面的附加事件先于命令响应到达，等它们初始化完成，保证之后的第一次导航已生效
+        if self._setups:
+            await asyncio.gather(*list(self._setups), return_exceptions=True)
+
+    async def _stop(self):
+        if self.connection:
+            await self.connection.close()
+        self.connection = None
+        self._sessions.clear()
+
+    async def _run_on_sessions(self, hook: SessionHook):
+        if not self.connection:
+            return
+        for session_id in list(self._sessions):
+            try:
+                await hook(self.connection, session_id)
+            except CDPError as e:
+                logger.debug(f"Failed to update session {session_id}: {str(e)}")
+
+    def _on_attached(self, params: Dict[str, Any], parent_session: Optional[str]):
+        session_id = params["sessionId"]
+        target_type = params.get("targetInfo", {}).get("type")
+        setup = asyncio.ensure_future(self._setup_session(session_id, target_type in self.TARGET_TYPES))
+        self._setups.add(setup)
+        setup.add_done_callback(self._setups.discard)
+
+    def _on_detached(self, params: Dict[str, Any], parent_session: Optional[str]):
+        self._sessions.discard(params.get("sessionId"))
+
+    async def _setup_session(self, session_id: str, initialize: bool):
+        try:
+            if initialize:
+                self._sessions.add(session_id)
+                for method, params in self.commands:
+                    try:
+                        await self.connection.send(method, params, session_id=session_id)
+                    except CDPError as e:
+                        # 部分命令在iframe目标上不可用，不影响其余命令
+                        logger.debug(f"{method} failed for session {session_id}: {str(e)}")
+                for hook in list(self.hooks):
+                    try:
+                        await hook(self.connection, session_id)
+                    except CDPError as e:
+                        logger.debug(f"Initialization hook failed for session {session_id}: {str(e)}")
+                await self.connection.send("Target.setAutoAttach", {
+                    "autoAttach": True, "waitForDebuggerOnStart": True, "flatten": True
+                }, session_id=session_id)
+            await self.connection.send("Runtime.runIfWaitingForDebugger", session_id=session_id)
+        except CDPError as e:
+            logger.debug(f"Failed to initialize session {session_id}: {str(e)}")
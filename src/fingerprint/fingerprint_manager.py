@@ -1,18 +1,64 @@
-import json
 import os
 import random
 import platform
+import copy
+import hashlib
+import hmac
+import itertools
+from collections import OrderedDict
+import numpy as np
 from loguru import logger
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from .storage import DirectoryFingerprintStorage, SQLiteFingerprintStorage
+from .uniqueness import FingerprintIndex, canonical_hash, identity_hash, audit
+from .noise import build_noise_script, noise_seed
 
 class FingerprintManager:
-    def __init__(self):
-        self.fingerprints_dir = os.path.join(
+    # 注入脚本缓存的最大条目数
+    SCRIPT_CACHE_SIZE = 128
+    # 生成唯一指纹时的最大重新采样次数
+    MAX_SAMPLE_ATTEMPTS = 20
+    # 派生指纹的算法版本，修改后整个机群的派生指纹随之迁移
+    DERIVATION_VERSION = 1
+
+    def __init__(self, script_cache_size: int = SCRIPT_CACHE_SIZE, backend: str = "sqlite",
+                 fleet_secret: Optional[str] = None, fingerprints_dir: Optional[str] = None):
+        self.fingerprints_dir = fingerprints_dir or os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
             "profiles"
         )
         os.makedirs(self.fingerprints_dir, exist_ok=True)
         
+        # 指纹存储：sqlite为单文件数据库，directory为每个指纹一个JSON文件
+        if backend == "sqlite":
+            self.storage = SQLiteFingerprintStorage(os.path.join(self.fingerprints_dir, "fingerprints.db"))
+        elif backend == "directory":
+            self.storage = DirectoryFingerprintStorage(self.fingerprints_dir)
+        else:
+            raise ValueError(f"Unknown fingerprint storage backend: {backend}")
+        
+        # 指纹唯一性索引
+        self.index = FingerprintIndex(os.path.join(self.fingerprints_dir, ".index", f"uniqueness-{backend}.json"))
+        if len(self.index) and not len(self.storage):
+            # 存储被删除或重建过，旧索引已失效
+            self.index.rebuild([])
+            self.index.save()
+        
+        # 首次使用时从原有目录布局迁移（经过索引，已有的重复指纹只记录警告）
+        if backend == "sqlite" and not len(self.storage):
+            self.import_fingerprints(self.fingerprints_dir, allow_duplicates=True)
+        
+        # 机群密钥：设置后未保存的指纹按名称确定性派生，而不是随机创建
+        self.fleet_secret = fleet_secret or os.environ.get("FINGERGUARD_FLEET_SECRET")
+        self._derived: Dict[str, Dict[str, Any]] = {}
+        self._derived_hashes: Dict[str, str] = {}
+        
+        # 注入脚本LRU缓存（指纹内容哈希 -> 脚本）
+        self.script_cache_size = script_cache_size
+        self._script_cache: "OrderedDict[str, str]" = OrderedDict()
+        self.script_cache_hits = 0
+        self.script_cache_misses = 0
+        
         # 加载基础指纹模板
         self.template = {
             "navigator": {
@@ -74,50 +120,378 @@ class FingerprintManager:
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/95.0.4638.69 Safari/537.36"
         ]
-    
-    def create_fingerprint(self, name: str) -> Dict[str, Any]:
-        """创建新的指纹配置"""
-        fingerprint = self.template.copy()
-        
-        # 随机化一些值
-        fingerprint["navigator"]["userAgent"] = random.choice(self.user_agents)
-        fingerprint["navigator"]["hardwareConcurrency"] = random.choice([2, 4, 6, 8])
-        fingerprint["navigator"]["deviceMemory"] = random.choice([4, 8, 16])
         
-        screen_resolutions = [
+        # 可选的硬件参数
+        self.hardware_concurrency_choices = [2, 4, 6, 8]
+        self.device_memory_choices = [4, 8, 16]
+        self.screen_resolutions = [
             (1920, 1080),
             (1366, 768),
             (1440, 900),
             (1536, 864),
             (1600, 900)
         ]
-        width, height = random.choice(screen_resolutions)
+        
+        if not len(self.index) and len(self.storage):
+            self.rebuild_index()
+    
+    def _build_fingerprint(self, user_agent: str, cores: int, memory: int,
+                           width: int, height: int, seed: Optional[int] = None) -> Dict[str, Any]:
+        """基于模板构建一份独立的指纹配置
+
+        seed为每条记录独立的噪声种子，决定Canvas/音频/ClientRects噪声；
+        它不属于身份本身，判断重复时不参与计算（见identity_hash）。
+        """
+        fingerprint = copy.deepcopy(self.template)
+        fingerprint["navigator"]["userAgent"] = user_agent
+        fingerprint["navigator"]["hardwareConcurrency"] = cores
+        fingerprint["navigator"]["deviceMemory"] = memory
         fingerprint["screen"]["width"] = width
         fingerprint["screen"]["height"] = height
         fingerprint["screen"]["availWidth"] = width
         fingerprint["screen"]["availHeight"] = height - 40
+        if seed is not None:
+            fingerprint["noise_seed"] = seed
+        return fingerprint
+    
+    def create_fingerprint(self, name: str) -> Dict[str, Any]:
+        """创建新的指纹配置（保证与已有指纹不完全相同）"""
+        for _ in range(self.MAX_SAMPLE_ATTEMPTS):
+            # 随机化一些值
+            width, height = random.choice(self.screen_resolutions)
+            fingerprint = self._build_fingerprint(
+                random.choice(self.user_agents),
+                random.choice(self.hardware_concurrency_choices),
+                random.choice(self.device_memory_choices),
+                width,
+                height,
+                random.getrandbits(32)
+            )
+            if not self.index.is_duplicate(identity_hash(fingerprint)):
+                break
+        else:
+            raise ValueError(f"Failed to create a unique fingerprint for {name}")
+        
+        self._warn_linkable(name, fingerprint)
         
         # 保存指纹配置
         self.save_fingerprint(name, fingerprint)
         return fingerprint
     
+    def _sample_fingerprints(self, rng: "np.random.Generator", count: int) -> List[Dict[str, Any]]:
+        """向量化采样count份指纹"""
+        ua_index = rng.integers(0, len(self.user_agents), size=count)
+        cores = rng.choice(np.array(self.hardware_concurrency_choices), size=count)
+        memory = rng.choice(np.array(self.device_memory_choices), size=count)
+        resolutions = np.array(self.screen_resolutions)[rng.integers(0, len(self.screen_resolutions), size=count)]
+        seeds = rng.integers(0, 2 ** 32, size=count)
+        return [
+            self._build_fingerprint(self.user_agents[ua], core, mem, width, height, seed)
+            for ua, core, mem, (width, height), seed in zip(
+                ua_index.tolist(), cores.tolist(), memory.tolist(), resolutions.tolist(), seeds.tolist())
+        ]
+    
+    def create_fingerprints(self, count: int, seed: Optional[int] = None,
+                            prefix: str = "fingerprint", unique: bool = True) -> Dict[str, Dict[str, Any]]:
+        """批量创建指纹配置
+
+        一次性向量化采样所有属性，构建互不共享的记录后批量写入。
+        名称从 {prefix}_1 开始分配未被占用的序号。
+        unique为True时对与已有指纹或本批次重复的记录重新采样，
+        噪声种子不参与判断，只有属性组合不同的记录才算唯一；
+        多次重新采样仍无法得到count份唯一指纹（属性空间不够大）时抛出ValueError。
+        """
+        if count <= 0:
+            return {}
+        
+        rng = np.random.default_rng(seed)
+        pending = self._allocate_names(prefix, count)
+        fingerprints = {}
+        seen = set()
+        sample_size = count
+        for _ in range(self.MAX_SAMPLE_ATTEMPTS):
+            candidates = iter(self._sample_fingerprints(rng, sample_size))
+            retry = []
+            for name in pending:
+                for fingerprint in candidates:
+                    if unique:
+                        key = identity_hash(fingerprint)
+                        if key in seen or self.index.is_duplicate(key):
+                            continue
+                        seen.add(key)
+                    fingerprints[name] = fingerprint
+                    break
+                else:
+                    retry.append(name)
+            pending = retry
+            if not pending:
+                break
+            # 重复越多越需要多采样候选
+            sample_size = len(pending) * 8
+        else:
+            raise ValueError(
+                f"Only {len(fingerprints)} of {count} fingerprints could be made unique, "
+                "the attribute space is too small"
+            )
+        
+        self.save_fingerprints(fingerprints)
+        logger.info(f"Created {count} fingerprints")
+        return fingerprints
+    
+    def import_fingerprint(self, name: str, fingerprint: Dict[str, Any], allow_linkable: bool = True):
+        """导入外部指纹配置，与已有指纹完全相同时抛出ValueError"""
+        conflicts = self.index.check(fingerprint, name)
+        if conflicts["duplicate"]:
+            raise ValueError(f"Fingerprint {name} duplicates {conflicts['duplicate']}")
+        if conflicts["linkable"] and not allow_linkable:
+            raise ValueError(f"Fingerprint {name} is linkable to: {conflicts['linkable']}")
+        self._warn_linkable(name, fingerprint, conflicts)
+        self.save_fingerprint(name, fingerprint)
+    
+    def _warn_linkable(self, name: str, fingerprint: Dict[str, Any], conflicts: Optional[Dict[str, Any]] = None):
+        if conflicts is None:
+            conflicts = self.index.check(fingerprint, name)
+        for key, names in conflicts["linkable"].items():
+            logger.warning(f"Fingerprint {name} shares {key} with {len(names)} other fingerprints")
+    
+    def iter_fingerprints(self):
+        """逐个读取存储中的指纹（不经过缓存），用于流式遍历"""
+        return self.storage.iter_fingerprints()
+    
+    def rebuild_index(self):
+        """根据存储中的全部指纹和本进程已派生的指纹重建唯一性索引"""
+        self.index.rebuild(itertools.chain(self.iter_fingerprints(), list(self._derived.items())))
+        self.index.save()
+        logger.info(f"Fingerprint index rebuilt: {len(self.index)} entries")
+    
+    def audit_fingerprints(self) -> Dict[str, List[List[str]]]:
+        """审计全部指纹，报告完全相同或可关联的身份簇"""
+        return audit(self.iter_fingerprints(), self.index.linkability_keys)
+    
+    def _allocate_names(self, prefix: str, count: int) -> List[str]:
+        """分配count个未被占用的指纹名称"""
+        return self.storage.allocate_names(prefix, count)
+    
+    def next_fingerprint_name(self, prefix: str = "fingerprint") -> str:
+        """获取下一个未被占用的指纹名称"""
+        return self.storage.allocate_names(prefix, 1)[0]
+    
+    def list_fingerprints(self) -> List[str]:
+        """列出所有指纹名称"""
+        return self.storage.names()
+    
+    def fingerprint_exists(self, name: str) -> bool:
+        """检查指纹是否存在"""
+        return self.storage.exists(name)
+    
     def load_fingerprint(self, name: str) -> Dict[str, Any]:
-        """加载指定的指纹配置"""
-        try:
-            with open(os.path.join(self.fingerprints_dir, f"{name}.json"), "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
+        """加载指定的指纹配置
+
+        未保存的指纹在设置了机群密钥时按名称派生（仅缓存在内存中），
+        否则随机创建并保存。
+        """
+        fingerprint = self.storage.get(name)
+        if fingerprint is None:
+            if self.fleet_secret:
+                return self.derive_fingerprint(name)
             logger.warning(f"Fingerprint {name} not found, creating new one")
             return self.create_fingerprint(name)
+        return fingerprint
+    
+    @staticmethod
+    def _platform_for_user_agent(user_agent: str) -> str:
+        """根据User-Agent确定与之一致的navigator.platform"""
+        if "Windows" in user_agent:
+            return "Win32"
+        if "Macintosh" in user_agent:
+            return "MacIntel"
+        return "Linux x86_64"
+    
+    def derive_fingerprint(self, name: str) -> Dict[str, Any]:
+        """根据名称和机群密钥确定性地派生指纹
+
+        使用HMAC-SHA256作为带密钥的种子，任何持有相同密钥的节点
+        都能重建出完全相同的指纹，结果缓存在内存中，不写入存储，返回副本。
+        派生的指纹同样登记到唯一性索引，与已保存的指纹重复或可关联时记录警告。
+        """
+        fingerprint = self._derived.get(name)
+        if fingerprint is not None:
+            return copy.deepcopy(fingerprint)
+        if not self.fleet_secret:
+            raise ValueError("Fleet secret is not configured")
+        
+        message = f"v{self.DERIVATION_VERSION}:{name}".encode("utf-8")
+        digest = hmac.new(self.fleet_secret.encode("utf-8"), message, hashlib.sha256).digest()
+        rng = random.Random(int.from_bytes(digest, "big"))
+        
+        user_agent = rng.choice(self.user_agents)
+        width, height = rng.choice(self.screen_resolutions)
+        fingerprint = self._build_fingerprint(
+            user_agent,
+            rng.choice(self.hardware_concurrency_choices),
+            rng.choice(self.device_memory_choices),
+            width,
+            height
+        )
+        # 不依赖本机平台，保证各节点派生结果一致
+        fingerprint["navigator"]["platform"] = self._platform_for_user_agent(user_agent)
+        
+        conflicts = self.index.check(fingerprint, name)
+        if conflicts["duplicate"]:
+            logger.warning(f"Derived fingerprint {name} duplicates {conflicts['duplicate']}")
+        self._warn_linkable(name, fingerprint, conflicts)
+        self.index.add(name, fingerprint)
+        self.index.schedule_save()
+        
+        self._derived[name] = fingerprint
+        self._derived_hashes[name] = canonical_hash(fingerprint)
+        return copy.deepcopy(fingerprint)
+    
+    def override_fingerprint(self, name: str, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        """覆盖指纹中的部分字段并保存
+
+        派生指纹只有在被覆盖时才会写入存储。
+        """
+        base = self.storage.get(name)
+        if base is None:
+            base = self.derive_fingerprint(name) if self.fleet_secret else self.create_fingerprint(name)
+        fingerprint = copy.deepcopy(base)
+        
+        def merge(target: Dict[str, Any], updates: Dict[str, Any]):
+            for key, value in updates.items():
+                if isinstance(value, dict) and isinstance(target.get(key), dict):
+                    merge(target[key], value)
+                else:
+                    target[key] = value
+        
+        merge(fingerprint, overrides)
+        self.save_fingerprint(name, fingerprint)
+        self._derived.pop(name, None)
+        self._derived_hashes.pop(name, None)
+        return fingerprint
     
     def save_fingerprint(self, name: str, fingerprint: Dict[str, Any]):
         """保存指纹配置"""
-        with open(os.path.join(self.fingerprints_dir, f"{name}.json"), "w") as f:
-            json.dump(fingerprint, f, indent=4)
+        self.storage.put(name, fingerprint)
+        self.index.add(name, fingerprint)
+        self.index.schedule_save()
+    
+    def save_fingerprints(self, fingerprints: Dict[str, Dict[str, Any]]):
+        """批量保存指纹配置（一次批量写入）"""
+        self.storage.put_many(fingerprints)
+        for name, fingerprint in fingerprints.items():
+            self.index.add(name, fingerprint)
+        self.index.save()
     
-    def get_injection_script(self, fingerprint: Dict[str, Any]) -> str:
-        """生成注入浏览器的JavaScript代码"""
+    def delete_fingerprint(self, name: str):
+        """删除指纹配置"""
+        self.storage.delete(name)
+        self.index.remove(name)
+        self.index.schedule_save()
+    
+    def import_fingerprints(self, directory: str, allow_duplicates: bool = False) -> int:
+        """从每个指纹一个JSON文件的目录批量导入
+
+        导入前检查与已有指纹及本批次内的完全重复，存在重复时不写入任何记录并抛出ValueError；
+        allow_duplicates为True时照常导入，只记录警告。
+        """
+        fingerprints = dict(DirectoryFingerprintStorage(directory).iter_fingerprints())
+        duplicates = self._find_duplicates(fingerprints)
+        if duplicates and not allow_duplicates:
+            raise ValueError(f"{len(duplicates)} imported fingerprints are duplicates: {duplicates}")
+        for name, owner in duplicates.items():
+            logger.warning(f"Fingerprint {name} duplicates {owner}")
+        self.save_fingerprints(fingerprints)
+        logger.info(f"Imported {len(fingerprints)} fingerprints from {directory}")
+        return len(fingerprints)
+    
+    def _find_duplicates(self, fingerprints: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """找出与已有指纹或本批次中前面的记录完全相同的指纹，返回 名称 -> 重复对象"""
+        duplicates = {}
+        seen: Dict[str, str] = {}
+        for name, fingerprint in fingerprints.items():
+            key = identity_hash(fingerprint)
+            owner = seen.get(key) or next((n for n in self.index.canonical.get(key, ()) if n != name), None)
+            if owner:
+                duplicates[name] = owner
+            else:
+                seen[key] = name
+        return duplicates
+    
+    def export_fingerprints(self, directory: str) -> int:
+        """导出为每个指纹一个JSON文件的目录布局"""
+        target = DirectoryFingerprintStorage(directory)
+        count = 0
+        batch = {}
+        for name, fingerprint in self.iter_fingerprints():
+            batch[name] = fingerprint
+            if len(batch) >= 500:
+                target.put_many(batch)
+                count += len(batch)
+                batch = {}
+        target.put_many(batch)
+        count += len(batch)
+        logger.info(f"Exported {count} fingerprints to {directory}")
+        return count
+    
+    @staticmethod
+    def fingerprint_hash(fingerprint: Dict[str, Any]) -> str:
+        """计算指纹内容的稳定哈希（与键顺序无关）"""
+        return canonical_hash(fingerprint)
+    
+    def _script_key(self, fingerprint: Dict[str, Any], name: Optional[str]) -> str:
+        """脚本缓存键：有名称时使用存储记录（或派生指纹）上记忆的内容哈希"""
+        if name is not None:
+            key = self.storage.content_hash(name) or self._derived_hashes.get(name)
+            if key is not None:
+                return key
+        return self.fingerprint_hash(fingerprint)
+    
+    def get_injection_script(self, fingerprint: Dict[str, Any], name: Optional[str] = None) -> str:
+        """生成注入浏览器的JavaScript代码（按指纹内容哈希缓存）
+
+        传入name时使用存储中记忆的内容哈希作为缓存键，命中时不再序列化整个指纹；
+        fingerprint与名称对应的已保存记录不同（例如调用方修改过）时不要传name。
+        """
+        key = self._script_key(fingerprint, name)
+        script = self._script_cache.get(key)
+        if script is not None:
+            self._script_cache.move_to_end(key)
+            self.script_cache_hits += 1
+            return script
+        
+        self.script_cache_misses += 1
+        script = self._render_injection_script(fingerprint)
+        self._script_cache[key] = script
+        if len(self._script_cache) > self.script_cache_size:
+            self._script_cache.popitem(last=False)
+        return script
+    
+    def get_script_cache_stats(self) -> Dict[str, int]:
+        """获取注入脚本缓存的统计信息"""
+        return {
+            "size": len(self._script_cache),
+            "max_size": self.script_cache_size,
+            "hits": self.script_cache_hits,
+            "misses": self.script_cache_misses
+        }
+    
+    def clear_script_cache(self):
+        """清空注入脚本缓存"""
+        self._script_cache.clear()
+        self.script_cache_hits = 0
+        self.script_cache_misses = 0
+    
+    def _render_injection_script(self, fingerprint: Dict[str, Any]) -> str:
+        """渲染注入脚本"""
+        seed = fingerprint.get("noise_seed")
+        if seed is None:
+            seed = noise_seed(canonical_hash(fingerprint))
+        noise_script = build_noise_script(seed)
+        
+        # 包裹在IIFE中，避免在文档创建时注入的顶层const与页面脚本冲突
         return f"""
+        (function() {{
             // 修改navigator属性
             Object.defineProperties(navigator, {{
                 userAgent: {{ value: "{fingerprint['navigator']['userAgent']}" }},
@@ -151,14 +525,8 @@ class FingerprintManager:
                 }}
             }};
             
-            // Canvas指纹保护
-            const originalToDataURL = HTMLCanvasElement.prototype.toDataURL;
-            HTMLCanvasElement.prototype.toDataURL = function(type) {{
-                if (type === 'image/png' && this.width === 16 && this.height === 16) {{
-                    return 'data:image/png;base64,00';
-                }}
-                return originalToDataURL.apply(this, arguments);
-            }};
+            // Canvas/音频/ClientRects确定性噪声
+            {noise_script}
             
             // 字体指纹保护
             Object.defineProperty(document, 'fonts', {{
@@ -176,4 +544,5 @@ class FingerprintManager:
                     }};
                 }}
             }});
+        }})();
         """
@@ -16,72 +16,154 @@ class FingerprintManager:
             logger.error(f"Failed to inject JavaScript: {str(e)}")
             raise
 
-    def modify_navigator(self, properties: Dict[str, Any]):
-        """修改navigator属性"""
-        script = """
-        const properties = arguments[0];
-        for (let [key, value] of Object.entries(properties)) {
-            Object.defineProperty(navigator, key, {
-                get: () => value
-            });
-        }
+    @staticmethod
+    def _navigator_script(properties: Dict[str, Any]) -> str:
+        return f"""
+        (function() {{
+            const properties = {json.dumps(properties)};
+            for (let [key, value] of Object.entries(properties)) {{
+                Object.defineProperty(navigator, key, {{
+                    get: () => value
+                }});
+            }}
+        }})();
         """
-        self.inject_js_script(script, properties)
-        
-    def modify_screen_resolution(self, width: int, height: int):
-        """修改屏幕分辨率"""
-        script = f"""
+
+    @staticmethod
+    def _screen_resolution_script(width: int, height: int) -> str:
+        return f"""
         Object.defineProperty(window.screen, 'width', {{
-            get: () => {width}
+            get: () => {int(width)}
         }});
         Object.defineProperty(window.screen, 'height', {{
-            get: () => {height}
+            get: () => {int(height)}
         }});
         """
-        self.inject_js_script(script)
-        
-    def modify_timezone(self, timezone: str):
-        """修改时区"""
-        script = f"""
+
+    @staticmethod
+    def _timezone_script(timezone: str) -> str:
+        return f"""
         Object.defineProperty(Intl, 'DateTimeFormat', {{
             get: () => function() {{
-                return {{ resolvedOptions: () => {{ return {{ timeZone: '{timezone}' }} }} }}
+                return {{ resolvedOptions: () => {{ return {{ timeZone: {json.dumps(timezone)} }} }} }}
             }}
         }});
         """
-        self.inject_js_script(script)
+
+    @staticmethod
+    def _webgl_vendor_script(vendor: str, renderer: str) -> str:
+        return f"""
+        (function() {{
+            const getParameter = WebGLRenderingContext.prototype.getParameter;
+            WebGLRenderingContext.prototype.getParameter = function(parameter) {{
+                if (parameter === 37445) {{
+                    return {json.dumps(vendor)};
+                }}
+                if (parameter === 37446) {{
+                    return {json.dumps(renderer)};
+                }}
+                return getParameter.apply(this, arguments);
+            }};
+        }})();
+        """
+
+    @staticmethod
+    def _user_agent_script(user_agent: str) -> str:
+        return f"""
+        Object.defineProperty(navigator, 'userAgent', {{
+            get: () => {json.dumps(user_agent)}
+        }});
+        """
+
+    def modify_navigator(self, properties: Dict[str, Any]):
+        """修改navigator属性"""
+        self.inject_js_script(self._navigator_script(properties))
+        
+    def modify_screen_resolution(self, width: int, height: int):
+        """修改屏幕分辨率"""
+        self.inject_js_script(self._screen_resolution_script(width, height))
+        
+    def modify_timezone(self, timezone: str):
+        """修改时区"""
+        self.inject_js_script(self._timezone_script(timezone))
         
     def modify_webgl_vendor(self, vendor: str, renderer: str):
         """修改WebGL信息"""
-        script = f"""
-        const getParameter = WebGLRenderingContext.prototype.getParameter;
-        WebGLRenderingContext.prototype.getParameter = function(parameter) {{
-            if (parameter === 37445) {{
-                return '{vendor}';
-            }}
-            if (parameter === 37446) {{
-                return '{renderer}';
-            }}
-            return getParameter.apply(this, arguments);
-        }};
-        """
-        self.inject_js_script(script)
+        self.inject_js_script(self._webgl_vendor_script(vendor, renderer))
         
     def modify_user_agent(self, user_agent: str):
         """修改User-Agent"""
-        script = f"""
-        Object.defineProperty(navigator, 'userAgent', {{
-            get: () => '{user_agent}'
-        }});
+        self.inject_js_script(self._user_agent_script(user_agent))
+
+    @classmethod
+    def compile_bundle(cls, config: Dict[str, Any]) -> str:
+        """将整个指纹配置编译为单个脚本（不需要驱动，异步浏览器同样使用）"""
+        parts = []
+        if 'navigator' in config:
+            parts.append(cls._navigator_script(config['navigator']))
+        if 'screen' in config:
+            parts.append(cls._screen_resolution_script(
+                config['screen'].get('width', 1920),
+                config['screen'].get('height', 1080)
+            ))
+        if 'timezone' in config:
+            parts.append(cls._timezone_script(config['timezone']))
+        if 'webgl' in config:
+            parts.append(cls._webgl_vendor_script(
+                config['webgl'].get('vendor', ''),
+                config['webgl'].get('renderer', '')
+            ))
+        if 'userAgent' in config:
+            parts.append(cls._user_agent_script(config['userAgent']))
+        # 每段独立捕获异常，避免一处失败影响其余修改
+        return "\n".join(f"try {{ {part} }} catch (e) {{}}" for part in parts)
+
+    def register_bundle(self, config: Dict[str, Any]) -> str:
+        """通过CDP注册指纹脚本，在之后每个新文档创建时执行
+
+        只需一次往返，导航后依然生效。返回可用于替换或移除的标识符。
         """
-        self.inject_js_script(script)
+        try:
+            result = self.driver.execute_cdp_cmd(
+                "Page.addScriptToEvaluateOnNewDocument",
+                {"source": self.compile_bundle(config)}
+            )
+        except Exception as e:
+            logger.error(f"Failed to register fingerprint bundle: {str(e)}")
+            raise
+        return result["identifier"]
+
+    def remove_bundle(self, identifier: str):
+        """移除已注册的指纹脚本"""
+        try:
+            self.driver.execute_cdp_cmd(
+                "Page.removeScriptToEvaluateOnNewDocument",
+                {"identifier": identifier}
+            )
+        except Exception as e:
+            logger.error(f"Failed to remove fingerprint bundle: {str(e)}")
+            raise
+
+    def replace_bundle(self, identifier: str, config: Dict[str, Any]) -> str:
+        """用新的指纹配置替换已注册的脚本，返回新的标识符"""
+        self.remove_bundle(identifier)
+        return self.register_bundle(config)
         
-    def load_fingerprint(self, fingerprint_file: str):
-        """从文件加载指纹配置"""
+    def load_fingerprint(self, fingerprint_file: str, persistent: bool = False) -> Optional[str]:
+        """从文件加载指纹配置
+
+        persistent为True时将整个指纹编译为一个脚本并通过CDP注册，
+        返回脚本标识符；否则逐项修改当前文档。
+        """
         try:
             with open(fingerprint_file, 'r') as f:
                 config = json.load(f)
                 
+            if persistent:
+                identifier = self.register_bundle(config)
+                logger.info(f"Successfully registered fingerprint from {fingerprint_file}")
+                return identifier
+                
             if 'navigator' in config:
                 self.modify_navigator(config['navigator'])
             if 'screen' in config:
@@ -100,6 +182,7 @@ class FingerprintManager:
                 self.modify_user_agent(config['userAgent'])
                 
             logger.info(f"Successfully loaded fingerprint from {fingerprint_file}")
+            return None
         except Exception as e:
             logger.error(f"Failed to load fingerprint: {str(e)}")
             raise
@@ -0,0 +1,201 @@
+import hashlib
+
+# 让替换后的函数在toString时看起来仍是原生函数：只替换一次Function.prototype.toString，
+# 被替换的函数登记在WeakMap中，不在函数上留下任何自有属性。
+# 多个脚本各自包含这段代码时会层层包装，toString仍逐层还原到原生函数。
+DISGUISE_SCRIPT = """
+    const nativeToString = Function.prototype.toString;
+    const disguised = new WeakMap();
+    const disguise = (fake, original) => {
+        disguised.set(fake, original);
+        return fake;
+    };
+    Function.prototype.toString = disguise(function toString() {
+        return nativeToString.call(disguised.get(this) || this);
+    }, nativeToString);
+"""
+
+# 确定性噪声引擎：同一种子对同一内容总是产生相同的扰动，
+# 只遍历稀疏的采样点，不会逐字节处理整块画布或音频缓冲区
+NOISE_SCRIPT_TEMPLATE = """
+(function() {
+    const SEED = __SEED__ >>> 0;
+    const ENABLE_CANVAS = __CANVAS__;
+    const ENABLE_AUDIO = __AUDIO__;
+    const ENABLE_CLIENT_RECTS = __CLIENT_RECTS__;
+
+    if (window.__fgNoiseInstalled) {
+        return;
+    }
+    Object.defineProperty(window, '__fgNoiseInstalled', { value: true });
+
+    // 32位整数混合函数
+    const mix = (x) => {
+        x = Math.imul(x ^ (x >>> 16), 0x7feb352d);
+        x = Math.imul(x ^ (x >>> 15), 0x846ca68b);
+        return (x ^ (x >>> 16)) >>> 0;
+    };
+
+__DISGUISE__
+
+    if (ENABLE_CANVAS) {
+        const CANVAS_STRIDE = 61 + SEED % 67;
+
+        // 原地对不透明像素的一个RGB通道做最低位异或，再次调用即可精确还原
+        const noiseImage = (data, width, height, salt) => {
+            const pixels = data.length >>> 2;
+            let h = mix(SEED ^ Math.imul(width, 65599) ^ Math.imul(height, 257) ^ salt);
+            for (let p = h % CANVAS_STRIDE; p < pixels; p += CANVAS_STRIDE) {
+                const i = p << 2;
+                h = mix(h + p);
+                if (data[i + 3] === 255) {
+                    data[i + h % 3] ^= 1;
+                }
+            }
+        };
+
+        const contextTypes = new WeakMap();
+        const originalGetContext = HTMLCanvasElement.prototype.getContext;
+        HTMLCanvasElement.prototype.getContext = disguise(function getContext(type) {
+            const context = originalGetContext.apply(this, arguments);
+            if (context && !contextTypes.has(this)) {
+                contextTypes.set(this, type);
+            }
+            return context;
+        }, originalGetContext);
+
+        const originalGetImageData = CanvasRenderingContext2D.prototype.getImageData;
+        const originalPutImageData = CanvasRenderingContext2D.prototype.putImageData;
+        CanvasRenderingContext2D.prototype.getImageData = disguise(function getImageData(sx, sy, sw, sh) {
+            const image = originalGetImageData.apply(this, arguments);
+            noiseImage(image.data, image.width, image.height, mix(sx ^ Math.imul(sy, 31)));
+            return image;
+        }, originalGetImageData);
+
+        // 导出时只读取一次像素：2D画布原地加噪后导出再异或还原，
+        // WebGL画布绘制到临时画布后加噪。WebGL画布不用readPixels直接读取：
+        // preserveDrawingBuffer为false时绘制缓冲区在合成后已被清空，drawImage与toDataURL一样
+        // 读取已显示的内容；readPixels的结果还需逐行翻转，并不比这次GPU端拷贝更省
+        const withNoisedCanvas = (canvas, exporter) => {
+            const type = contextTypes.get(canvas);
+            const width = canvas.width;
+            const height = canvas.height;
+            if (!type || !width || !height) {
+                return exporter(canvas);
+            }
+            if (type === '2d') {
+                const context = originalGetContext.call(canvas, '2d');
+                const image = originalGetImageData.call(context, 0, 0, width, height);
+                noiseImage(image.data, width, height, 0);
+                originalPutImageData.call(context, image, 0, 0);
+                try {
+                    return exporter(canvas);
+                } finally {
+                    noiseImage(image.data, width, height, 0);
+                    originalPutImageData.call(context, image, 0, 0);
+                }
+            }
+            const scratch = document.createElement('canvas');
+            scratch.width = width;
+            scratch.height = height;
+            const context = originalGetContext.call(scratch, '2d');
+            context.drawImage(canvas, 0, 0);
+            const image = originalGetImageData.call(context, 0, 0, width, height);
+            noiseImage(image.data, width, height, 0);
+            originalPutImageData.call(context, image, 0, 0);
+            return exporter(scratch);
+        };
+
+        const originalToDataURL = HTMLCanvasElement.prototype.toDataURL;
+        HTMLCanvasElement.prototype.toDataURL = disguise(function toDataURL() {
+            const args = arguments;
+            return withNoisedCanvas(this, (canvas) => originalToDataURL.apply(canvas, args));
+        }, originalToDataURL);
+
+        // toBlob在调用时同步拷贝位图，因此可以立即还原
+        const originalToBlob = HTMLCanvasElement.prototype.toBlob;
+        HTMLCanvasElement.prototype.toBlob = disguise(function toBlob() {
+            const args = arguments;
+            return withNoisedCanvas(this, (canvas) => originalToBlob.apply(canvas, args));
+        }, originalToBlob);
+    }
+
+    if (ENABLE_AUDIO) {
+        const AUDIO_STRIDE = 97 + SEED % 89;
+        // getChannelData返回的是缓冲区本身，每个声道只加一次噪声
+        const noisedChannels = new WeakMap();
+
+        const noiseChannel = (buffer, channel, data) => {
+            let channels = noisedChannels.get(buffer);
+            if (!channels) {
+                channels = new Set();
+                noisedChannels.set(buffer, channels);
+            }
+            if (channels.has(channel)) {
+                return;
+            }
+            channels.add(channel);
+            let h = mix(SEED ^ Math.imul(channel + 1, 0x9e3779b1) ^ data.length);
+            for (let i = h % AUDIO_STRIDE; i < data.length; i += AUDIO_STRIDE) {
+                h = mix(h + i);
+                data[i] *= 1 + ((h & 0xff) - 127.5) * 1e-7;
+            }
+        };
+
+        const originalGetChannelData = AudioBuffer.prototype.getChannelData;
+        AudioBuffer.prototype.getChannelData = disguise(function getChannelData(channel) {
+            const data = originalGetChannelData.apply(this, arguments);
+            noiseChannel(this, channel, data);
+            return data;
+        }, originalGetChannelData);
+
+        const originalCopyFromChannel = AudioBuffer.prototype.copyFromChannel;
+        AudioBuffer.prototype.copyFromChannel = disguise(function copyFromChannel(destination, channel) {
+            noiseChannel(this, channel, originalGetChannelData.call(this, channel));
+            return originalCopyFromChannel.apply(this, arguments);
+        }, originalCopyFromChannel);
+    }
+
+    if (ENABLE_CLIENT_RECTS) {
+        // 对每个矩形加入与种子相关的亚像素偏移
+        const offsetX = ((SEED & 0xffff) / 0xffff - 0.5) * 1e-3;
+        const offsetY = (((SEED >>> 16) & 0xffff) / 0xffff - 0.5) * 1e-3;
+        const perturb = (rect) => {
+            rect.x += offsetX;
+            rect.y += offsetY;
+            return rect;
+        };
+
+        [Element.prototype, Range.prototype].forEach(proto => {
+            const originalGetClientRects = proto.getClientRects;
+            proto.getClientRects = disguise(function getClientRects() {
+                const rects = originalGetClientRects.apply(this, arguments);
+                for (let i = 0; i < rects.length; i++) {
+                    perturb(rects[i]);
+                }
+                return rects;
+            }, originalGetClientRects);
+
+            const originalGetBoundingClientRect = proto.getBoundingClientRect;
+            proto.getBoundingClientRect = disguise(function getBoundingClientRect() {
+                return perturb(originalGetBoundingClientRect.apply(this, arguments));
+            }, originalGetBoundingClientRect);
+        });
+    }
+})();
+"""
+
+
+def noise_seed(key: str) -> int:
+    """根据配置文件名称等标识生成32位噪声种子"""
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:4], "big")
+
+
+def build_noise_script(seed: int, canvas: bool = True, audio: bool = True, client_rects: bool = True) -> str:
+    """生成带种子的画布/音频/ClientRects噪声脚本"""
+    return (NOISE_SCRIPT_TEMPLATE
+            .replace("__DISGUISE__", DISGUISE_SCRIPT)
+            .replace("__SEED__", str(int(seed) & 0xffffffff))
+            .replace("__CANVAS__", "true" if canvas else "false")
+            .replace("__AUDIO__", "true" if audio else "false")
+            .replace("__CLIENT_RECTS__", "true" if client_rects else "false"))
@@ -0,0 +1,274 @@
+import copy
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from loguru import logger
+from .uniqueness import canonical_hash
+
+
+def _allocate(prefix: str, count: int, taken: set) -> List[str]:
+    """从 {prefix}_1 开始分配count个未被占用的名称"""
+    names = []
+    index = 1
+    while len(names) < count:
+        name = f"{prefix}_{index}"
+        if name not in taken:
+            names.append(name)
+        index += 1
+    return names
+
+
+class DirectoryFingerprintStorage:
+    """每个指纹一个JSON文件的存储（原有目录布局）
+
+    解析后的指纹缓存在内存中，每次访问只做一次stat，
+    文件的mtime/size变化时才重新读取并解析。
+    返回的都是副本，调用方修改不会影响缓存。
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # 名称 -> ((mtime_ns, size), 指纹)
+        self._cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        # 名称 -> 缓存记录的内容哈希，随缓存一起失效
+        self._hashes: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.json")
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+    def _load(self, name: str) -> Optional[Dict[str, Any]]:
+        """读取缓存中的指纹（不复制），文件变化时重新解析"""
+        path = self._path(name)
+        try:
+            signature = self._signature(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._cache.pop(name, None)
+                self._hashes.pop(name, None)
+            return None
+
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+
+        with open(path, "r") as f:
+            fingerprint = json.load(f)
+        with self._lock:
+            self.misses += 1
+            self._cache[name] = (signature, fingerprint)
+            self._hashes.pop(name, None)
+        logger.debug(f"Fingerprint loaded from disk: {path}")
+        return fingerprint
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        fingerprint = self._load(name)
+        return copy.deepcopy(fingerprint) if fingerprint is not None else None
+
+    def content_hash(self, name: str) -> Optional[str]:
+        """记录的规范化内容哈希，每个记录版本只计算一次"""
+        fingerprint = self._load(name)
+        if fingerprint is None:
+            return None
+        with self._lock:
+            key = self._hashes.get(name)
+        if key is None:
+            key = canonical_hash(fingerprint)
+            with self._lock:
+                entry = self._cache.get(name)
+                if entry is not None and entry[1] is fingerprint:
+                    self._hashes[name] = key
+        return key
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self._path(name))
+
+    def put(self, name: str, fingerprint: Dict[str, Any]):
+        self.put_many({name: fingerprint})
+
+    def put_many(self, fingerprints: Dict[str, Dict[str, Any]]):
+        """先完成全部序列化，再集中写入，写入后更新缓存以免下一次访问重新解析"""
+        payloads = [(name, self._path(name), fingerprint, json.dumps(fingerprint, indent=4))
+                    for name, fingerprint in fingerprints.items()]
+        for name, path, fingerprint, payload in payloads:
+            with open(path, "w") as f:
+                f.write(payload)
+            signature = self._signature(path)
+            with self._lock:
+                self._cache[name] = (signature, copy.deepcopy(fingerprint))
+                self._hashes.pop(name, None)
+
+    def delete(self, name: str):
+        path = self._path(name)
+        if os.path.exists(path):
+            os.remove(path)
+        with self._lock:
+            self._cache.pop(name, None)
+            self._hashes.pop(name, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取缓存统计信息"""
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def names(self) -> List[str]:
+        return sorted(file[:-5] for file in os.listdir(self.directory) if file.endswith(".json"))
+
+    def allocate_names(self, prefix: str, count: int = 1) -> List[str]:
+        return _allocate(prefix, count, set(self.names()))
+
+    def iter_fingerprints(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """逐个读取磁盘上的指纹（不经过缓存），用于流式遍历"""
+        for name in self.names():
+            try:
+                with open(self._path(name), "r") as f:
+                    yield name, json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable fingerprint {name}: {str(e)}")
+
+
+class SQLiteFingerprintStorage:
+    """单文件SQLite指纹库（WAL模式）
+
+    解析后的指纹缓存在内存中，通过 PRAGMA data_version
+    检测其他连接的写入并使缓存失效。返回的都是副本，调用方修改不会影响缓存。
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "name TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._hashes: Dict[str, str] = {}  # 名称 -> 内容哈希，随缓存一起失效
+        self._data_version = self._current_data_version()
+
+    def _current_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _revalidate(self):
+        """其他进程写入过数据库时清空缓存"""
+        version = self._current_data_version()
+        if version != self._data_version:
+            self._cache.clear()
+            self._hashes.clear()
+            self._data_version = version
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._revalidate()
+            fingerprint = self._cache.get(name)
+            if fingerprint is None:
+                row = self._conn.execute("SELECT data FROM fingerprints WHERE name = ?", (name,)).fetchone()
+                if row is None:
+                    return None
+                fingerprint = json.loads(row[0])
+                self._cache[name] = fingerprint
+            return copy.deepcopy(fingerprint)
+
+    def content_hash(self, name: str) -> Optional[str]:
+        """记录的规范化内容哈希，每个记录版本只计算一次"""
+        with self._lock:
+            self._revalidate()
+            key = self._hashes.get(name)
+            if key is None:
+                fingerprint = self._cache.get(name)
+                if fingerprint is None:
+                    row = self._conn.execute("SELECT data FROM fingerprints WHERE name = ?", (name,)).fetchone()
+                    if row is None:
+                        return None
+                    fingerprint = self._cache[name] = json.loads(row[0])
+                key = self._hashes[name] = canonical_hash(fingerprint)
+            return key
+
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM fingerprints WHERE name = ?", (name,)).fetchone() is not None
+
+    def put(self, name: str, fingerprint: Dict[str, Any]):
+        self.put_many({name: fingerprint})
+
+    def put_many(self, fingerprints: Dict[str, Dict[str, Any]]):
+        """在一个事务中批量写入"""
+        now = time.time()
+        rows = [(name, json.dumps(fingerprint, ensure_ascii=False), now) for name, fingerprint in fingerprints.items()]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO fingerprints (name, data, updated_at) VALUES (?, ?, ?)", rows
+                )
+            self._revalidate()
+            self._cache.update(copy.deepcopy(fingerprints))
+            for name in fingerprints:
+                self._hashes.pop(name, None)
+
+    def delete(self, name: str):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM fingerprints WHERE name = ?", (name,))
+            self._revalidate()
+            self._cache.pop(name, None)
+            self._hashes.pop(name, None)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM fingerprints ORDER BY name")]
+
+    def allocate_names(self, prefix: str, count: int = 1) -> List[str]:
+        """只查询带该前缀的名称来分配空闲序号"""
+        pattern = re.compile(rf"^{re.escape(prefix)}_(\d+)$")
+        # GLOB中的特殊字符需要转义为字符类
+        glob_prefix = re.sub(r"([\[\]*?])", r"[\1]", prefix)
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM fingerprints WHERE name GLOB ?", (f"{glob_prefix}_*",))
+            taken = {row[0] for row in rows if pattern.match(row[0])}
+        return _allocate(prefix, count, taken)
+
+    def iter_fingerprints(self, batch_size: int = 500) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """按名称分批读取全部指纹，不经过缓存"""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT name, data FROM fingerprints WHERE name > ? ORDER BY name LIMIT ?", (last, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for name, data in rows:
+                yield name, json.loads(data)
+            last = rows[-1][0]
@@ -0,0 +1,255 @@
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from loguru import logger
+
+# 默认的可关联性键组合：这些属性相同的两个身份很容易被关联起来
+DEFAULT_LINKABILITY_KEYS: Dict[str, List[str]] = {
+    "ua_screen_webgl": [
+        "navigator.userAgent",
+        "screen.width",
+        "screen.height",
+        "webgl.unmaskedRenderer"
+    ],
+    "ua_hardware": [
+        "navigator.userAgent",
+        "navigator.hardwareConcurrency",
+        "navigator.deviceMemory"
+    ]
+}
+
+# 每条记录独立的噪声字段，不属于身份本身，判断重复时排除
+NOISE_FIELDS = ("noise_seed",)
+
+# 索引文件格式版本，哈希的计算方式变化时升级，旧索引随之重建
+INDEX_VERSION = 2
+
+
+def canonical_hash(value: Any, exclude: Iterable[str] = ()) -> str:
+    """计算数据的规范化哈希（与键顺序无关），exclude中的顶层键不参与计算"""
+    if exclude and isinstance(value, dict):
+        excluded = set(exclude)
+        value = {key: item for key, item in value.items() if key not in excluded}
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def identity_hash(fingerprint: Dict[str, Any]) -> str:
+    """指纹的身份哈希：不含噪声种子，属性完全相同的两个指纹哈希相同"""
+    return canonical_hash(fingerprint, NOISE_FIELDS)
+
+
+def _lookup(fingerprint: Dict[str, Any], path: str) -> Any:
+    value = fingerprint
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def linkability_hash(fingerprint: Dict[str, Any], paths: List[str]) -> str:
+    """计算指定属性子集的哈希"""
+    return canonical_hash([_lookup(fingerprint, path) for path in paths])
+
+
+class FingerprintIndex:
+    """指纹唯一性索引
+
+    持久化保存每个指纹的身份哈希（见identity_hash）和各可关联性键组合的哈希，
+    创建或导入时可以O(1)检查冲突。
+    单条修改后调用schedule_save()，SAVE_DELAY秒内的多次修改合并为一次写入；
+    批量修改后直接调用save()。
+    """
+
+    SAVE_DELAY = 0.5
+
+    def __init__(self, index_file: str, linkability_keys: Optional[Dict[str, List[str]]] = None):
+        self.index_file = index_file
+        self.linkability_keys = linkability_keys or DEFAULT_LINKABILITY_KEYS
+        self._lock = threading.RLock()
+        # 规范化哈希 -> 名称集合（允许导入的重复指纹也能被找到）
+        self.canonical: Dict[str, Set[str]] = {}
+        # 键组合 -> 哈希 -> 名称列表
+        self.linkability: Dict[str, Dict[str, List[str]]] = {key: {} for key in self.linkability_keys}
+        # 名称 -> {"canonical": 哈希, 键组合: 哈希}
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self._save_timer: Optional[threading.Timer] = None
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        """从文件加载索引，键组合配置变化时丢弃旧的可关联性数据"""
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load fingerprint index, it will be rebuilt: {str(e)}")
+            return
+
+        if data.get("version") != INDEX_VERSION:
+            logger.info("Fingerprint index format changed, fingerprint index needs rebuild")
+            return
+        if data.get("linkability_keys") != self.linkability_keys:
+            logger.info("Linkability keys changed, fingerprint index needs rebuild")
+            return
+        # 旧版索引每个哈希只记录一个名称
+        self.canonical = {
+            key: {names} if isinstance(names, str) else set(names)
+            for key, names in data.get("canonical", {}).items()
+        }
+        self.entries = data.get("entries", {})
+        for key in self.linkability_keys:
+            self.linkability[key] = data.get("linkability", {}).get(key, {})
+
+    def schedule_save(self):
+        """在SAVE_DELAY秒后写入索引文件，期间的多次修改合并为一次写入"""
+        with self._lock:
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self):
+        """写入尚未保存的修改"""
+        with self._lock:
+            if self._save_timer is not None:
+                self.save()
+
+    def save(self):
+        """原子地写入索引文件"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            data = {
+                "version": INDEX_VERSION,
+                "linkability_keys": self.linkability_keys,
+                "canonical": {key: sorted(names) for key, names in self.canonical.items()},
+                "linkability": self.linkability,
+                "entries": self.entries
+            }
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            tmp_file = f"{self.index_file}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.index_file)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def check(self, fingerprint: Dict[str, Any], name: Optional[str] = None) -> Dict[str, Any]:
+        """检查指纹与已有指纹的冲突（忽略同名记录）
+
+        返回 {"duplicate": 完全相同的指纹名称或None, "linkable": {键组合: [名称]}}
+        """
+        with self._lock:
+            owners = sorted(self.canonical.get(identity_hash(fingerprint), ()))
+            duplicate = next((owner for owner in owners if owner != name), None)
+            linkable = {}
+            for key, paths in self.linkability_keys.items():
+                names = [n for n in self.linkability[key].get(linkability_hash(fingerprint, paths), []) if n != name]
+                if names:
+                    linkable[key] = names
+            return {
+                "duplicate": duplicate,
+                "linkable": linkable
+            }
+
+    def is_duplicate(self, key: str) -> bool:
+        """检查身份哈希是否已被占用"""
+        return key in self.canonical
+
+    def add(self, name: str, fingerprint: Dict[str, Any]):
+        """添加或更新指纹记录"""
+        with self._lock:
+            self.remove(name)
+            key = identity_hash(fingerprint)
+            entry = {"canonical": key}
+            self.canonical.setdefault(key, set()).add(name)
+            for link_key, paths in self.linkability_keys.items():
+                link_hash = linkability_hash(fingerprint, paths)
+                entry[link_key] = link_hash
+                self.linkability[link_key].setdefault(link_hash, []).append(name)
+            self.entries[name] = entry
+
+    def remove(self, name: str):
+        """移除指纹记录"""
+        with self._lock:
+            entry = self.entries.pop(name, None)
+            if entry is None:
+                return
+            owners = self.canonical.get(entry["canonical"])
+            if owners is not None:
+                owners.discard(name)
+                if not owners:
+                    del self.canonical[entry["canonical"]]
+            for link_key in self.linkability_keys:
+                bucket = self.linkability[link_key].get(entry.get(link_key))
+                if bucket and name in bucket:
+                    bucket.remove(name)
+                    if not bucket:
+                        del self.linkability[link_key][entry[link_key]]
+
+    def rebuild(self, fingerprints: Iterable[Tuple[str, Dict[str, Any]]]):
+        """根据全部指纹重建索引"""
+        with self._lock:
+            self.canonical = {}
+            self.linkability = {key: {} for key in self.linkability_keys}
+            self.entries = {}
+            for name, fingerprint in fingerprints:
+                self.add(name, fingerprint)
+
+
+def audit(fingerprints: Iterable[Tuple[str, Dict[str, Any]]],
+          linkability_keys: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[List[str]]]:
+    """单次流式遍历所有指纹，报告完全相同或可关联的身份簇
+
+    内存占用只与不同哈希的数量有关，不会保留指纹本身。
+    """
+    linkability_keys = linkability_keys or DEFAULT_LINKABILITY_KEYS
+    groups: Dict[str, Dict[str, List[str]]] = {"duplicate": defaultdict(list)}
+    for key in linkability_keys:
+        groups[key] = defaultdict(list)
+
+    for name, fingerprint in fingerprints:
+        groups["duplicate"][identity_hash(fingerprint)].append(name)
+        for key, paths in linkability_keys.items():
+            groups[key][linkability_hash(fingerprint, paths)].append(name)
+
+    report = {}
+    for key, buckets in groups.items():
+        clusters = [names for names in buckets.values() if len(names) > 1]
+        clusters.sort(key=len, reverse=True)
+        report[key] = clusters
+    return report
+
+
+def main():
+    from .fingerprint_manager import FingerprintManager
+
+    parser = argparse.ArgumentParser(description="Audit stored fingerprints for duplicate or linkable identities")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the uniqueness index as well")
+    args = parser.parse_args()
+
+    manager = FingerprintManager()
+    report = audit(manager.iter_fingerprints())
+    for key, clusters in report.items():
+        logger.info(f"{key}: {len(clusters)} clusters, {sum(len(c) for c in clusters)} identities")
+    if args.rebuild:
+        manager.rebuild_index()
+    print(json.dumps(report, indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
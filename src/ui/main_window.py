@@ -9,7 +9,9 @@ import json
 import os
 import pytz
 from ..browser.browser_manager import BrowserManager
+from ..browser.launch_modes import LAUNCH_MODES
 import random
+from concurrent.futures import as_completed
 
 class ProfileDialog(QDialog):
     def __init__(self, parent=None, profile=None):
@@ -50,12 +52,27 @@ class ProfileDialog(QDialog):
         self.dns_leak_protection = QCheckBox("Enable DNS Leak Protection")
         self.dns_leak_protection.setChecked(True)
         
+        # 启动模式
+        self.launch_mode_combo = QComboBox()
+        self.launch_mode_combo.addItems(list(LAUNCH_MODES))
+        self.headless_check = QCheckBox("Run Headless")
+        
+        # 分组和标签
+        self.group_edit = QLineEdit()
+        self.group_edit.setPlaceholderText("e.g., shop-us")
+        self.tags_edit = QLineEdit()
+        self.tags_edit.setPlaceholderText("Comma separated, e.g., warmed, paypal")
+        
         basic_layout.addRow("Profile Name:", self.name_edit)
         basic_layout.addRow("Proxy (host:port):", self.proxy_edit)
         basic_layout.addRow("Timezone:", self.timezone_combo)
         basic_layout.addRow("DNS Protection:", self.dns_protection_combo)
         basic_layout.addRow("Custom DNS:", self.custom_dns_edit)
         basic_layout.addRow("", self.dns_leak_protection)
+        basic_layout.addRow("Launch Mode:", self.launch_mode_combo)
+        basic_layout.addRow("", self.headless_check)
+        basic_layout.addRow("Group:", self.group_edit)
+        basic_layout.addRow("Tags:", self.tags_edit)
         
         basic_tab.setLayout(basic_layout)
         
@@ -180,6 +197,12 @@ class ProfileDialog(QDialog):
             self.dns_protection_combo.setCurrentIndex(index)
         self.custom_dns_edit.setText(profile.custom_dns)
         self.dns_leak_protection.setChecked(profile.dns_leak_protection)
+        index = self.launch_mode_combo.findText(profile.launch_mode)
+        if index >= 0:
+            self.launch_mode_combo.setCurrentIndex(index)
+        self.headless_check.setChecked(profile.headless)
+        self.group_edit.setText(profile.group or "")
+        self.tags_edit.setText(", ".join(profile.tags))
         
         # 隐私设置
         index = self.webrtc_combo.findText(profile.webrtc)
@@ -236,6 +259,10 @@ class ProfileDialog(QDialog):
             "dns_protection": self.dns_protection_combo.currentText(),
             "custom_dns": self.custom_dns_edit.text(),
             "dns_leak_protection": self.dns_leak_protection.isChecked(),
+            "launch_mode": self.launch_mode_combo.currentText(),
+            "headless": self.headless_check.isChecked(),
+            "group": self.group_edit.text().strip() or None,
+            "tags": [tag.strip() for tag in self.tags_edit.text().split(",") if tag.strip()],
             "fingerprint": {
                 "hardware": {
                     "cpu_cores": self.cpu_cores.value(),
@@ -271,7 +298,14 @@ class ProfileItemWidget(QWidget):
         self.toggle_button.setStyleSheet('QPushButton { background-color: #51cf66; color: white; }')
         layout.addWidget(self.toggle_button)
 
+    def set_starting(self):
+        """显示启动中状态"""
+        self.toggle_button.setText('Starting...')
+        self.toggle_button.setEnabled(False)
+        self.toggle_button.setStyleSheet('QPushButton { background-color: #adb5bd; color: white; }')
+
     def update_button_state(self, is_running):
+        self.toggle_button.setEnabled(True)
         if is_running:
             self.toggle_button.setText('Stop')
             self.toggle_button.setStyleSheet('QPushButton { background-color: #ff6b6b; color: white; }')
@@ -295,12 +329,32 @@ class BrowserLaunchThread(QThread):
         except Exception as e:
             self.finished.emit(False, str(e))
 
+class BulkLaunchThread(QThread):
+    """批量浏览器启动线程"""
+    profile_finished = pyqtSignal(str, bool, str)  # 配置名称, 成功/失败, 错误信息
+
+    def __init__(self, browser_manager, profile_names, max_parallel=None):
+        super().__init__()
+        self.browser_manager = browser_manager
+        self.profile_names = profile_names
+        self.max_parallel = max_parallel
+
+    def run(self):
+        futures = self.browser_manager.launch_many(self.profile_names, self.max_parallel)
+        names = {future: name for name, future in futures.items()}
+        for future in as_completed(names):
+            error = future.exception()
+            self.profile_finished.emit(names[future], error is None, str(error) if error else "")
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.browser_manager = BrowserManager()
         self.profile_widgets = {}  # 存储配置文件对应的小部件
-        self.launch_thread = None  # 浏览器启动线程
+        self.launch_threads = {}  # 配置名称 -> 浏览器启动线程
+        self.bulk_launch_thread = None  # 批量启动线程
+        self.bulk_launch_errors = {}  # 批量启动失败的配置 -> 错误信息
+        self.launching = set()  # 正在启动的配置名称
         self.init_ui()
 
     def init_ui(self):
@@ -325,6 +379,16 @@ class MainWindow(QMainWindow):
         title_layout.addWidget(profile_title)
         title_layout.addStretch()
         
+        # 按分组和标签筛选（使用配置文件的二级索引）
+        self.group_filter = QComboBox()
+        self.group_filter.currentIndexChanged.connect(lambda index: self.load_profiles())
+        self.tag_filter = QComboBox()
+        self.tag_filter.currentIndexChanged.connect(lambda index: self.load_profiles())
+        title_layout.addWidget(QLabel("Group:"))
+        title_layout.addWidget(self.group_filter)
+        title_layout.addWidget(QLabel("Tag:"))
+        title_layout.addWidget(self.tag_filter)
+        
         list_layout.addWidget(title_widget)
         
         # 配置文件列表
@@ -344,9 +408,13 @@ class MainWindow(QMainWindow):
         delete_btn = QPushButton('Delete')
         delete_btn.clicked.connect(self.delete_profile)
         
+        start_all_btn = QPushButton('Start All')
+        start_all_btn.clicked.connect(self.start_all_browsers)
+        
         button_layout.addWidget(create_btn)
         button_layout.addWidget(edit_btn)
         button_layout.addWidget(delete_btn)
+        button_layout.addWidget(start_all_btn)
         button_layout.addStretch()
         
         list_layout.addLayout(button_layout)
@@ -365,13 +433,38 @@ class MainWindow(QMainWindow):
         self.status_timer.timeout.connect(self.update_profile_states)
         self.status_timer.start(1000)  # 每秒更新一次状态
 
+    def _refresh_filters(self):
+        """更新筛选下拉框的选项，保留当前选择"""
+        for combo, label, values in (
+            (self.group_filter, "All groups", self.browser_manager.get_profile_groups()),
+            (self.tag_filter, "All tags", self.browser_manager.get_profile_tags())
+        ):
+            current = combo.currentData()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem(label, None)
+            for value in values:
+                combo.addItem(value, value)
+            index = combo.findData(current)
+            combo.setCurrentIndex(index if index >= 0 else 0)
+            combo.blockSignals(False)
+
+    def _filter_criteria(self) -> dict:
+        """当前筛选条件，作为query_profiles的参数"""
+        criteria = {}
+        if self.group_filter.currentData():
+            criteria["group"] = self.group_filter.currentData()
+        if self.tag_filter.currentData():
+            criteria["tag"] = self.tag_filter.currentData()
+        return criteria
+
     def load_profiles(self):
-        """加载所有浏览器配置到列表中"""
+        """加载符合筛选条件的浏览器配置到列表中"""
         self.profile_list.clear()
         self.profile_widgets.clear()
         
-        profiles = self.browser_manager.get_all_profiles()
-        for name in profiles:
+        self._refresh_filters()
+        for name in self.browser_manager.query_profiles(ordered=True, **self._filter_criteria()):
             # 创建列表项
             item = QListWidgetItem()
             self.profile_list.addItem(item)
@@ -388,46 +481,84 @@ class MainWindow(QMainWindow):
             self.profile_widgets[name] = widget
             
             # 更新按钮状态
-            profile = self.browser_manager.get_profile(name)
-            widget.update_button_state(profile.is_running)
+            widget.update_button_state(self.browser_manager.is_profile_running(name))
 
     def update_profile_states(self):
         """更新所有配置文件的状态"""
         for name, widget in self.profile_widgets.items():
-            profile = self.browser_manager.get_profile(name)
-            if profile:
-                widget.update_button_state(profile.is_running)
+            if name in self.launching:
+                continue
+            widget.update_button_state(self.browser_manager.is_profile_running(name))
 
     def toggle_browser(self, profile_name):
         """切换浏览器启动/关闭状态"""
         try:
+            if profile_name in self.launching:
+                return
             profile = self.browser_manager.get_profile(profile_name)
             if profile.is_running:
                 self.browser_manager.close_browser(profile_name)
                 self.update_profile_states()
             else:
-                # 显示进度对话框
-                self.progress = QProgressDialog("Starting browser...", None, 0, 0, self)
-                self.progress.setWindowTitle("Please Wait")
-                self.progress.setWindowModality(Qt.WindowModal)
-                self.progress.setCancelButton(None)  # 禁用取消按钮
-                self.progress.show()
+                self._mark_launching(profile_name)
 
-                # 创建并启动线程
-                self.launch_thread = BrowserLaunchThread(self.browser_manager, profile_name)
-                self.launch_thread.finished.connect(self.on_browser_launch_finished)
-                self.launch_thread.start()
+                # 每个配置文件使用独立的启动线程，可同时启动多个
+                thread = BrowserLaunchThread(self.browser_manager, profile_name)
+                thread.finished.connect(
+                    lambda success, error_msg, n=profile_name: self.on_browser_launch_finished(n, success, error_msg)
+                )
+                self.launch_threads[profile_name] = thread
+                thread.start()
 
         except Exception as e:
             QMessageBox.warning(self, "Error", str(e))
 
-    def on_browser_launch_finished(self, success, error_msg):
+    def start_all_browsers(self):
+        """以有限并发启动符合当前筛选条件且未运行的浏览器"""
+        if self.bulk_launch_thread is not None:
+            return
+        names = [
+            name for name in self.browser_manager.query_profiles(running=False, **self._filter_criteria())
+            if name not in self.launching
+        ]
+        if not names:
+            return
+        for name in names:
+            self._mark_launching(name)
+        self.bulk_launch_errors = {}
+        self.bulk_launch_thread = BulkLaunchThread(self.browser_manager, names)
+        self.bulk_launch_thread.profile_finished.connect(self.on_bulk_profile_finished)
+        self.bulk_launch_thread.finished.connect(self.on_bulk_launch_finished)
+        self.bulk_launch_thread.start()
+
+    def _mark_launching(self, profile_name):
+        self.launching.add(profile_name)
+        widget = self.profile_widgets.get(profile_name)
+        if widget:
+            widget.set_starting()
+
+    def on_browser_launch_finished(self, profile_name, success, error_msg):
         """浏览器启动完成的回调"""
-        self.progress.close()
+        self.launching.discard(profile_name)
+        self.launch_threads.pop(profile_name, None)
+        if not success:
+            QMessageBox.warning(self, "Error", f"{profile_name}: {error_msg}")
+        self.update_profile_states()
+
+    def on_bulk_profile_finished(self, profile_name, success, error_msg):
+        """批量启动中单个浏览器完成的回调，错误汇总后统一提示"""
+        self.launching.discard(profile_name)
         if not success:
-            QMessageBox.warning(self, "Error", error_msg)
+            self.bulk_launch_errors[profile_name] = error_msg
         self.update_profile_states()
-        self.launch_thread = None
+
+    def on_bulk_launch_finished(self):
+        """批量启动线程结束的回调"""
+        self.bulk_launch_thread = None
+        if self.bulk_launch_errors:
+            details = "\n".join(f"{name}: {error}" for name, error in self.bulk_launch_errors.items())
+            QMessageBox.warning(self, "Error", f"{len(self.bulk_launch_errors)} browsers failed to start:\n{details}")
+        self.bulk_launch_errors = {}
 
     def edit_profile(self):
         """编辑配置文件"""
@@ -467,7 +598,7 @@ class MainWindow(QMainWindow):
             data = dialog.get_profile_data()
             try:
                 self.browser_manager.create_profile(
-                    name=self.name_edit.text(),
+                    name=dialog.name_edit.text(),
                     fingerprint=data["fingerprint"],
                     proxy=data["proxy"],
                     timezone=data["timezone"],
@@ -479,6 +610,10 @@ class MainWindow(QMainWindow):
                     dns_protection=data["dns_protection"],
                     custom_dns=data["custom_dns"],
                     dns_leak_protection=data["dns_leak_protection"],
+                    launch_mode=data["launch_mode"],
+                    headless=data["headless"],
+                    group=data["group"],
+                    tags=data["tags"],
                 )
                 self.load_profiles()
             except ValueError as e:
@@ -548,14 +683,12 @@ class MainWindow(QMainWindow):
     def update_running_list(self):
         """更新运行中的浏览器列表"""
         self.running_list.clear()
-        profiles = self.browser_manager.get_all_profiles()
-        for name, profile in profiles.items():
-            if profile.is_running:
-                self.running_list.addItem(name)
+        for name in self.browser_manager.list_running_profiles():
+            self.running_list.addItem(name)
                 
     def closeEvent(self, event):
         """关闭窗口时关闭所有浏览器"""
-        profiles = self.browser_manager.get_all_profiles()
-        for name in profiles:
+        for name in self.browser_manager.list_running_profiles():
             self.browser_manager.close_browser(name)
+        self.browser_manager.shutdown()
         event.accept()
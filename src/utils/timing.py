@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# 直方图桶的上界（毫秒），最后一个桶收集所有更慢的记录
+BUCKET_BOUNDS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+
+class Histogram:
+    """固定桶的耗时直方图"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+
+    def observe(self, duration_ms: float):
+        index = len(BUCKET_BOUNDS_MS)
+        for i, bound in enumerate(BUCKET_BOUNDS_MS):
+            if duration_ms <= bound:
+                index = i
+                break
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.min_ms = duration_ms if self.min_ms is None else min(self.min_ms, duration_ms)
+        self.max_ms = duration_ms if self.max_ms is None else max(self.max_ms, duration_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "min_ms": self.min_ms,
+            "max_ms": self.max_ms,
+            "buckets": {
+                (f"le_{BUCKET_BOUNDS_MS[i]}" if i < len(BUCKET_BOUNDS_MS) else "inf"): n
+                for i, n in enumerate(self.buckets)
+            }
+        }
+
+
+class TimingStore:
+    """进程内的阶段耗时存储
+
+    每个阶段一个直方图，同时保留最近的带标签记录（配置名称、代理等），
+    便于按标签找出慢的代理或配置。
+    """
+
+    def __init__(self, max_spans: int = 1000):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Histogram] = {}
+        self.spans = deque(maxlen=max_spans)
+
+    def record(self, phase: str, duration_ms: float, **tags):
+        with self._lock:
+            histogram = self.histograms.get(phase)
+            if histogram is None:
+                histogram = self.histograms[phase] = Histogram()
+            histogram.observe(duration_ms)
+            self.spans.append({
+                "phase": phase,
+                "duration_ms": duration_ms,
+                "timestamp": time.time(),
+                "tags": tags
+            })
+
+    @contextmanager
+    def span(self, phase: str, **tags):
+        """记录代码块耗时的上下文管理器，异常时同样记录并标记失败"""
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if failed:
+                tags["failed"] = True
+            self.record(phase, (time.perf_counter() - start) * 1000, **tags)
+
+    def summary(self, group_by: Optional[str] = None) -> Dict[str, Any]:
+        """按阶段（可再按某个标签分组）汇总最近记录的平均耗时"""
+        with self._lock:
+            spans = list(self.spans)
+        result: Dict[str, Dict[str, List[float]]] = {}
+        for span in spans:
+            group = str(span["tags"].get(group_by)) if group_by else "all"
+            result.setdefault(group, {}).setdefault(span["phase"], []).append(span["duration_ms"])
+        return {
+            group: {
+                phase: {"count": len(values), "mean_ms": sum(values) / len(values), "max_ms": max(values)}
+                for phase, values in phases.items()
+            }
+            for group, phases in result.items()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "histograms": {phase: h.to_dict() for phase, h in self.histograms.items()},
+                "spans": list(self.spans)
+            }
+
+    def export_json(self, path: str):
+        """导出为JSON文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=4, ensure_ascii=False)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.spans.clear()
+
+
+_launch_timings: Optional[TimingStore] = None
+_launch_timings_lock = threading.Lock()
+
+
+def get_launch_timings() -> TimingStore:
+    """获取浏览器启动阶段的进程级耗时存储"""
+    global _launch_timings
+    if _launch_timings is None:
+        with _launch_timings_lock:
+            if _launch_timings is None:
+                _launch_timings = TimingStore()
+    return _launch_timings
@@ -0,0 +1,61 @@
+import pytest
+from src.fingerprint.fingerprint_manager import FingerprintManager
+
+
+def _manager(tmp_path, subdir, secret="fleet-secret"):
+    return FingerprintManager(fingerprints_dir=str(tmp_path / subdir), fleet_secret=secret)
+
+
+def test_derivation_is_deterministic_across_managers(tmp_path):
+    first = _manager(tmp_path, "a")
+    second = _manager(tmp_path, "b")
+    for name in ("alpha", "beta", "gamma"):
+        assert first.derive_fingerprint(name) == second.derive_fingerprint(name)
+
+
+def test_derivation_depends_on_name_and_secret(tmp_path):
+    manager = _manager(tmp_path, "a")
+    other = _manager(tmp_path, "b", secret="other-secret")
+    names = [f"profile_{i}" for i in range(20)]
+    derived = [manager.derive_fingerprint(name) for name in names]
+    assert len({str(fp) for fp in derived}) > 1
+    assert derived != [other.derive_fingerprint(name) for name in names]
+
+
+def test_derived_platform_matches_user_agent(tmp_path):
+    fingerprint = _manager(tmp_path, "a").derive_fingerprint("alpha")
+    assert "Windows" in fingerprint["navigator"]["userAgent"]
+    assert fingerprint["navigator"]["platform"] == "Win32"
+
+
+def test_derived_fingerprints_are_not_stored(tmp_path):
+    manager = _manager(tmp_path, "a")
+    assert manager.load_fingerprint("alpha") == manager.derive_fingerprint("alpha")
+    assert not manager.fingerprint_exists("alpha")
+
+
+def test_derivation_requires_secret(tmp_path):
+    manager = _manager(tmp_path, "a", secret=None)
+    manager.fleet_secret = None
+    with pytest.raises(ValueError):
+        manager.derive_fingerprint("alpha")
+
+
+def test_derived_fingerprint_is_a_copy(tmp_path):
+    manager = _manager(tmp_path, "a")
+    fingerprint = manager.derive_fingerprint("alpha")
+    original = fingerprint["navigator"]["userAgent"]
+    fingerprint["navigator"]["userAgent"] = "mutated"
+    assert manager.derive_fingerprint("alpha")["navigator"]["userAgent"] == original
+
+
+def test_derived_fingerprints_are_indexed(tmp_path):
+    manager = _manager(tmp_path, "a")
+    derived = manager.derive_fingerprint("alpha")
+    assert "alpha" in manager.index
+    assert manager.index.check(derived, "copy")["duplicate"] == "alpha"
+    with pytest.raises(ValueError):
+        manager.import_fingerprint("copy", derived)
+
+    manager.rebuild_index()
+    assert "alpha" in manager.index
@@ -0,0 +1,129 @@
+import json
+import os
+import pytest
+from src.fingerprint.fingerprint_manager import FingerprintManager
+from src.fingerprint.storage import DirectoryFingerprintStorage
+from src.fingerprint.uniqueness import FingerprintIndex, canonical_hash, identity_hash
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return FingerprintManager(fingerprints_dir=str(tmp_path / "profiles"))
+
+
+def test_index_detects_duplicates(tmp_path):
+    index = FingerprintIndex(str(tmp_path / "index.json"))
+    fingerprint = {"navigator": {"userAgent": "ua"}, "noise_seed": 1}
+    index.add("a", fingerprint)
+    assert index.check(fingerprint, "a")["duplicate"] is None
+    assert index.check(fingerprint, "b")["duplicate"] == "a"
+    # 噪声种子不属于身份，只有种子不同的指纹仍是重复
+    assert index.check(dict(fingerprint, noise_seed=2), "b")["duplicate"] == "a"
+    assert index.check(dict(fingerprint, navigator={"userAgent": "other"}), "b")["duplicate"] is None
+
+
+def test_index_keeps_every_owner_of_a_hash(tmp_path):
+    index = FingerprintIndex(str(tmp_path / "index.json"))
+    fingerprint = {"navigator": {"userAgent": "ua"}}
+    index.add("a", fingerprint)
+    index.add("b", fingerprint)
+    index.remove("a")
+    assert index.is_duplicate(canonical_hash(fingerprint))
+    assert index.check(fingerprint, "c")["duplicate"] == "b"
+    index.remove("b")
+    assert not index.is_duplicate(canonical_hash(fingerprint))
+
+
+def test_index_persists_and_loads_legacy_format(tmp_path):
+    path = str(tmp_path / "index.json")
+    index = FingerprintIndex(path)
+    index.add("a", {"x": 1})
+    index.add("b", {"x": 1})
+    index.save()
+    reloaded = FingerprintIndex(path)
+    assert reloaded.canonical[canonical_hash({"x": 1})] == {"a", "b"}
+
+    # 旧版索引每个哈希只记录一个名称
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["canonical"] = {key: names[0] for key, names in data["canonical"].items()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert FingerprintIndex(path).canonical[canonical_hash({"x": 1})] == {"a"}
+
+
+def test_schedule_save_is_flushed(tmp_path):
+    path = str(tmp_path / "index.json")
+    index = FingerprintIndex(path)
+    index.add("a", {"x": 1})
+    index.schedule_save()
+    assert not os.path.exists(path)
+    index.flush()
+    assert "a" in FingerprintIndex(path)
+
+
+def test_index_from_older_format_is_rebuilt(tmp_path):
+    directory = str(tmp_path / "profiles")
+    manager = FingerprintManager(fingerprints_dir=directory)
+    manager.create_fingerprint("a")
+    manager.index.save()
+    path = manager.index.index_file
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    del data["version"]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert len(FingerprintIndex(path)) == 0
+    assert "a" in FingerprintManager(fingerprints_dir=directory).index
+
+
+def test_fingerprints_differing_only_in_seed_are_duplicates(manager):
+    ua = manager.user_agents[0]
+    manager.import_fingerprint("first", manager._build_fingerprint(ua, 4, 8, 1920, 1080, seed=1))
+    second = manager._build_fingerprint(ua, 4, 8, 1920, 1080, seed=2)
+    with pytest.raises(ValueError):
+        manager.import_fingerprint("second", second)
+    assert not manager.fingerprint_exists("second")
+
+    manager.save_fingerprint("second", second)
+    assert manager.audit_fingerprints()["duplicate"] == [["first", "second"]]
+
+
+def test_create_fingerprints_are_unique(manager):
+    fingerprints = manager.create_fingerprints(200, seed=2)
+    assert len(fingerprints) == 200
+    assert len({identity_hash(fp) for fp in fingerprints.values()}) == 200
+    assert len(manager.index) == 200
+
+
+def test_create_fingerprints_beyond_attribute_space_fails(manager):
+    space = (len(manager.user_agents) * len(manager.hardware_concurrency_choices)
+             * len(manager.device_memory_choices) * len(manager.screen_resolutions))
+    with pytest.raises(ValueError):
+        manager.create_fingerprints(space + 1, seed=3)
+
+
+def test_create_fingerprints_is_reproducible(tmp_path):
+    first = FingerprintManager(fingerprints_dir=str(tmp_path / "a")).create_fingerprints(50, seed=7)
+    second = FingerprintManager(fingerprints_dir=str(tmp_path / "b")).create_fingerprints(50, seed=7)
+    assert first == second
+
+
+def test_import_rejects_duplicates(manager, tmp_path):
+    existing = manager.create_fingerprint("existing")
+    source = DirectoryFingerprintStorage(str(tmp_path / "import"))
+    source.put("copy", existing)
+    with pytest.raises(ValueError):
+        manager.import_fingerprints(source.directory)
+    assert not manager.fingerprint_exists("copy")
+
+    assert manager.import_fingerprints(source.directory, allow_duplicates=True) == 1
+    assert manager.index.check(existing, "existing")["duplicate"] == "copy"
+
+
+def test_import_rejects_duplicates_within_batch(manager, tmp_path):
+    source = DirectoryFingerprintStorage(str(tmp_path / "import"))
+    source.put_many({"a": {"x": 1}, "b": {"x": 1}})
+    with pytest.raises(ValueError):
+        manager.import_fingerprints(source.directory)
+    assert len(manager.storage) == 0
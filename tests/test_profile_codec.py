@@ -0,0 +1,85 @@
+import json
+import struct
+import pytest
+from src.browser.profile import BrowserProfile
+from src.browser.profile_codec import (
+    CODEC_VERSION, MAGIC, PROFILE_SCHEMA, decode_profile, encode_profile, record_version
+)
+
+
+def _profile(**kwargs) -> BrowserProfile:
+    defaults = dict(
+        name="shop_1",
+        proxy="http://10.0.0.1:8080",
+        timezone="Europe/Berlin",
+        geolocation={"latitude": 52.5, "longitude": 13.4},
+        webrtc="only public ip",
+        canvas_fp=False,
+        launch_mode="lean",
+        headless=True,
+        resource_policy={"block_types": ["Image"]},
+        fingerprint={"navigator": {"platform": "Win32"}, "noise_seed": 7},
+        tags=["warmed", "电商"],
+        group="shop-eu"
+    )
+    defaults.update(kwargs)
+    return BrowserProfile(**defaults)
+
+
+def _round_trip(profile: BrowserProfile) -> BrowserProfile:
+    return BrowserProfile.from_dict(profile.name, decode_profile(encode_profile(profile.to_dict())))
+
+
+def test_round_trip_preserves_every_field():
+    profile = _profile()
+    assert _round_trip(profile).to_dict() == profile.to_dict()
+
+
+def test_round_trip_of_defaults_and_none_values():
+    profile = BrowserProfile(name="empty", custom_dns="")
+    restored = _round_trip(profile)
+    assert restored.to_dict() == profile.to_dict()
+    assert restored.proxy is None and restored.custom_dns == ""
+
+
+def test_record_header():
+    raw = encode_profile(_profile().to_dict())
+    assert raw[:2] == MAGIC
+    assert record_version(raw) == CODEC_VERSION
+    assert raw[3] == len(PROFILE_SCHEMA)
+
+
+def test_legacy_json_records_are_migrated():
+    data = _profile().to_dict()
+    data["resource_policy"] = None
+    legacy = json.dumps(data, ensure_ascii=False)
+    assert record_version(legacy) == 0
+    decoded = decode_profile(legacy)
+    assert "name" not in decoded and "resource_policy" not in decoded
+    restored = BrowserProfile.from_dict("shop_1", decoded)
+    assert restored.resource_policy == {}
+    assert restored.tags == ["warmed", "电商"]
+    # SQLite中以BLOB形式读出的旧版记录
+    assert decode_profile(legacy.encode("utf-8")) == decoded
+
+
+def test_records_with_fewer_fields_use_defaults():
+    # 旧代码写入的记录缺少末尾追加的字段
+    count = len(PROFILE_SCHEMA) - 3
+    raw = bytearray(encode_profile(_profile().to_dict()))
+    lengths = struct.unpack_from(f"<{len(PROFILE_SCHEMA)}I", raw, 4)
+    payload_start = 4 + 4 * len(PROFILE_SCHEMA)
+    kept = sum(length for (_, kind), length in zip(PROFILE_SCHEMA[:count], lengths)
+               if kind != "bool" and length != 0xFFFFFFFF)
+    truncated = (bytes(raw[:3]) + bytes([count]) + struct.pack(f"<{count}I", *lengths[:count])
+                 + bytes(raw[payload_start:payload_start + kept]))
+    restored = BrowserProfile.from_dict("shop_1", decode_profile(truncated))
+    assert restored.proxy == "http://10.0.0.1:8080"
+    assert restored.tags == [] and restored.group is None and restored.headless is False
+
+
+def test_newer_versions_are_rejected():
+    raw = bytearray(encode_profile(_profile().to_dict()))
+    raw[2] = CODEC_VERSION + 1
+    with pytest.raises(ValueError):
+        decode_profile(bytes(raw))
@@ -0,0 +1,144 @@
+import json
+import sqlite3
+import pytest
+from src.browser.profile import ProfileManager
+from src.browser.profile_index import ProfileIndex, index_keys
+
+
+def _keys(group=None, proxy=None, timezone=None, platform=None, tags=()):
+    return {"group": group, "proxy": proxy, "timezone": timezone, "platform": platform, "tags": sorted(tags)}
+
+
+@pytest.fixture
+def index() -> ProfileIndex:
+    index = ProfileIndex()
+    index.add("a", _keys(group="shop", proxy="http://1.1.1.1:80", platform="Win32", tags=["warmed"]))
+    index.add("b", _keys(group="shop", timezone="Europe/Berlin", platform="MacIntel", tags=["warmed", "vip"]))
+    index.add("c", _keys(group="social", proxy="http://1.1.1.1:80", platform="Win32"))
+    return index
+
+
+def test_index_keys_from_profile_dict():
+    keys = index_keys({
+        "group": "", "proxy": "http://1.1.1.1:80", "timezone": None,
+        "fingerprint": {"navigator": {"platform": "Win32"}}, "tags": ["b", "a", "b"]
+    })
+    assert keys == _keys(proxy="http://1.1.1.1:80", platform="Win32", tags=["a", "b"])
+
+
+def test_query_intersects_criteria(index):
+    assert index.query(group="shop") == {"a", "b"}
+    assert index.query(group="shop", platform="Win32") == {"a"}
+    assert index.query(proxy="http://1.1.1.1:80", platform="Win32") == {"a", "c"}
+    assert index.query(group="social", tag="warmed") == set()
+    assert index.query(group="missing") == set()
+    assert index.query() == {"a", "b", "c"}
+
+
+def test_tags_are_multi_valued(index):
+    assert index.query(tag="warmed") == {"a", "b"}
+    assert index.query(tag="vip") == {"b"}
+    assert index.values("tag") == {"warmed": 2, "vip": 1}
+
+
+def test_none_matches_empty_field(index):
+    assert index.query(proxy=None) == {"b"}
+    assert index.query(timezone=None, group="shop") == {"a"}
+
+
+def test_update_moves_changed_keys_only(index):
+    index.add("b", _keys(group="social", timezone="Europe/Berlin", platform="MacIntel", tags=["vip"]))
+    assert index.query(group="shop") == {"a"}
+    assert index.query(group="social") == {"b", "c"}
+    assert index.query(tag="warmed") == {"a"}
+    assert index.values("timezone") == {"Europe/Berlin": 1, None: 2}
+
+
+def test_remove_drops_empty_values(index):
+    index.set_running("c", True)
+    index.remove("c")
+    assert "c" not in index
+    assert len(index) == 2
+    assert "social" not in index.values("group")
+    assert index.running == set()
+
+
+def test_running_filter(index):
+    index.set_running("a", True)
+    index.set_running("b", True)
+    index.set_running("b", False)
+    assert index.query(running=True) == {"a"}
+    assert index.query(running=False) == {"b", "c"}
+    assert index.query(running=False, platform="Win32") == {"c"}
+    assert index.query(running=None, platform="Win32") == {"a", "c"}
+
+
+def test_unknown_field_raises(index):
+    with pytest.raises(ValueError):
+        index.query(color="red")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = ProfileManager(str(tmp_path), cache_size=2)
+    yield manager
+    manager.close()
+
+
+def test_manager_query_order(manager):
+    for name in ("p3", "p1", "p2"):
+        manager.create_profile(name, group="shop")
+    manager.create_profile("p4", group="social")
+    assert sorted(manager.query(group="shop")) == ["p1", "p2", "p3"]
+    assert manager.query(group="shop", ordered=True) == ["p3", "p1", "p2"]
+    assert manager.query(ordered=True) == ["p3", "p1", "p2", "p4"]
+    manager.delete_profile("p1")
+    assert manager.query(ordered=True) == ["p3", "p2", "p4"]
+
+
+def test_manager_evicts_cold_unpinned_profiles(manager):
+    for name in ("p1", "p2", "p3", "p4"):
+        manager.create_profile(name)
+    manager.flush()
+    assert list(manager._cache) == ["p3", "p4"]
+
+    manager.set_running("p3", driver=object())
+    manager.get_profile("p1")
+    manager.get_profile("p2")
+    # 运行中的p3不被淘汰，最近访问的p2保留
+    assert list(manager._cache) == ["p3", "p2"]
+    assert manager.running_names() == ["p3"]
+
+
+def _ui_fingerprint(platform="Windows"):
+    # 与ProfileDialog.get_profile_data保存的结构一致
+    return {
+        "hardware": {"cpu_cores": 4, "memory": 8, "gpu_vendor": "NVIDIA", "screen_resolution": "1920x1080"},
+        "navigator": {"platform": platform, "browser": "Chrome 119", "language": "en-US"}
+    }
+
+
+def test_platform_of_ui_and_generated_fingerprints():
+    assert index_keys({"fingerprint": _ui_fingerprint("MacOS")})["platform"] == "MacIntel"
+    assert index_keys({"fingerprint": {"hardware": {"platform": "Windows"}}})["platform"] == "Win32"
+    assert index_keys({"fingerprint": {"navigator": {"platform": "Linux x86_64"}}})["platform"] == "Linux x86_64"
+    user_agent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+    assert index_keys({"fingerprint": {"navigator": {"userAgent": user_agent}}})["platform"] == "MacIntel"
+    assert index_keys({"fingerprint": None})["platform"] is None
+
+
+def test_manager_queries_ui_profiles_by_platform(tmp_path):
+    manager = ProfileManager(str(tmp_path))
+    manager.create_profile("ui", fingerprint=_ui_fingerprint())
+    manager.create_profile("generated", fingerprint={"navigator": {"platform": "Win32"}})
+    manager.create_profile("mac", fingerprint=_ui_fingerprint("MacOS"))
+    assert manager.query(platform="Win32", ordered=True) == ["ui", "generated"]
+    manager.close()
+
+    # 旧版本计算的索引键在重新打开时重新计算
+    with sqlite3.connect(str(tmp_path / "profiles.db")) as conn:
+        conn.execute("UPDATE profiles SET index_keys = ? WHERE name = 'ui'", (json.dumps(_keys(platform="Windows")),))
+        conn.execute("DELETE FROM meta WHERE key = 'index_keys_version'")
+    reopened = ProfileManager(str(tmp_path))
+    assert reopened.query(platform="Win32", ordered=True) == ["ui", "generated"]
+    reopened.close()
@@ -0,0 +1,53 @@
+import threading
+import pytest
+from src.browser.supervisor import BrowserSupervisor
+
+
+def _supervisor(**kwargs):
+    return BrowserSupervisor(on_exit=lambda name, driver: None, **kwargs)
+
+
+def test_backoff_doubles_and_is_capped():
+    supervisor = _supervisor(backoff_base=2.0, backoff_max=60.0)
+    assert [supervisor.backoff_delay(count) for count in range(7)] == [2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0]
+
+
+@pytest.fixture
+def restarting():
+    """自动重启的监控器，记录事件；重启总是失败，从而连续累计崩溃次数"""
+    events = []
+    abandoned = threading.Event()
+
+    def restart(name):
+        raise RuntimeError("still crashing")
+
+    def listener(event, name, details):
+        events.append((event, details))
+        if event == "restart_abandoned":
+            abandoned.set()
+
+    supervisor = _supervisor(restart=restart, auto_restart=True, max_restarts=3,
+                             backoff_base=0.001, backoff_max=0.004, poll_interval=0.05)
+    supervisor.on_event(listener)
+    supervisor.start()
+    yield supervisor, events, abandoned
+    supervisor.shutdown()
+
+
+def test_consecutive_crashes_back_off_then_give_up(restarting):
+    supervisor, events, abandoned = restarting
+    supervisor._schedule_restart("p", uptime=0.0)
+    assert abandoned.wait(5)
+    delays = [details["delay"] for event, details in events if event == "restarting"]
+    attempts = [details["attempt"] for event, details in events if event == "restarting"]
+    assert delays == [0.001, 0.002, 0.004]
+    assert attempts == [1, 2, 3]
+    assert events[-1] == ("restart_abandoned", {"attempts": 3})
+
+
+def test_stable_uptime_resets_the_crash_count(restarting):
+    supervisor, events, _ = restarting
+    supervisor._restart_counts["p"] = 2
+    supervisor.restart = lambda name: None
+    supervisor._schedule_restart("p", uptime=BrowserSupervisor.STABLE_UPTIME)
+    assert events[0] == ("restarting", {"attempt": 1, "delay": 0.001})